@@ -0,0 +1,305 @@
+"""
+EmbeddingDAE 학습용 데이터 로더 (CSR 플레이리스트 행렬 + torch.utils.data).
+
+    python data.py build --train train.json --out csr/
+    python data.py bench --csr csr/ --batch-size 256 --workers 2 --num-neg 256
+
+- 플레이리스트 = CSR (indptr int64, indices int32 곡 id) .npy, np.load(mmap_mode="r") 로 워커가 페이지 캐시 공유
+- BucketBatchSampler: bucket 안에서 길이순으로 묶어 배치 내 패딩 최소화, 배치 순서는 섞음
+- 배치 단위로 한 번에: 곡을 섞어 ceil(len*mask_ratio) 개(1..len-1)를 정답으로 가리고 나머지를 입력으로,
+  음성 num_neg 개를 (균등 또는 인기도^neg_power) 한꺼번에 뽑고 플레이리스트 곡과 겹치면 mask
+- 출력은 EmbeddingDAE.encode_flat(ids, offsets) / score_padded(p, cand, mask) 에 바로 들어가는 텐서
+- 난수는 (seed, epoch, 배치 번호) 로 정해져 워커 수와 상관없이 같은 배치
+"""
+import argparse
+import json
+import math
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+INDPTR_NPY = "indptr.npy"    # (P+1,) int64
+INDICES_NPY = "indices.npy"  # (nnz,) int32, 플레이리스트 안 곡 순서 그대로
+
+
+def build_csr(playlists: Sequence[dict], out_dir: str, min_len: int = 2) -> Tuple[int, int]:
+    """train.json 플레이리스트 → CSR .npy (곡 수 min_len 미만은 제외). 반환: (플레이리스트 수, nnz)"""
+    rows = [pl.get("songs", []) for pl in playlists]
+    rows = [r for r in rows if len(r) >= min_len]
+    lens = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lens, out=indptr[1:])
+    indices = np.fromiter((s for r in rows for s in r), dtype=np.int32, count=int(indptr[-1]))
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, INDPTR_NPY), indptr)
+    np.save(os.path.join(out_dir, INDICES_NPY), indices)
+    return len(rows), int(indptr[-1])
+
+
+def load_csr(csr_dir: str, mmap: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    mode = "r" if mmap else None
+    return (np.load(os.path.join(csr_dir, INDPTR_NPY), mmap_mode=mode),
+            np.load(os.path.join(csr_dir, INDICES_NPY), mmap_mode=mode))
+
+
+class BucketBatchSampler(Sampler):
+    """
+    (epoch, 배치 번호, 행 인덱스 배열) 을 내는 배치 샘플러.
+    섞은 뒤 bucket_batches 배치 분량씩 잘라 길이순 정렬 → 배치로 자름 → 배치 순서를 섞음.
+    """
+
+    def __init__(self, lengths: np.ndarray, batch_size: int, bucket_batches: int = 50,
+                 shuffle: bool = True, drop_last: bool = False, seed: int = 42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size, self.bucket_batches = batch_size, bucket_batches
+        self.shuffle, self.drop_last, self.seed = shuffle, drop_last, seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def batches(self) -> List[np.ndarray]:
+        n, B = self.lengths.shape[0], self.batch_size
+        rng = np.random.default_rng([self.seed, self.epoch])
+        order = rng.permutation(n) if self.shuffle else np.arange(n)
+        out = []
+        step = B * max(1, self.bucket_batches)
+        for s in range(0, n, step):
+            chunk = order[s:s + step]
+            chunk = chunk[np.argsort(self.lengths[chunk], kind="stable")]
+            out += [chunk[i:i + B] for i in range(0, chunk.shape[0], B)]
+        if self.drop_last:
+            out = [b for b in out if b.shape[0] == B]
+        if self.shuffle:
+            out = [out[i] for i in rng.permutation(len(out))]
+        return out
+
+    def __iter__(self) -> Iterator[Tuple[int, int, np.ndarray]]:
+        for i, rows in enumerate(self.batches()):
+            yield self.epoch, i, rows
+
+    def __len__(self) -> int:
+        n, B = self.lengths.shape[0], self.batch_size
+        return n // B if self.drop_last else -(-n // B)
+
+
+class DAEBatches(Dataset):
+    """
+    sampler 가 준 (epoch, 배치 번호, 행들) 하나 → 배치 dict 하나 (DataLoader(batch_size=None) 로 사용).
+    반환 텐서
+      ids [sum n_in] int64, offsets [B] int64 : 가려지고 남은 입력 곡 (encode_flat 입력)
+      cand [B, T+num_neg] int64, cand_mask [B, T+num_neg] bool, labels [B, T+num_neg] float32
+        : 앞 T 칸은 가린 정답 (패딩), 뒤 num_neg 칸은 음성
+    """
+
+    def __init__(self, csr_dir: str, num_songs: int, mask_ratio: float = 0.3, num_neg: int = 256,
+                 neg_power: float = 0.0, seed: int = 42):
+        self.csr_dir, self.num_songs = csr_dir, num_songs
+        self.mask_ratio, self.num_neg, self.seed = mask_ratio, num_neg, seed
+        self._indptr = self._indices = None
+        indptr, indices = self._csr()
+        self.lengths = np.diff(indptr)
+        self.neg_cdf = None
+        if neg_power > 0:
+            # 인기도^neg_power 분포 (word2vec 네거티브 샘플링과 같은 방식)
+            p = np.power(np.bincount(indices, minlength=num_songs).astype(np.float64), neg_power)
+            self.neg_cdf = np.cumsum(p) / p.sum()
+
+    def _csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        # 워커 안에서 처음 쓸 때 mmap (memmap 을 pickle 하면 내용이 복사되므로 경로만 넘김)
+        if self._indptr is None:
+            self._indptr, self._indices = load_csr(self.csr_dir)
+        return self._indptr, self._indices
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_indptr"] = state["_indices"] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.lengths.shape[0]
+
+    def __getitem__(self, key: Tuple[int, int, np.ndarray]) -> Dict[str, torch.Tensor]:
+        epoch, batch_no, rows = key
+        rng = np.random.default_rng([self.seed, epoch, batch_no])
+        indptr, indices = self._csr()
+        rows = np.asarray(rows)
+        B = rows.shape[0]
+        starts = np.asarray(indptr[rows])
+        lens = np.asarray(indptr[rows + 1]) - starts
+        total = int(lens.sum())
+
+        # 배치 곡 모으기: seg = 플레이리스트 번호 (연속)
+        seg = np.repeat(np.arange(B), lens)
+        seg_start = np.zeros(B, dtype=np.int64)
+        np.cumsum(lens[:-1], out=seg_start[1:])
+        songs = np.asarray(indices[np.repeat(starts - seg_start, lens) + np.arange(total)], dtype=np.int64)
+
+        # 플레이리스트별로 섞은 순위 < m 이면 정답 (m = ceil(len*ratio), 1..len-1)
+        order = np.lexsort((rng.random(total), seg))
+        rank = np.empty(total, dtype=np.int64)
+        rank[order] = np.arange(total) - seg_start[seg]
+        m = np.clip(np.ceil(lens * self.mask_ratio).astype(np.int64), 1, np.maximum(lens - 1, 1))
+        is_target = rank < m[seg]
+
+        inp = ~is_target
+        ids = songs[inp]
+        in_lens = np.bincount(seg[inp], minlength=B)
+        offsets = np.zeros(B, dtype=np.int64)
+        np.cumsum(in_lens[:-1], out=offsets[1:])
+
+        # 정답 → [B, T] 패딩 (rank 가 곧 칸 번호)
+        T = int(m.max()) if B else 0
+        tgt = np.zeros((B, T), dtype=np.int64)
+        tgt_mask = np.zeros((B, T), dtype=bool)
+        tgt[seg[is_target], rank[is_target]] = songs[is_target]
+        tgt_mask[seg[is_target], rank[is_target]] = True
+
+        # 음성 한꺼번에: 플레이리스트에 있는 곡이면 mask (키 = 행*num_songs + 곡)
+        K = self.num_neg
+        if self.neg_cdf is None:
+            neg = rng.integers(0, self.num_songs, size=(B, K), dtype=np.int64)
+        else:
+            neg = np.searchsorted(self.neg_cdf, rng.random((B, K)), side="right").astype(np.int64)
+        own = np.unique(seg * self.num_songs + songs)
+        neg_mask = ~np.isin(np.arange(B)[:, None] * self.num_songs + neg, own, assume_unique=False)
+
+        cand = np.concatenate([tgt, neg], axis=1)
+        cand_mask = np.concatenate([tgt_mask, neg_mask], axis=1)
+        labels = np.zeros(cand.shape, dtype=np.float32)
+        labels[:, :T] = tgt_mask
+        return {"ids": torch.from_numpy(ids), "offsets": torch.from_numpy(offsets),
+                "cand": torch.from_numpy(cand), "cand_mask": torch.from_numpy(cand_mask),
+                "labels": torch.from_numpy(labels)}
+
+
+def make_loader(csr_dir: str, num_songs: int, batch_size: int = 256, num_workers: int = 0,
+                prefetch_factor: int = 4, bucket_batches: int = 50, seed: int = 42,
+                **dataset_kw) -> Tuple[DataLoader, BucketBatchSampler]:
+    """에폭마다 sampler.set_epoch(e) 후 loader 를 다시 돌면 됨"""
+    ds = DAEBatches(csr_dir, num_songs, seed=seed, **dataset_kw)
+    sampler = BucketBatchSampler(ds.lengths, batch_size, bucket_batches=bucket_batches, seed=seed)
+    kw = dict(prefetch_factor=prefetch_factor, persistent_workers=True) if num_workers > 0 else {}
+    loader = DataLoader(ds, sampler=sampler, batch_size=None, num_workers=num_workers, **kw)
+    return loader, sampler
+
+
+def sampled_softmax_loss(logits: torch.Tensor, labels: torch.Tensor) -> torch.Tensor:
+    """후보(정답+음성) 위 softmax, 정답들의 -log p 평균 (패딩은 score_padded 에서 -inf)"""
+    logp = F.log_softmax(logits, dim=1)
+    pos = labels > 0
+    return -(logp.masked_fill(~pos, 0.0).sum() / pos.sum().clamp(min=1))
+
+
+# -------------------- 벤치마크 --------------------
+def legacy_batches(indptr: np.ndarray, indices: np.ndarray, num_songs: int, batch_size: int,
+                   mask_ratio: float, num_neg: int, seed: int = 42):
+    """기존 방식: 플레이리스트마다 파이썬에서 가리기/후보 뽑기 → remain_lists, candidates_lists"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(indptr.shape[0] - 1)
+    for s in range(0, order.shape[0], batch_size):
+        remain_lists, candidates_lists, labels_lists = [], [], []
+        for r in order[s:s + batch_size]:
+            songs = [int(x) for x in indices[indptr[r]:indptr[r + 1]]]
+            rng.shuffle(songs)
+            m = min(max(1, math.ceil(len(songs) * mask_ratio)), max(len(songs) - 1, 1))
+            targets, remain = songs[:m], songs[m:]
+            own = set(songs)
+            negs = [int(x) for x in rng.integers(0, num_songs, num_neg) if int(x) not in own]
+            remain_lists.append(torch.tensor(remain, dtype=torch.long))
+            candidates_lists.append(torch.tensor(targets + negs, dtype=torch.long))
+            labels_lists.append(torch.tensor([1.0] * len(targets) + [0.0] * len(negs)))
+        yield remain_lists, candidates_lists, labels_lists
+
+
+def _bench(args) -> None:
+    torch.set_num_threads(args.threads)
+    indptr, indices = load_csr(args.csr)
+    n = indptr.shape[0] - 1
+    model = opt = None
+    if args.train_step:
+        from model import EmbeddingDAE
+        model = EmbeddingDAE(args.num_songs, dim=args.dim)
+        opt = torch.optim.Adam(model.parameters(), lr=1e-3)
+
+    def step_legacy(remain_lists, candidates_lists, labels_lists):
+        logits = model(remain_lists, candidates_lists)
+        loss = torch.stack([-(F.log_softmax(lg, 0)[lb > 0]).mean() for lg, lb in zip(logits, labels_lists)]).mean()
+        opt.zero_grad(); loss.backward(); opt.step()
+
+    def step_new(b):
+        p = model.encode_flat(b["ids"], b["offsets"])
+        loss = sampled_softmax_loss(model.score_padded(p, b["cand"], b["cand_mask"]), b["labels"])
+        opt.zero_grad(); loss.backward(); opt.step()
+
+    results = {}
+    t0, seen = time.perf_counter(), 0
+    for batch in legacy_batches(indptr, indices, args.num_songs, args.batch_size, args.mask_ratio, args.num_neg):
+        if model is not None:
+            step_legacy(*batch)
+        seen += len(batch[0])
+        if args.max_batches and seen >= args.max_batches * args.batch_size:
+            break
+    results["legacy"] = seen / (time.perf_counter() - t0)
+
+    loader, sampler = make_loader(args.csr, args.num_songs, args.batch_size, num_workers=args.workers,
+                                  bucket_batches=args.bucket_batches, mask_ratio=args.mask_ratio,
+                                  num_neg=args.num_neg, neg_power=args.neg_power)
+    t0, seen, padded, real = time.perf_counter(), 0, 0, 0
+    for b in loader:
+        if model is not None:
+            step_new(b)
+        B = b["offsets"].shape[0]
+        seen += B
+        T = b["cand"].shape[1] - args.num_neg
+        padded += B * T
+        real += int(b["labels"].sum())
+        if args.max_batches and seen >= args.max_batches * args.batch_size:
+            break
+    results["loader"] = seen / (time.perf_counter() - t0)
+
+    print(json.dumps({"playlists": n, "batch_size": args.batch_size, "workers": args.workers,
+                      "train_step": bool(args.train_step),
+                      "samples_per_s": {k: round(v, 1) for k, v in results.items()},
+                      "speedup": round(results["loader"] / results["legacy"], 2),
+                      "target_padding": round(1 - real / max(padded, 1), 3)}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DAE 학습 데이터 (CSR) 생성 / 로더 벤치마크")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--train", required=True, help="train.json (플레이리스트 목록)")
+    b.add_argument("--out", required=True)
+    b.add_argument("--min-len", type=int, default=2)
+    r = sub.add_parser("bench")
+    r.add_argument("--csr", required=True)
+    r.add_argument("--num-songs", type=int, default=707_989)
+    r.add_argument("--batch-size", type=int, default=256)
+    r.add_argument("--mask-ratio", type=float, default=0.3)
+    r.add_argument("--num-neg", type=int, default=256)
+    r.add_argument("--neg-power", type=float, default=0.0, help="0이면 균등, 0.75면 인기도^0.75")
+    r.add_argument("--bucket-batches", type=int, default=50)
+    r.add_argument("--workers", type=int, default=0)
+    r.add_argument("--threads", type=int, default=1)
+    r.add_argument("--max-batches", type=int, default=0, help="0이면 한 에폭 전체")
+    r.add_argument("--train-step", action="store_true", help="forward/backward 포함해서 측정")
+    r.add_argument("--dim", type=int, default=128)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        with open(args.train, "r", encoding="utf-8") as f:
+            playlists = json.load(f)
+        n, nnz = build_csr(playlists, args.out, args.min_len)
+        print(f"playlists: {n}, nnz: {nnz} -> {args.out}")
+    else:
+        _bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+SGNS 학습 쌍 스트리밍 생성기 (노트북 generate_training_data 대체).
+
+    from pairs import encode_sentences, SkipGramPairs, to_tf_dataset
+    tokens, offsets = encode_sentences(rec.song_sentences, rec.word_to_idx)
+    gen = SkipGramPairs(tokens, offsets, rec.neg_sampling_cdf, window=5, num_neg=10, batch_size=4096)
+    ds = to_tf_dataset(gen)                       # model.fit(ds, steps_per_epoch=gen.steps_per_epoch())
+
+- song_sentences → 평탄한 int32 토큰 배열 + 문장 offsets (1회)
+- 토큰 수 기준 청크마다 window 거리별 shift 비교로 양성 쌍을 한 번에 생성 (같은 문장 안만)
+- 음성은 양성 쌍마다 num_neg개, neg_sampling_cdf에서 한 번에 뽑고 target과 같으면 다시 뽑음 (노트북과 같은 규칙)
+- 청크 안에서 섞은 뒤 고정 크기 배치로 흘려보냄 → 1M 샘플 제한 없이 전체 코퍼스를 일정 메모리로 학습
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def encode_sentences(song_sentences: Dict, word_to_idx: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """vocab에 있는 단어만 남긴 토큰 배열(int32)과 offsets(int64, 문장 수 + 1). 빈 문장은 제외."""
+    toks: List[int] = []
+    offsets = [0]
+    for sentence in song_sentences.values():
+        idx = [word_to_idx[w] for w in sentence if w in word_to_idx]
+        if idx:
+            toks.extend(idx)
+            offsets.append(len(toks))
+    return np.asarray(toks, dtype=np.int32), np.asarray(offsets, dtype=np.int64)
+
+
+def positive_pairs(tok: np.ndarray, sent: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    tok: 토큰, sent: 토큰별 문장 번호 (같은 문장은 연속).
+    거리 d=1..window 마다 tok[:-d] / tok[d:] 를 맞대고 같은 문장인 위치만 (양방향).
+    """
+    ts, cs = [], []
+    for d in range(1, window + 1):
+        if d >= tok.shape[0]:
+            break
+        ok = sent[:-d] == sent[d:]
+        a, b = tok[:-d][ok], tok[d:][ok]
+        ts += [a, b]
+        cs += [b, a]
+    if not ts:
+        return np.empty(0, np.int32), np.empty(0, np.int32)
+    return np.concatenate(ts), np.concatenate(cs)
+
+
+def count_positive_pairs(offsets: np.ndarray, window: int) -> int:
+    """문장 길이 L에서 쌍 수 = sum_d 2*max(0, L-d) (d=1..window)."""
+    L = np.diff(offsets)
+    return int(sum(2 * np.maximum(0, L - d).sum() for d in range(1, window + 1)))
+
+
+def sample_negatives(targets: np.ndarray, cdf: np.ndarray, num_neg: int,
+                     rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    t = np.repeat(targets, num_neg)
+    negs = np.searchsorted(cdf, rng.random(t.shape[0]), side="right").astype(np.int32)
+    mask = negs == t
+    while mask.any():
+        negs[mask] = np.searchsorted(cdf, rng.random(int(mask.sum())), side="right").astype(np.int32)
+        mask = negs == t
+    return t, negs
+
+
+class SkipGramPairs:
+    """
+    (targets, contexts, labels) 고정 크기 배치를 지연 생성하는 이터러블 (에폭마다 iter 다시 호출).
+    - chunk_tokens: 한 번에 쌍을 만들 토큰 수 (메모리 ≈ chunk_tokens * 2*window * (1+num_neg) * 12B)
+    - 에폭마다 문장 순서를 섞고, 청크 안의 쌍도 섞음
+    - max_pairs: (선택) 에폭당 양성 쌍 상한
+    """
+
+    def __init__(self, tokens: np.ndarray, offsets: np.ndarray, neg_sampling_cdf: np.ndarray,
+                 window: int = 5, num_neg: int = 10, batch_size: int = 4096,
+                 chunk_tokens: int = 50_000, seed: int = 42, shuffle: bool = True,
+                 drop_remainder: bool = True, max_pairs: Optional[int] = None):
+        self.tokens = np.asarray(tokens, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.cdf = np.asarray(neg_sampling_cdf, dtype=np.float64)
+        self.window, self.num_neg = window, num_neg
+        self.batch_size, self.chunk_tokens = batch_size, chunk_tokens
+        self.shuffle, self.drop_remainder = shuffle, drop_remainder
+        self.max_pairs = max_pairs
+        self.rng = np.random.default_rng(seed)
+        self._n_pos = count_positive_pairs(self.offsets, window)
+
+    def num_examples(self) -> int:
+        pos = min(self._n_pos, self.max_pairs) if self.max_pairs else self._n_pos
+        return pos * (1 + self.num_neg)
+
+    def steps_per_epoch(self) -> int:
+        n = self.num_examples()
+        return n // self.batch_size if self.drop_remainder else -(-n // self.batch_size)
+
+    def _chunks(self) -> Iterator[np.ndarray]:
+        n_sent = self.offsets.shape[0] - 1
+        order = self.rng.permutation(n_sent) if self.shuffle else np.arange(n_sent)
+        lens = np.diff(self.offsets)[order]
+        # 누적 토큰 수로 청크 경계 (문장 단위)
+        ends = np.searchsorted(np.cumsum(lens), np.arange(self.chunk_tokens, lens.sum() + self.chunk_tokens,
+                                                           self.chunk_tokens), side="right")
+        start = 0
+        for end in np.unique(np.append(ends, n_sent)):
+            if end > start:
+                yield order[start:end]
+                start = end
+
+    def _gather(self, sent_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        starts, lens = self.offsets[sent_ids], np.diff(self.offsets)[sent_ids]
+        total = int(lens.sum())
+        # 문장별 [start, start+len) 을 이어붙인 인덱스
+        first = np.repeat(starts - np.concatenate([[0], np.cumsum(lens)[:-1]]), lens)
+        idx = first + np.arange(total)
+        return self.tokens[idx], np.repeat(np.arange(sent_ids.shape[0]), lens)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        B = self.batch_size
+        buf_t, buf_c, buf_l = [], [], []
+        buffered = 0
+        budget = self.max_pairs
+        for sent_ids in self._chunks():
+            tok, sent = self._gather(sent_ids)
+            pt, pc = positive_pairs(tok, sent, self.window)
+            if budget is not None:
+                pt, pc = pt[:budget], pc[:budget]
+                budget -= pt.shape[0]
+            nt, nc = sample_negatives(pt, self.cdf, self.num_neg, self.rng)
+            t = np.concatenate([pt, nt]); c = np.concatenate([pc, nc])
+            l = np.concatenate([np.ones(pt.shape[0], np.float32), np.zeros(nt.shape[0], np.float32)])
+            if self.shuffle:
+                perm = self.rng.permutation(t.shape[0])
+                t, c, l = t[perm], c[perm], l[perm]
+            buf_t.append(t); buf_c.append(c); buf_l.append(l)
+            buffered += t.shape[0]
+            if buffered >= B:
+                t, c, l = np.concatenate(buf_t), np.concatenate(buf_c), np.concatenate(buf_l)
+                n_full = (t.shape[0] // B) * B
+                for s in range(0, n_full, B):
+                    yield t[s:s + B], c[s:s + B], l[s:s + B]
+                buf_t, buf_c, buf_l = [t[n_full:]], [c[n_full:]], [l[n_full:]]
+                buffered = t.shape[0] - n_full
+            if budget is not None and budget <= 0:
+                break
+        if buffered and not self.drop_remainder:
+            yield np.concatenate(buf_t), np.concatenate(buf_c), np.concatenate(buf_l)
+
+
+def to_tf_dataset(gen: SkipGramPairs, prefetch: bool = True):
+    """model.fit 용 tf.data.Dataset ((target, context), label). 에폭마다 생성기를 새로 돈다."""
+    import tensorflow as tf
+
+    B = gen.batch_size if gen.drop_remainder else None
+    ds = tf.data.Dataset.from_generator(
+        lambda: (((t, c), l) for t, c, l in gen),
+        output_signature=((tf.TensorSpec((B,), tf.int32), tf.TensorSpec((B,), tf.int32)),
+                          tf.TensorSpec((B,), tf.float32)))
+    return ds.prefetch(tf.data.AUTOTUNE) if prefetch else ds
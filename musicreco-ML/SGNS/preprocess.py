@@ -0,0 +1,315 @@
+"""
+SGNS 태그 전처리 (MelonMusicRecommender.preprocess_data 병렬 버전).
+
+    python preprocess.py --train train.json --out-dir out/ --workers 8
+
+노트북과 같은 결과가 나오도록 맞춘 부분
+- 태그 규칙(괄호 제거 → 구분자 분리 → typo/alias → 브랜드/한 글자/연도/접미/불용어)은 그대로
+- 플레이리스트 안 중복 토큰 1회, 곡별 Counter → 포함관계 정리 → 상위 topk → min_tags 미만 drop
+- 곡 순서 = train.json 첫 등장 순서, vocab 순서 = (-빈도, 태그), 네거티브 분포 = 빈도^0.75
+
+달라진 부분
+- TYPO→ALIAS 두 번 조회를 합친 NORMALIZE 한 번으로, 정규식은 모듈 로드 때 한 번 컴파일
+- 원시 태그 → 토큰 결과를 lru_cache로 재사용 (서로 다른 태그 수 << 등장 횟수)
+- 플레이리스트를 연속 구간으로 나눠 --workers 개 프로세스가 곡별 Counter를 만들고, 부모가 구간 순서대로 합침
+  (곡 첫 등장 순서가 유지되어 워커 수와 상관없이 같은 결과)
+- 포함관계 정리/topk도 곡 구간 단위로 병렬
+
+출력 (--out-dir)
+- sentences_tokens.npy (T,) int32 / sentences_offsets.npy (S+1,) int64 : 곡별 태그 인덱스 (pairs.SkipGramPairs 입력)
+- sentences_song_ids.npy (S,) int64 : 위 문장의 곡 id
+- neg_sampling_cdf.npy (V,) float64, word_to_idx.json : 학습용 / 서빙 TagIndex 빈도 순위
+- song_popularity.json : {song_id: 등장 플레이리스트 수} (서빙 검색 인기도)
+- preprocess_stats.json : 단계별 소요 시간, 통계
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# -------------------- 정규화 사전 (노트북 그대로) --------------------
+ALIAS = {
+    "pop": "팝", "jpop": "제이팝", "kpop": "케이팝", "jazz": "재즈", "hiphop": "힙합",
+    "rnb": "알앤비", "r&b": "알앤비", "soul": "소울", "cafe": "카페", "bgm": "배경음악",
+    "rock": "락", "ost": "OST", "christmas": "크리스마스", "carol": "캐롤", "xmas": "크리스마스",
+    "fall": "가을", "moon": "달",
+}
+TYPO = {
+    "까페": "카페", "캐럴": "캐롤", "따듯": "따뜻", "알엔비": "알앤비", "pop": "팝", "jazz": "재즈",
+    "hiphop": "힙합", "jpop": "제이팝", "jpop.": "제이팝", "rnb": "알앤비", "rnb.": "알앤비",
+    "r&b": "알앤비", "r n b": "알앤비", "rn b": "알앤비", "rn'b": "알앤비", "hip hop": "힙합",
+    "j-pop": "제이팝", "k-pop": "케이팝", "cafe": "카페", "bgm": "배경음악", "j-pop.": "제이팝",
+    "j-pop,": "제이팝",
+}
+STOP_SINGLE = {"r", "와", "라"}
+STOP_WEAK = {"추천", "인기", "명곡", "애창곡", "띵곡", "차트", "장르불문", "좋은", "기분", "노래", "음악", "카카오톡"}
+BRANDS = {"mbc", "jtbc", "fm4u", "오픈채팅", "차트100"}
+DROP = BRANDS | STOP_WEAK
+
+# TYPO 다음 ALIAS 적용 결과를 미리 합성 (조회 한 번)
+NORMALIZE = {k: ALIAS.get(TYPO.get(k, k), TYPO.get(k, k)) for k in {*TYPO, *ALIAS}}
+
+PAREN_PAT = re.compile(r"\s*\([^)]*\)\s*")
+SPLIT_PAT = re.compile(r"[\/,\s#]+")
+YEAR_SINGLE_PAT = re.compile(r"^'?(\d{2}|\d{4})(?:년|년도|s)?$")
+YEAR_RANGE_PAT = re.compile(r"^'(\d{2})\s*[-~]\s*'(\d{2})$")
+DECADE_PAT = re.compile(r"^'?(\d{2}|\d{4})\s*(?:년대|s)$")
+
+
+def normalize_year_token(t: str) -> List[str]:
+    """'90 -> 1990, 1990s/1990년대 -> 1990, '80-'90 -> 1980, 1990"""
+    m = YEAR_RANGE_PAT.match(t)
+    if m:
+        return [str(1900 + int(m.group(1))), str(1900 + int(m.group(2)))]
+    m = DECADE_PAT.match(t) or YEAR_SINGLE_PAT.match(t)
+    if m:
+        g = m.group(1)
+        return [str(1900 + int(g))] if len(g) == 2 else [g]
+    return []
+
+
+def normalize_suffix_ko(t: str) -> str:
+    """'적인' -> '적', 끝 '한'/'인' 제거"""
+    if t.endswith("적인") and len(t) >= 3:
+        t = t[:-2]
+    if len(t) > 1 and (t.endswith("한") or t.endswith("인")):
+        t = t[:-1]
+    return t
+
+
+def finalize_token(p: str) -> List[str]:
+    t = p.strip()
+    if not t or "_" in t:
+        return []
+    t = t.lower()
+    t = NORMALIZE.get(t, t)
+    if t in BRANDS or (len(t) == 1 and not t.isdigit()):
+        return []
+    years = normalize_year_token(t.strip().lower())
+    if years:
+        return years
+    t = normalize_suffix_ko(t)
+    if not t or "_" in t or t in DROP:
+        return []
+    return [t]
+
+
+@lru_cache(maxsize=None)
+def tokenize_tag(raw: str) -> Tuple[str, ...]:
+    """원시 태그 -> 토큰들 (태그 문자열 단위 메모이즈)"""
+    out: List[str] = []
+    for p in SPLIT_PAT.split(PAREN_PAT.sub("", str(raw)).strip()):
+        if p:
+            out.extend(finalize_token(p))
+    return tuple(out)
+
+
+# -------------------- 곡별 태그 집계 --------------------
+def count_song_tags(playlists: Sequence[dict]) -> Tuple[Dict[str, Counter], Counter]:
+    """반환: (곡 id(str) -> Counter(태그), 곡 id -> 등장 플레이리스트 수). 곡 키는 첫 등장 순서."""
+    song_tags: Dict[str, Counter] = {}
+    pop: Counter = Counter()
+    for pl in playlists:
+        toks: List[str] = []
+        for t in pl.get("tags", []):
+            toks.extend(tokenize_tag(t))
+        toks = list(dict.fromkeys(toks))
+        sids = [str(s) for s in pl.get("songs", [])]
+        pop.update(sids)
+        for sid in sids:
+            ctr = song_tags.get(sid)
+            if ctr is None:
+                ctr = song_tags[sid] = Counter()
+            if toks:
+                ctr.update(toks)
+    return song_tags, pop
+
+
+def merge_counts(parts: Sequence[Tuple[Dict[str, Counter], Counter]]) -> Tuple[Dict[str, Counter], Counter]:
+    """구간 순서대로 합침 → 곡 키 순서 = 전체 첫 등장 순서"""
+    song_tags, pop = parts[0]
+    for st, p in parts[1:]:
+        pop.update(p)
+        for sid, ctr in st.items():
+            cur = song_tags.get(sid)
+            if cur is None:
+                song_tags[sid] = ctr
+            else:
+                cur.update(ctr)
+    return song_tags, pop
+
+
+def compact_by_containment(counter: Counter) -> Counter:
+    """
+    빈도 내림차순·길이 오름차순으로 훑으며 접두/접미 포함이면 짧은 쪽만 유지 (빈도 합산).
+    접두 포함은 첫 글자, 접미 포함은 끝 글자가 같아야 하므로 둘 다 다르면 바로 건너뜀.
+    """
+    kept: List[list] = []  # [tag, count, len, first, last]
+    for tag, cnt in sorted(counter.items(), key=lambda x: (-x[1], len(x[0]), x[0])):
+        n, first, last = len(tag), tag[0], tag[-1]
+        for ex in kept:
+            if ex[3] != first and ex[4] != last:
+                continue
+            ex_tag, ex_n = ex[0], ex[2]
+            if ex_n < n and (tag.startswith(ex_tag) or tag.endswith(ex_tag)):
+                break  # 기존 짧은 태그 유지
+            if n < ex_n and (ex_tag.startswith(tag) or ex_tag.endswith(tag)):
+                ex[:] = [tag, ex[1] + cnt, n, first, last]  # 짧은 새 태그로 교체
+                break
+        else:
+            kept.append([tag, cnt, n, first, last])
+    return Counter({ex[0]: ex[1] for ex in kept})
+
+
+def filter_songs(items: Sequence[Tuple[str, Counter]], topk: int, min_tags: int) -> List[Tuple[str, List[str]]]:
+    out = []
+    for sid, ctr in items:
+        if len(ctr) < min_tags:  # 포함관계 정리는 태그 수를 줄이기만 하므로 미리 거름
+            continue
+        tags = [t for t, _ in compact_by_containment(ctr).most_common(topk)]
+        if len(tags) >= min_tags:
+            out.append((sid, tags))
+    return out
+
+
+# -------------------- 병렬 실행 --------------------
+_worker_args: dict = {}  # fork된 워커가 부모의 입력을 공유 (pickle 전송 없음)
+
+
+def _count_range(span: Tuple[int, int]):
+    return count_song_tags(_worker_args["playlists"][span[0]:span[1]])
+
+
+def _filter_range(span: Tuple[int, int]):
+    a = _worker_args
+    return filter_songs(a["items"][span[0]:span[1]], a["topk"], a["min_tags"])
+
+
+def _spans(n: int, parts: int) -> List[Tuple[int, int]]:
+    bounds = np.linspace(0, n, max(1, parts) + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a] or [(0, 0)]
+
+
+def _map(fn, spans, workers: int):
+    if workers <= 1:
+        return [fn(s) for s in spans]
+    with mp.get_context("fork").Pool(workers) as pool:
+        return pool.map(fn, spans)  # 결과는 spans 순서
+
+
+def preprocess(playlists: Sequence[dict], topk_per_song: int = 30, min_tags_per_song: int = 4,
+               workers: int = 0, shards_per_worker: int = 4) -> dict:
+    """
+    반환: {"song_ids", "tokens", "offsets", "vocab", "neg_sampling_cdf", "popularity", "timings"}
+    vocab 은 인덱스 순 태그 리스트 (word_to_idx = {w: i}).
+    """
+    timings: Dict[str, float] = {}
+    nshards = max(1, workers) * shards_per_worker if workers > 1 else 1
+
+    t0 = time.perf_counter()
+    _worker_args["playlists"] = playlists
+    song_tags, pop = merge_counts(_map(_count_range, _spans(len(playlists), nshards), workers))
+    timings["tokenize_count"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    _worker_args.update(items=list(song_tags.items()), topk=topk_per_song, min_tags=min_tags_per_song)
+    del _worker_args["playlists"]
+    kept = [x for part in _map(_filter_range, _spans(len(song_tags), nshards), workers) for x in part]
+    _worker_args.clear()
+    timings["compact_filter"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    global_counter = Counter(t for _, tags in kept for t in tags)
+    vocab = sorted(global_counter, key=lambda x: (-global_counter[x], x))
+    word_to_idx = {w: i for i, w in enumerate(vocab)}
+    lens = np.fromiter((len(tags) for _, tags in kept), dtype=np.int64, count=len(kept))
+    offsets = np.zeros(len(kept) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    tokens = np.fromiter((word_to_idx[t] for _, tags in kept for t in tags), dtype=np.int32,
+                         count=int(offsets[-1]))
+    song_ids = np.fromiter((int(sid) for sid, _ in kept), dtype=np.int64, count=len(kept))
+    p = np.power(np.array([global_counter[w] for w in vocab], dtype=np.float64), 0.75)
+    p /= p.sum() if p.size else 1.0
+    cdf = np.cumsum(p) / (p.sum() if p.size else 1.0)
+    timings["vocab_arrays"] = time.perf_counter() - t0
+
+    return {"song_ids": song_ids, "tokens": tokens, "offsets": offsets, "vocab": vocab,
+            "neg_sampling_cdf": cdf, "popularity": pop, "timings": timings,
+            "tokenize_cache": tokenize_tag.cache_info()._asdict() if workers <= 1 else None}
+
+
+def save_outputs(res: dict, out_dir: str) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "sentences_tokens.npy"), res["tokens"])
+    np.save(os.path.join(out_dir, "sentences_offsets.npy"), res["offsets"])
+    np.save(os.path.join(out_dir, "sentences_song_ids.npy"), res["song_ids"])
+    np.save(os.path.join(out_dir, "neg_sampling_cdf.npy"), res["neg_sampling_cdf"])
+    with open(os.path.join(out_dir, "word_to_idx.json"), "w", encoding="utf-8") as f:
+        json.dump({w: i for i, w in enumerate(res["vocab"])}, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "song_popularity.json"), "w", encoding="utf-8") as f:
+        json.dump({sid: int(c) for sid, c in res["popularity"].items()}, f)
+
+
+def load_outputs(out_dir: str, mmap: bool = True) -> dict:
+    """학습 쪽 로더: pairs.SkipGramPairs(tokens, offsets, neg_sampling_cdf) 에 바로 넣을 수 있음"""
+    mode = "r" if mmap else None
+    arr = {k: np.load(os.path.join(out_dir, f"{k}.npy"), mmap_mode=mode)
+           for k in ("sentences_tokens", "sentences_offsets", "sentences_song_ids", "neg_sampling_cdf")}
+    with open(os.path.join(out_dir, "word_to_idx.json"), "r", encoding="utf-8") as f:
+        word_to_idx = json.load(f)
+    return {"tokens": arr["sentences_tokens"], "offsets": arr["sentences_offsets"],
+            "song_ids": arr["sentences_song_ids"], "neg_sampling_cdf": arr["neg_sampling_cdf"],
+            "word_to_idx": word_to_idx}
+
+
+def song_sentences(out: dict) -> Dict[str, List[str]]:
+    """노트북 self.song_sentences 형태 ({song_id(str): [tag, ...]}) 로 복원"""
+    idx_to_word = {i: w for w, i in out["word_to_idx"].items()}
+    tok, off = out["tokens"], out["offsets"]
+    return {str(int(s)): [idx_to_word[int(t)] for t in tok[off[i]:off[i + 1]]]
+            for i, s in enumerate(out["song_ids"])}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SGNS 태그 전처리 (병렬)")
+    ap.add_argument("--train", required=True, help="train.json (플레이리스트 목록)")
+    ap.add_argument("--out-dir", required=True)
+    ap.add_argument("--topk", type=int, default=30)
+    ap.add_argument("--min-tags", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=0, help="0이면 현재 프로세스")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    with open(args.train, "r", encoding="utf-8") as f:
+        playlists = json.load(f)
+    load_s = time.perf_counter() - t0
+
+    res = preprocess(playlists, args.topk, args.min_tags, workers=args.workers)
+    t0 = time.perf_counter()
+    save_outputs(res, args.out_dir)
+    timings = {"load": load_s, **res["timings"], "save": time.perf_counter() - t0}
+
+    lens = np.diff(res["offsets"])
+    stats = {"playlists": len(playlists), "songs_seen": len(res["popularity"]),
+             "kept_songs": int(lens.shape[0]), "vocab": len(res["vocab"]), "tokens": int(lens.sum()),
+             "avg_tags_per_song": round(float(lens.mean()), 2) if lens.size else 0.0,
+             "median_tags_per_song": float(np.median(lens)) if lens.size else 0.0,
+             "workers": args.workers, "timings_s": {k: round(v, 3) for k, v in timings.items()}}
+    if res["tokenize_cache"]:
+        stats["tokenize_cache"] = res["tokenize_cache"]
+    with open(os.path.join(args.out_dir, "preprocess_stats.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    for k, v in timings.items():
+        print(f"[{k:>15}] {v:7.2f}s")
+    print(json.dumps({k: v for k, v in stats.items() if k != "timings_s"}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+SGNS / DAE 오프라인 평가 (MelonMusicRecommender.evaluate 벡터화·병렬 버전).
+
+    python evaluate.py sgns --emb song_embeddings.pkl --split val.json --workers 8
+    python evaluate.py dae  --ckpt dae_model.pth --num-songs 707989 --split val.json
+
+노트북과 같은 결과가 나오도록 맞춘 부분
+- 카탈로그 곡 길이 >= min_len_catalog 필터, 플레이리스트 순서대로 rng.shuffle (default_rng(seed)) 로 마스킹
+- 정답 m = max(1, ceil(len * mask_ratio)), 나머지가 시드 (중복 곡도 그대로)
+- SGNS: q = mean(E_norm[seed], float32) 정규화, 시드 점수는 -1e-9 (노트북 그대로: 완전 제외가 아님)
+  K = min(max_k, N - len(seed))
+- DAE: musicreco-ML/DAE/main.py 처럼 시드 점수 -1e9 후 topk
+- nDCG/Prec/Recall/Hit 정의 (idcg·recall 분모는 중복 포함 정답 길이, Prec 분모는 k)
+
+달라진 부분: 마스킹은 부모 프로세스에서 한 번에 만들고, 점수는 (B,d)x(d,N) 블록으로 계산,
+top-k는 max(K) 한 번, 지표는 블록 단위 적중 행렬로 계산. --workers 개 프로세스가 블록을 나눠 처리.
+(B,d)x(d,N) 행렬곱은 노트북의 (N,d)x(d,) 와 마지막 자리 반올림이 다를 수 있어 동점 근처 순서가 바뀔 수 있음)
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import pickle
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# -------------------- 마스킹 --------------------
+def build_masks(playlists_rows: Sequence[np.ndarray], mask_ratio: float, seed: int):
+    """노트북과 같은 순서로 난수 소비. 반환: (시드 행 배열들, 정답 행 배열들)"""
+    rng = np.random.default_rng(seed)
+    inputs, answers = [], []
+    for rows in playlists_rows:
+        m = max(1, int(np.ceil(len(rows) * mask_ratio)))
+        idx = np.arange(len(rows))
+        rng.shuffle(idx)
+        inputs.append(rows[idx[m:]])
+        answers.append(rows[idx[:m]])
+    return inputs, answers
+
+
+# -------------------- 점수기 --------------------
+class SGNSScorer:
+    """노트북 build_search_matrix 와 같은 E_norm (곡 id 정수 순 정렬, L2 정규화)."""
+    seed_fill = -1e-9
+    clip_k = True   # K = min(max_k, N - len(seed))
+
+    def __init__(self, song_embeddings: Dict):
+        ids = sorted(song_embeddings.keys(), key=int)
+        self.row_of = {str(s): i for i, s in enumerate(ids)}
+        E = np.stack([np.asarray(song_embeddings[s], dtype=np.float32) for s in ids])
+        E /= (np.linalg.norm(E, axis=1, keepdims=True) + 1e-12)
+        self.E = E
+        self.N = E.shape[0]
+
+    def rows(self, songs) -> np.ndarray:
+        return np.asarray([self.row_of[str(s)] for s in songs if str(s) in self.row_of], dtype=np.int64)
+
+    def scores(self, seeds: List[np.ndarray]) -> np.ndarray:
+        Q = np.empty((len(seeds), self.E.shape[1]), dtype=np.float32)
+        for b, s in enumerate(seeds):
+            q = self.E[s].mean(axis=0, dtype=np.float32)
+            q /= (np.linalg.norm(q) + 1e-12)
+            Q[b] = q
+        return Q @ self.E.T  # (B, N)
+
+
+class DAEScorer:
+    """DAE 인덱스 = 곡 id (0..num_songs-1)."""
+    seed_fill = -1e9
+    clip_k = False
+
+    def __init__(self, ckpt: str, num_songs: int, dim: int = 128, depth: int = 2):
+        import sys
+        import torch
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DAE"))
+        from model import EmbeddingDAE
+        self.torch = torch
+        self.model = EmbeddingDAE(num_songs=num_songs, dim=dim, depth=depth)
+        state = torch.load(ckpt, map_location="cpu")
+        self.model.load_state_dict(state.get("state_dict", state) if isinstance(state, dict) else state.state_dict())
+        self.model.eval()
+        self.N = num_songs
+
+    def rows(self, songs) -> np.ndarray:
+        a = np.asarray([s for s in songs if isinstance(s, (int, np.integer)) or str(s).isdigit()], dtype=np.int64)
+        return a[(a >= 0) & (a < self.N)]
+
+    def scores(self, seeds: List[np.ndarray]) -> np.ndarray:
+        torch = self.torch
+        with torch.inference_mode():
+            P = self.model.encode_playlist([torch.from_numpy(s) for s in seeds])  # [B, dim]
+            return (P @ self.model.emb.weight.T).numpy()
+
+
+# -------------------- 블록 평가 --------------------
+def _topk(S: np.ndarray, k: int) -> np.ndarray:
+    part = np.argpartition(-S, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(S, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def eval_block(scorer, seeds: List[np.ndarray], answers: List[np.ndarray],
+               top_k_list: Sequence[int]) -> Tuple[Dict[int, np.ndarray], int]:
+    """블록 하나의 지표 합. 반환: {k: [ndcg, prec, rec, hit] 합}, 평가 수"""
+    keep = [b for b, s in enumerate(seeds) if s.size]   # 노트북: 시드가 비면 건너뜀
+    seeds = [seeds[b] for b in keep]
+    answers = [answers[b] for b in keep]
+    out = {k: np.zeros(4) for k in top_k_list}
+    if not seeds:
+        return out, 0
+    B, N, max_k = len(seeds), scorer.N, max(top_k_list)
+
+    S = scorer.scores(seeds)
+    brow = np.repeat(np.arange(B), [s.size for s in seeds])
+    S[brow, np.concatenate(seeds)] = scorer.seed_fill
+    top = _topk(S, min(max_k, N - 1))
+
+    # 행별 K (노트북 SGNS: N - len(seed) 보다 많이 뽑지 않음)
+    if scorer.clip_k:
+        kb = np.minimum(max_k, N - np.asarray([s.size for s in seeds]))
+    else:
+        kb = np.full(B, max_k)
+    valid = np.arange(top.shape[1])[None, :] < kb[:, None]
+
+    # 적중 행렬 H[b, i] = top[b, i] 가 정답에 있는가
+    akeys = np.unique(np.concatenate([b * N + a for b, a in enumerate(answers)]))
+    H = np.isin(np.arange(B)[:, None] * N + top, akeys) & valid
+    if H.shape[1] < max_k:
+        H = np.pad(H, ((0, 0), (0, max_k - H.shape[1])))
+
+    n_ans = np.asarray([a.size for a in answers], dtype=np.float64)  # 중복 포함
+    disc = 1.0 / np.log2(np.arange(max_k) + 2)
+    cdisc = np.cumsum(disc)
+    for k in top_k_list:
+        Hk = H[:, :k]
+        hits = Hk.sum(axis=1).astype(np.float64)
+        dcg = (Hk * disc[:k]).sum(axis=1)
+        idcg = cdisc[np.minimum(n_ans, k).astype(np.int64) - 1]
+        out[k] += [(dcg / idcg).sum(), (hits / k).sum(), (hits / n_ans).sum(), (hits > 0).sum()]
+    return out, B
+
+
+_worker_scorer = None  # fork된 워커가 부모의 점수기(행렬/모델)를 공유
+
+
+def _init_worker(threads: int):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    torch = getattr(_worker_scorer, "torch", None)
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def _work(task):
+    seeds, answers, ks = task
+    return eval_block(_worker_scorer, seeds, answers, ks)
+
+
+def evaluate(scorer, playlists: List[dict], mask_ratio: float = 0.3,
+             top_k_list: Sequence[int] = (100, 300, 500), min_len_catalog: int = 30,
+             seed: int = 42, block: int = 128, workers: int = 0, threads_per_worker: int = 1):
+    global _worker_scorer
+    rows = [scorer.rows(pl["songs"]) for pl in playlists]
+    rows = [r for r in rows if len(r) >= min_len_catalog]
+    if not rows:
+        print(f"No playlists with >= {min_len_catalog} kept songs.")
+        return {}
+    print(f"Playlists considered: {len(rows)} (min_len_catalog={min_len_catalog})")
+
+    seeds, answers = build_masks(rows, mask_ratio, seed)
+    tasks = [(seeds[s:s + block], answers[s:s + block], tuple(top_k_list))
+             for s in range(0, len(rows), block)]
+
+    t0 = time.perf_counter()
+    if workers > 0:
+        _worker_scorer = scorer
+        with mp.get_context("fork").Pool(workers, initializer=_init_worker,
+                                         initargs=(threads_per_worker,)) as pool:
+            parts = pool.map(_work, tasks, chunksize=1)
+    else:
+        parts = [eval_block(scorer, *t) for t in tasks]
+
+    evaluated = sum(n for _, n in parts)
+    if evaluated == 0:
+        print("No playlists evaluated.")
+        return {}
+    results = {}
+    for k in top_k_list:
+        tot = np.sum([p[k] for p, _ in parts], axis=0)
+        results[k] = {"nDCG": float(tot[0] / evaluated), "Prec": float(tot[1] / evaluated),
+                      "Recall": float(tot[2] / evaluated), "Hit": float(tot[3] / evaluated)}
+    dt = time.perf_counter() - t0
+    print(f"\n=== Averages (mask={int(mask_ratio * 100)}%, len≥{min_len_catalog}, evaluated={evaluated}, "
+          f"{dt:.1f}s, {evaluated / dt:.0f} playlists/s) ===")
+    for k in top_k_list:
+        r = results[k]
+        print(f"K={k:>4}  nDCG={r['nDCG']:.4f}  Prec={r['Prec']:.4f}  Recall={r['Recall']:.4f}  HitRate={r['Hit']:.4f}")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SGNS / DAE 오프라인 평가 (랜덤 마스킹)")
+    ap.add_argument("model", choices=["sgns", "dae"])
+    ap.add_argument("--split", required=True, help="val.json / test.json (플레이리스트 목록)")
+    ap.add_argument("--emb", default="song_embeddings.pkl", help="sgns: {song_id: vec} pickle")
+    ap.add_argument("--ckpt", default="dae_model.pth", help="dae: state_dict")
+    ap.add_argument("--num-songs", type=int, default=707_989)
+    ap.add_argument("--mask-ratio", type=float, default=0.3)
+    ap.add_argument("--k", default="100,300,500")
+    ap.add_argument("--min-len", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--block", type=int, default=128, help="블록당 플레이리스트 수 (B x N float32 메모리)")
+    ap.add_argument("--workers", type=int, default=0, help="0이면 현재 프로세스")
+    ap.add_argument("--threads-per-worker", type=int, default=1)
+    args = ap.parse_args()
+
+    with open(args.split, "r", encoding="utf-8") as f:
+        playlists = json.load(f)
+    if args.model == "sgns":
+        with open(args.emb, "rb") as f:
+            scorer = SGNSScorer(pickle.load(f))
+    else:
+        scorer = DAEScorer(args.ckpt, args.num_songs)
+    evaluate(scorer, playlists, mask_ratio=args.mask_ratio,
+             top_k_list=[int(k) for k in args.k.split(",")], min_len_catalog=args.min_len,
+             seed=args.seed, block=args.block, workers=args.workers,
+             threads_per_worker=args.threads_per_worker)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,121 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, TypeVar
 
-DATABASE_URL = "sqlite:///./app/data/musicreco.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+
+T = TypeVar("T")
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app/data/musicreco.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))           # 동시 요청(스레드풀) 수 정도
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "16"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 2**20)))
+DB_WRITE_QUEUE = os.getenv("DB_WRITE_QUEUE", "0") == "1"    # 쓰기를 전용 스레드 1개로 직렬화
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"                # aiosqlite 비동기 엔진도 생성
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL: 읽기가 쓰기를 기다리지 않음 / NORMAL: WAL에서는 커밋마다 fsync 하지 않아도 안전
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+if _is_sqlite:
+    engine = create_engine(DATABASE_URL,
+                           connect_args={"check_same_thread": False,
+                                         "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+                           pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    event.listen(engine, "connect", _sqlite_pragmas)
+else:
+    engine = create_engine(DATABASE_URL, pool_size=DB_POOL_SIZE,
+                           max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+class WriteQueue:
+    """
+    쓰기 전용 스레드 1개 + 큐. SQLite는 writer가 1개뿐이라 여러 스레드가 동시에 쓰면
+    busy 대기/\"database is locked\"가 생기므로 쓰기만 한 줄로 세운다 (읽기는 WAL로 병행).
+    fn(session)은 전용 세션에서 실행되고 끝나면 commit. 반환값은 ORM 객체 대신 id 등 단순 값으로.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._sf = session_factory
+        self._q: "queue.Queue[tuple[Callable, Future]]" = queue.Queue()
+        self.done = 0
+        self._t = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+        self._t.start()
+
+    def _loop(self):
+        while True:
+            fn, fut = self._q.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            db = self._sf()
+            try:
+                out = fn(db)
+                db.commit()
+                fut.set_result(out)
+            except BaseException as e:
+                db.rollback()
+                fut.set_exception(e)
+            finally:
+                db.close()
+                self.done += 1
+
+    def submit(self, fn: Callable[[Session], T]) -> "Future[T]":
+        fut: Future = Future()
+        self._q.put((fn, fut))
+        return fut
+
+    def stats(self) -> dict:
+        return {"queued": self._q.qsize(), "done": self.done}
+
+
+write_queue = WriteQueue(SessionLocal) if DB_WRITE_QUEUE else None
+
+
+def run_write(db: Session, fn: Callable[[Session], T]) -> T:
+    """쓰기 실행: 큐가 켜져 있으면 writer 스레드에서, 아니면 요청 세션에서 바로 commit."""
+    if write_queue is not None:
+        return write_queue.submit(fn).result()
+    out = fn(db)
+    db.commit()
+    return out
+
+
+# ----- (선택) 비동기 엔진: 같은 ORM 모델을 aiosqlite로 -----
+async_engine = AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = os.getenv(
+        "ASYNC_DATABASE_URL",
+        DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1) if _is_sqlite else DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=DB_POOL_SIZE,
+                                       max_overflow=DB_MAX_OVERFLOW)
+    if _is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    out = {"url": engine.url.render_as_string(hide_password=True), "pool": engine.pool.status(),
+           "write_queue": write_queue.stats() if write_queue is not None else None,
+           "async": DB_ASYNC}
+    if _is_sqlite:
+        with engine.connect() as c:
+            out["journal_mode"] = c.exec_driver_sql("PRAGMA journal_mode").scalar()
+    return out
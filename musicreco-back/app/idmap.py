@@ -0,0 +1,87 @@
+import numpy as np
+from typing import Iterable, Optional, Tuple
+
+_I64 = np.iinfo(np.int64)
+
+
+def _to_int64(sids) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(int64 배열, int64로 못 담는 위치 표시 | None). 요청 id는 파이썬 int라 2^63 이상도 들어올 수 있음."""
+    if isinstance(sids, np.ndarray):
+        if sids.dtype == np.uint64:
+            bad = sids > _I64.max
+            return np.where(bad, 0, sids).astype(np.int64), (bad if bad.any() else None)
+        return sids.astype(np.int64, copy=False), None
+    sids = list(sids)
+    try:
+        return np.asarray(sids, dtype=np.int64), None
+    except OverflowError:
+        bad = np.array([not (_I64.min <= int(x) <= _I64.max) for x in sids], dtype=bool)
+        return np.array([0 if b else int(x) for x, b in zip(sids, bad)], dtype=np.int64), bad
+
+
+def ids_array(sids: Iterable[int]) -> np.ndarray:
+    """제외 목록 등: int64 배열, 범위 밖 id는 어떤 곡과도 같을 수 없으므로 버림."""
+    s, bad = _to_int64(sids)
+    return s if bad is None else s[~bad]
+
+
+class IdMap:
+    """
+    song_id ↔ 행 번호 매핑 (dict 대신 NumPy 배열).
+    - ids: 행 순서의 song_id 배열
+    - id 범위가 곡 수에 비해 작으면 직접 주소 int32 테이블, 아니면 정렬 + searchsorted
+    - 없는 id(int64 범위 밖 포함)는 행 번호 -1
+    """
+
+    def __init__(self, ids, dense_factor: float = 4.0):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        n = self.ids.shape[0]
+        self._table = None
+        if n and self.ids.min() >= 0 and self.ids.max() < dense_factor * n + 1024:
+            self._table = np.full(int(self.ids.max()) + 1, -1, dtype=np.int32)
+            self._table[self.ids] = np.arange(n, dtype=np.int32)
+        else:
+            self._order = np.argsort(self.ids, kind="stable").astype(np.int32)
+            self._sorted = self.ids[self._order]
+
+    @classmethod
+    def identity(cls, n: int) -> "IdMap":
+        # 행 번호 = song_id (DAE 학습 인덱스가 song_id 그대로인 경우)
+        return cls(np.arange(n, dtype=np.int64))
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    def __contains__(self, sid) -> bool:
+        return self.row(sid) >= 0
+
+    def ids_to_rows(self, sids: Iterable[int]) -> np.ndarray:
+        s, bad = _to_int64(sids)
+        if self._table is not None:
+            rows = np.full(s.shape, -1, dtype=np.int32)
+            ok = (s >= 0) & (s < self._table.shape[0])
+            rows[ok] = self._table[s[ok]]
+        elif self._sorted.size == 0:
+            return np.full(s.shape, -1, dtype=np.int32)
+        else:
+            pos = np.minimum(np.searchsorted(self._sorted, s), self._sorted.shape[0] - 1)
+            rows = np.where(self._sorted[pos] == s, self._order[pos], -1).astype(np.int32)
+        if bad is not None:
+            rows[bad] = -1
+        return rows
+
+    def rows_to_ids(self, rows) -> np.ndarray:
+        return self.ids[np.asarray(rows, dtype=np.int64)]
+
+    def row(self, sid) -> int:
+        return int(self.ids_to_rows([int(sid)])[0])  # 범위 밖이면 -1
+
+    def present_rows(self, sids: Iterable[int]) -> np.ndarray:
+        rows = self.ids_to_rows(sids)
+        return rows[rows >= 0]
+
+    def exclusion_mask(self, sids: Iterable[int]) -> np.ndarray:
+        # (N,) bool, 제외할 곡의 행만 True
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.present_rows(sids)] = True
+        return mask
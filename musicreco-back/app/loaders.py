@@ -1,6 +1,12 @@
-import json, pickle, numpy as np
+import hashlib, json, os, pickle, numpy as np
 from typing import Dict, Any, List, Tuple
 
+# 바이너리 스토어 파일명 (app/tools/build_store.py 가 생성)
+SONG_EMB_NPY = "song_emb.npy"      # (N,d) float32, L2 정규화 완료
+SONG_IDS_NPY = "song_ids.npy"      # (N,) int64, 오름차순 정렬
+TAG_EMB_NPY = "tag_emb.npy"        # (T,d) float32, L2 정규화 완료
+TAG_WORDS_JSON = "tag_words.json"  # [word, ...] (tag_emb.npy 행 순서)
+
 def load_tag_embeddings(path: str) -> dict[str, np.ndarray]:
     with open(path, "rb") as f:
         d = pickle.load(f)  
@@ -19,6 +25,14 @@ def load_song_meta_by_id(path: str):
     # dict면 그대로, 키를 int로
     return {int(k): v for k, v in items.items()}
 
+def load_song_popularity(path: str) -> Dict[int, float]:
+    # {song_id: 플레이리스트 등장 횟수 등} (없으면 인기도 없이 동작)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {int(k): float(v) for k, v in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
 def load_song_meta(path: str) -> Dict[int, dict]:
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -38,7 +52,32 @@ def load_sgns_embeddings(path: str) -> Tuple[np.ndarray, List[int]]:
     vecs /= (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
     return vecs, ids
 
-def build_id_maps(ids: List[int]):
-    id2idx = {sid: i for i, sid in enumerate(ids)}
-    idx2id = ids
-    return id2idx, idx2id
+def has_embedding_store(data_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(data_dir, f))
+               for f in (SONG_EMB_NPY, SONG_IDS_NPY, TAG_EMB_NPY, TAG_WORDS_JSON))
+
+def load_sgns_store(data_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+    # mmap_mode="r": 읽기 전용 매핑 → 워커들이 OS 페이지 캐시를 공유
+    vecs = np.load(os.path.join(data_dir, SONG_EMB_NPY), mmap_mode="r")
+    ids = np.load(os.path.join(data_dir, SONG_IDS_NPY), mmap_mode="r")
+    return vecs, ids
+
+def load_tag_store(data_dir: str) -> Tuple[np.ndarray, List[str]]:
+    mat = np.load(os.path.join(data_dir, TAG_EMB_NPY), mmap_mode="r")
+    with open(os.path.join(data_dir, TAG_WORDS_JSON), "r", encoding="utf-8") as f:
+        words = json.load(f)
+    return mat, words
+
+def fingerprint(*arrays: np.ndarray, sample: int = 256) -> str:
+    """
+    배열 모양 + 내용 해시 (같은 버전 이름이라도 임베딩/행 순서가 바뀌면 달라짐).
+    1차원(id 배열 등)은 전체, 2차원은 고르게 뽑은 sample개 행.
+    """
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.asarray(a)
+        h.update(repr((a.shape, str(a.dtype))).encode())
+        if a.ndim > 1 and len(a) > sample:
+            a = a[np.linspace(0, len(a) - 1, num=sample, dtype=np.int64)]
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()[:16]
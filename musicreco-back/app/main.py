@@ -1,67 +1,65 @@
 # app/main.py
 import os
+import hmac
+import json
+import logging
 import numpy as np
-import requests
-from typing import List, Tuple
+from typing import List, Literal, Tuple
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(), override=True)
 
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 # ===== 기존 추천 스키마/로더/리코더 =====
-from app.schema import RecommendRequest, RecommendResponse, SongOut
-from app.loaders import (
-    load_sgns_embeddings,
-    build_id_maps,
-    load_song_meta_by_id,
-    load_tag_embeddings,
-    load_word_to_idx,
-)
-from app.rec.sgns import SGNSRecommender
-from app.rec.dae import DAERecommender
-from app.rec.song2tags import Song2Tags
+from app.schema import RecommendRequest, RecommendResponse, SongOut, MyRecommendationsOut, PrecomputedRecsOut
+from app.rec.bulk import BulkQuery
+from app.rec.cache import ResultCache
+from app.registry import ModelBundle, ModelRegistry, load_bundle
 
 # ===== DB / 모델 / 스키마 / 시큐리티 =====
-from app.db import Base, engine, SessionLocal
-from app.orm_models import User, Playlist, PlaylistItem
+from app.db import Base, engine, SessionLocal, AsyncSessionLocal, run_write, pool_stats
+from app.orm_models import User, Playlist, PlaylistItem, PrecomputedRec
 from app.schemas_auth import SignupIn, LoginIn, TokenOut, UserOut
 from app.schemas_playlist import PlaylistCreate, PlaylistOut, PlaylistRename
-from app.security import hash_pw, verify_pw, create_access_token, decode_token
+from app.playlists import list_page, get_owned, insert_items
+from app.taste import upgrade_schema as upgrade_taste_schema
+from app.security import PasswordPool, PasswordPoolBusy, create_access_token
+from app.auth_cache import AuthCache, AuthUser
+from app.yt import YOUTUBE_API_BASE, YouTubeAPIBackend, YouTubeBackendError, YouTubeLookup, YouTubeNotConfigured
+
 
+log = logging.getLogger(__name__)
 
 # -------------------- Config & Data --------------------
 DATA_DIR = os.getenv("DATA_DIR", "app/data")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-EMB_PKL = os.path.join(DATA_DIR, "song_embeddings.pkl")
-DAE_PTH = os.path.join(DATA_DIR, "dae_model.pth")
-META_JSON = os.path.join(DATA_DIR, "song_meta.json")
-DAE_NUM_SONGS = 707_989
-WORD2IDX_JSON = os.path.join(DATA_DIR, "word_to_idx.json")
-TAG_PKL = os.path.join(DATA_DIR, "tag_embeddings.pkl")
-
-E, ids = load_sgns_embeddings(EMB_PKL)      # SGNS: (N,d) L2-normalized 가정
-id2idx, idx2id = build_id_maps(ids)
-meta = load_song_meta_by_id(META_JSON)       # id -> meta dict
-tag_emb = load_tag_embeddings(TAG_PKL)       # dict[str -> np.ndarray] (L2 정규화 가정)
-word2idx = load_word_to_idx(WORD2IDX_JSON)   # (선택) 자동완성/검증용
-
-
-
-# --- 태그 행렬(빠른 내적용) ---
-_tag_words = list(tag_emb.keys())
-_tag_mat = np.stack([tag_emb[w] for w in _tag_words], axis=0).astype(np.float32)
-_tag_mat /= (np.linalg.norm(_tag_mat, axis=1, keepdims=True) + 1e-12)
-
-def _normalize_tag(t: str) -> str:
-    t0 = t.strip()
-    if t0 in tag_emb:
-        return t0
-    t1 = t0.lower()
-    return t1 if t1 in tag_emb else t0
+YOUTUBE_API_BASE = os.getenv("YOUTUBE_API_BASE", YOUTUBE_API_BASE)  # 로컬 스텁 서버 등으로 교체 가능
+YT_CACHE_TTL = float(os.getenv("YT_CACHE_TTL", str(30 * 86400)))    # videoId 캐시 (초)
+YT_NEG_CACHE_TTL = float(os.getenv("YT_NEG_CACHE_TTL", "86400"))    # '결과 없음' 캐시 (초)
+SGNS_INDEX = os.getenv("SGNS_INDEX", "flat")   # flat | ivf_flat | ivf_pq | hnsw
+DAE_ITEM_DTYPE = os.getenv("DAE_ITEM_DTYPE", "float32")  # float32 | float16 | bfloat16 | int8
+BATCHING = os.getenv("BATCHING", "0") == "1"            # 동시 요청 마이크로 배칭
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "2"))
+HYBRID_POOL = int(os.getenv("HYBRID_POOL", "200"))  # hybrid: 모델별 후보 수
+BULK_SGNS_CHUNK = int(os.getenv("BULK_SGNS_CHUNK", "1024"))  # 배치 API 청크 (질의 수)
+BULK_DAE_CHUNK = int(os.getenv("BULK_DAE_CHUNK", "32"))      # DAE는 [B, N] 점수 행렬 → 작게
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))        # 토큰/사용자 캐시 TTL (초), 0이면 끔
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))   # 0이면 캐시 끔
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))    # 초
+RESULT_CACHE_MIN_N = int(os.getenv("RESULT_CACHE_MIN_N", "100"))  # 키당 저장할 최소 후보 수
+MODEL_VERSION = os.getenv("MODEL_VERSION", "base")                 # 기동 시 DATA_DIR 모델의 버전 이름
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(DATA_DIR, "versions"))  # 교체용 버전 디렉터리들
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")                         # /admin/* (비어 있으면 비활성)
+PLAYLIST_PAGE_MAX = int(os.getenv("PLAYLIST_PAGE_MAX", "200"))     # GET /playlists limit 상한
 
 
 # -------------------- Request Models --------------------
@@ -69,11 +67,15 @@ class TagRecoRequest(BaseModel):
     tags: List[str]
     k: int = 20
     exclude: List[int] = []
+    nprobe: int | None = None     # IVF 인덱스 탐색 셀 수
+    ef_search: int | None = None  # HNSW 탐색 폭
 
 class SongsRecoRequest(BaseModel):
     seed_song_ids: List[int] = []
     k: int = 20
     exclude: List[int] = []
+    nprobe: int | None = None     # IVF 인덱스 탐색 셀 수
+    ef_search: int | None = None  # HNSW 탐색 폭
 
 class DAERecoRequest(BaseModel):
     seed_song_ids: List[int] = []
@@ -87,12 +89,63 @@ class BySongTagsRequest(BaseModel):
     topn: int = 20          # 곡 근처 태그 후보 상위 N
     sample_n: int = 5       # 그중 무작위로 사용할 태그 개수
     seed: int | None = None # 재현용 시드(옵션)
+    nprobe: int | None = None
+    ef_search: int | None = None
+
+class BatchQueryIn(BaseModel):
+    method: Literal["sgns", "dae"] = "sgns"
+    seed_song_ids: List[int] = []
+    tags: List[str] = []     # sgns만 사용
+    k: int = 20
+    exclude: List[int] = []
+
+class BatchRecoRequest(BaseModel):
+    queries: List[BatchQueryIn]
+    with_meta: bool = False  # True면 곡 정보(title/artists/genres)까지
+    nprobe: int | None = None
+    ef_search: int | None = None
+
+class ModelReloadIn(BaseModel):
+    version: str        # MODELS_DIR 아래 디렉터리 이름 (MODEL_VERSION이면 DATA_DIR)
+    wait: bool = False  # True면 로드·검증·교체가 끝날 때까지 대기
 
 
 # -------------------- Recommenders --------------------
-sgns = SGNSRecommender(E, idx2id, id2idx)
-dae = DAERecommender(ckpt_path=DAE_PTH, num_songs=DAE_NUM_SONGS)
-s2t = Song2Tags(E, idx2id, _tag_mat, _tag_words)
+def _load_models(data_dir: str, version: str) -> ModelBundle:
+    return load_bundle(data_dir, version, sgns_index=SGNS_INDEX, dae_item_dtype=DAE_ITEM_DTYPE,
+                       hybrid_pool=HYBRID_POOL, bulk_sgns_chunk=BULK_SGNS_CHUNK, bulk_dae_chunk=BULK_DAE_CHUNK,
+                       batching=BATCHING, batch_max_size=BATCH_MAX_SIZE, batch_max_wait_ms=BATCH_MAX_WAIT_MS)
+
+def _on_swap(new: ModelBundle, old: ModelBundle | None):
+    # 결과 캐시는 모델 버전에 묶여 있으므로 비움 (취향 벡터는 행마다 모델 지문으로 구분, 인증/YouTube 캐시는 유지)
+    result_cache.invalidate()
+    log.info("models active: %s", new.info())
+
+# 같은 시드/태그 조합 반복 요청 → 상위 N 후보를 캐시, exclude·k는 캐시된 목록에서 처리
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_MIN_N)
+
+# 요청은 registry.use()로 잡은 번들로 끝까지 처리, /admin/models/reload 로 무중단 교체
+registry = ModelRegistry(_load_models, on_swap=_on_swap)
+registry.load(DATA_DIR, MODEL_VERSION)
+log.info("song search index: %s", registry.active.song_search.stats())  # GET /stats/search 에도 노출
+
+def sgns_search(m: ModelBundle, q, topk: int, exclude_ids: set[int] | None = None,
+                nprobe: int | None = None, ef_search: int | None = None):
+    if m.sgns_batcher is not None:
+        return m.sgns_batcher.submit((q, topk, exclude_ids, nprobe, ef_search))
+    return m.sgns.similar_from_vector(q, topk, exclude_ids, nprobe=nprobe, ef_search=ef_search)
+
+def sgns_similar(m: ModelBundle, seed: List[int], topk: int,
+                 nprobe: int | None = None, ef_search: int | None = None):
+    q = m.sgns._mean_vec(seed)
+    if q is None:
+        return []
+    return sgns_search(m, q, topk, set(seed), nprobe=nprobe, ef_search=ef_search)
+
+def dae_scores(m: ModelBundle, seed: List[int], topk: int):
+    if m.dae_batcher is not None:
+        return m.dae_batcher.submit((seed, topk))
+    return m.dae.scores(seed, topk)
 
 
 # -------------------- FastAPI App --------------------
@@ -101,10 +154,12 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ----- DB bootstrap -----
 Base.metadata.create_all(bind=engine)
+upgrade_taste_schema(engine)
 
 def get_db():
     db = SessionLocal()
@@ -113,249 +168,481 @@ def get_db():
     finally:
         db.close()
 
+async def run_read(fn):
+    """
+    async 읽기 엔드포인트용: fn(동기 Session)을 이벤트 루프를 막지 않고 실행.
+    DB_ASYNC=1이면 aiosqlite 세션의 run_sync (같은 ORM 쿼리 재사용), 아니면 스레드풀에서 동기 세션.
+    반환 ORM 객체는 세션이 닫힌 뒤 쓰므로 필요한 관계는 fn 안에서 미리 로드.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn)
+
+    def sync():
+        db = SessionLocal()
+        try:
+            return fn(db)
+        finally:
+            db.close()
+    return await run_in_threadpool(sync)
+
 
 # -------------------- Auth helpers/APIs --------------------
-def get_current_user(authorization: str = Header(None),
-                     db: Session = Depends(get_db)) -> User:
+def _load_auth_user(email: str):
+    db = SessionLocal()
+    try:
+        row = db.query(User.id, User.email, User.name).filter_by(email=email).first()
+        return AuthUser(row.id, row.email, row.name) if row else None
+    finally:
+        db.close()
+
+# 검증된 토큰 → sub, email → 사용자 (핫 클라이언트는 HMAC 검증·DB 조회 없이 통과)
+auth_cache = AuthCache(_load_auth_user, max_tokens=AUTH_CACHE_SIZE, max_users=AUTH_CACHE_SIZE,
+                       ttl_seconds=AUTH_CACHE_TTL)
+
+def get_current_user(authorization: str = Header(None)) -> AuthUser:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     token = authorization.split(" ", 1)[1]
-    sub = decode_token(token)
+    sub = auth_cache.subject(token)
     if not sub:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter_by(email=sub).first()
+    user = auth_cache.user(sub)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
+# PBKDF2는 별도 프로세스 풀에서 (추천 요청과 GIL/CPU를 나눠 쓰지 않도록)
+pw_pool = PasswordPool()
+
+# YouTube 조회: 메모리 LRU → yt_cache 테이블 → API (동일 질의 동시 요청은 1번만 호출)
+yt_lookup = YouTubeLookup(YouTubeAPIBackend(YOUTUBE_API_KEY, YOUTUBE_API_BASE),
+                          ttl_s=YT_CACHE_TTL, neg_ttl_s=YT_NEG_CACHE_TTL)
+
+@app.on_event("shutdown")
+async def _shutdown():
+    pw_pool.shutdown()
+    await yt_lookup.backend.aclose()
+
+def _pw_busy():
+    return HTTPException(503, "Too many auth requests, retry shortly", headers={"Retry-After": "1"})
+
 @app.post("/auth/signup", response_model=TokenOut)
-def signup(body: SignupIn, db: Session = Depends(get_db)):
-    if db.query(User).filter_by(email=body.email).first():
+async def signup(body: SignupIn, db: Session = Depends(get_db)):
+    exists = await run_in_threadpool(lambda: db.query(User.id).filter_by(email=body.email).first())
+    if exists:
         raise HTTPException(400, "Email already registered")
-    u = User(email=body.email, name=body.name, password_hash=hash_pw(body.password))
-    db.add(u); db.commit()
-    token = create_access_token(sub=u.email)
+    try:
+        pw_hash = await pw_pool.hash(body.password)
+    except PasswordPoolBusy:
+        raise _pw_busy()
+    try:
+        await run_in_threadpool(run_write, db, lambda w: w.add(
+            User(email=body.email, name=body.name, password_hash=pw_hash)))
+    except IntegrityError:
+        raise HTTPException(400, "Email already registered")
+    auth_cache.invalidate_user(body.email)
+    token = create_access_token(sub=body.email)
     return TokenOut(access_token=token)
 
 @app.post("/auth/login", response_model=TokenOut)
-def login(body: LoginIn, db: Session = Depends(get_db)):
-    u = db.query(User).filter_by(email=body.email).first()
-    if not u or not verify_pw(body.password, u.password_hash):
+async def login(body: LoginIn, db: Session = Depends(get_db)):
+    row = await run_in_threadpool(
+        lambda: db.query(User.email, User.password_hash).filter_by(email=body.email).first())
+    try:
+        ok = row is not None and await pw_pool.verify(body.password, row.password_hash)
+    except PasswordPoolBusy:
+        raise _pw_busy()
+    if not ok:
         raise HTTPException(401, "Invalid credentials")
-    token = create_access_token(sub=u.email)
+    token = create_access_token(sub=row.email)
     return TokenOut(access_token=token)
 
 @app.get("/auth/me", response_model=UserOut)
-def me(user: User = Depends(get_current_user)):
+def me(user: AuthUser = Depends(get_current_user)):
     return UserOut(name=user.name, email=user.email)
 
 
 # -------------------- Playlist APIs (protected) --------------------
 @app.post("/playlists", response_model=PlaylistOut)
 def create_playlist(req: PlaylistCreate,
-                    user: User = Depends(get_current_user),
+                    user: AuthUser = Depends(get_current_user),
                     db: Session = Depends(get_db)):
-    pl = Playlist(user_id=user.id, title=req.title, tags=req.tags)
-    db.add(pl); db.flush()
-    for i, it in enumerate(req.items):
-        db.add(PlaylistItem(
-            playlist_id=pl.id, position=i,
-            song_id=it.song_id, title=it.title,
-            artists=it.artists, genres=it.genres
-        ))
-    db.commit(); db.refresh(pl)
-    return pl
+    uid = user.id
+
+    with registry.use() as m:
+        def write(w: Session) -> int:
+            pl = Playlist(user_id=uid, title=req.title, tags=req.tags)
+            w.add(pl); w.flush()
+            insert_items(w, pl.id, req.items)
+            m.taste.on_playlist_created(w, uid, pl.id, [it.song_id for it in req.items])
+            return pl.id
+
+        pid = run_write(db, write)
+        m.taste.invalidate(uid)
+    return get_owned(db, uid, pid)
 
 @app.get("/playlists", response_model=List[PlaylistOut])
-def list_playlists(user: User = Depends(get_current_user),
-                   db: Session = Depends(get_db)):
-    pls = db.query(Playlist).filter_by(user_id=user.id).order_by(Playlist.id.desc()).all()
+async def list_playlists(response: Response,
+                         limit: int | None = Query(None, ge=1, le=PLAYLIST_PAGE_MAX),
+                         before: int | None = None,
+                         user: AuthUser = Depends(get_current_user)):
+    """limit을 주면 페이지 단위, 다음 페이지는 X-Next-Cursor 값을 before로 전달"""
+    pls, next_cursor = await run_read(lambda db: list_page(db, user.id, limit=limit, before=before))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     return pls
 
 @app.get("/playlists/{pid}", response_model=PlaylistOut)
-def get_playlist(pid: int,
-                 user: User = Depends(get_current_user),
-                 db: Session = Depends(get_db)):
-    pl = db.query(Playlist).get(pid)
-    if not pl or pl.user_id != user.id:
+async def get_playlist(pid: int,
+                       user: AuthUser = Depends(get_current_user)):
+    pl = await run_read(lambda db: get_owned(db, user.id, pid))
+    if not pl:
         raise HTTPException(404, "not found")
     return pl
 
 @app.patch("/playlists/{pid}/title", response_model=PlaylistOut)
 def rename_playlist(pid: int, body: PlaylistRename,
-                    user: User = Depends(get_current_user),
+                    user: AuthUser = Depends(get_current_user),
                     db: Session = Depends(get_db)):
-    pl = db.query(Playlist).get(pid)
-    if not pl or pl.user_id != user.id:
-        raise HTTPException(404, "not found")
-    pl.title = body.title
-    db.commit(); db.refresh(pl)
-    return pl
+    uid = user.id
+
+    def write(w: Session):
+        pl = w.get(Playlist, pid)
+        if not pl or pl.user_id != uid:
+            raise HTTPException(404, "not found")
+        pl.title = body.title
+
+    run_write(db, write)
+    return get_owned(db, uid, pid)
 
 @app.delete("/playlists/{pid}")
 def delete_playlist(pid: int,
-                    user: User = Depends(get_current_user),
+                    user: AuthUser = Depends(get_current_user),
                     db: Session = Depends(get_db)):
-    pl = db.query(Playlist).get(pid)
-    if not pl or pl.user_id != user.id:
-        raise HTTPException(404, "not found")
-    db.delete(pl); db.commit()
+    uid = user.id
+
+    with registry.use() as m:
+        def write(w: Session):
+            pl = w.get(Playlist, pid)
+            if not pl or pl.user_id != uid:
+                raise HTTPException(404, "not found")
+            m.taste.on_playlist_deleted(w, uid, pl.id)
+            # 곡은 DELETE 1번 (cascade로 한 행씩 지우지 않도록)
+            w.query(PlaylistItem).filter_by(playlist_id=pl.id).delete(synchronize_session=False)
+            w.delete(pl)
+
+        run_write(db, write)
+        m.taste.invalidate(uid)
     return {"ok": True}
 
-@app.get("/yt/search")
-def yt_search(q: str, safe: bool = True):
-    if not YOUTUBE_API_KEY:
-        raise HTTPException(500, "YOUTUBE_API_KEY not set")
-    params = {
-        "key": YOUTUBE_API_KEY,
-        "part": "snippet",
-        "q": q,
-        "maxResults": 5,              # 여러 개 받아서 첫 playable만 쓰고 싶으면 5~10
-        "type": "video",
-        "videoEmbeddable": "true",    # ✅ 임베드 가능한 영상만
-    }
-    if safe:
-        params["safeSearch"] = "moderate"
+@app.get("/me/recommendations", response_model=MyRecommendationsOut)
+def my_recommendations(method: Literal["sgns", "dae"] | None = None,
+                       limit: int = 50,
+                       user: AuthUser = Depends(get_current_user),
+                       db: Session = Depends(get_db)):
+    """app/tools/precompute_recs.py 결과 조회 (읽기 전용). 사용자 전체 → 플레이리스트 최신순."""
+    q = db.query(PrecomputedRec).filter_by(user_id=user.id)
+    if method:
+        q = q.filter_by(method=method)
+    # 잡 실행 사이에 삭제된 플레이리스트는 숨김
+    live = {pid for (pid,) in db.query(Playlist.id).filter_by(user_id=user.id)}
+    rows = [r for r in q.all() if r.playlist_id is None or r.playlist_id in live]
+    rows.sort(key=lambda r: (r.playlist_id is not None, -(r.playlist_id or 0), r.method))
+    with registry.use() as m:
+        return MyRecommendationsOut(lists=[
+            PrecomputedRecsOut(playlist_id=r.playlist_id, method=r.method, computed_at=r.computed_at,
+                               items=[to_song_out(m, sid, sc) for sid, sc in (r.items or [])[:limit]])
+            for r in rows
+        ])
+
+@app.get("/me/recommend", response_model=RecommendResponse)
+def recommend_for_me(method: Literal["sgns", "dae", "hybrid"] = "hybrid",
+                     k: int = 20, alpha: float = 0.6,
+                     playlist_id: int | None = None,
+                     exclude_owned: bool = True,
+                     user: AuthUser = Depends(get_current_user),
+                     db: Session = Depends(get_db)):
+    """저장된 취향 벡터(합/개수)로 바로 검색 (없으면 곡 목록으로 계산만, 저장은 다음 쓰기 때). playlist_id가 없으면 사용자 전체 기준."""
+    with registry.use() as m:
+        t = m.taste.get(db, user.id, playlist_id)
+        if t is None:
+            raise HTTPException(404, "not found")
+        ex = set()
+        if exclude_owned:
+            # 곡 id 컬럼만 조회 (임베딩 평균은 다시 계산하지 않음)
+            q = db.query(PlaylistItem.song_id).join(Playlist, PlaylistItem.playlist_id == Playlist.id) \
+                  .filter(Playlist.user_id == user.id)
+            if playlist_id is not None:
+                q = q.filter(Playlist.id == playlist_id)
+            ex = {sid for (sid,) in q}
+        alpha = {"sgns": 1.0, "dae": 0.0}.get(method, min(max(alpha, 0.0), 1.0))
+        qv, dm = t.sgns_query(), t.dae_mean()
+        if method == "sgns":
+            pairs = sgns_search(m, qv, k, ex) if qv is not None else []
+        elif method == "dae":
+            pairs = m.dae.scores_from_mean(dm, k, ex) if dm is not None else []
+        elif qv is None and dm is None:
+            pairs = []
+        else:
+            pairs = m.hybrid.recommend([], k, alpha=alpha, exclude=ex, qvec=qv, dae_mean=dm)
+        return RecommendResponse(items=[to_song_out(m, sid, sc) for sid, sc in pairs])
 
-    r = requests.get("https://www.googleapis.com/youtube/v3/search", params=params, timeout=5)
-    j = r.json()
-    items = (j.get("items") or [])
-    vid = items[0]["id"]["videoId"] if items else None
+@app.get("/yt/search")
+async def yt_search(q: str, safe: bool = True):
+    try:
+        vid = await yt_lookup.lookup(q, safe)
+    except YouTubeNotConfigured as e:
+        # 캐시 미스인데 키가 없음
+        raise HTTPException(503, str(e))
+    except YouTubeBackendError as e:
+        raise HTTPException(502, f"YouTube lookup failed: {e}")
     return {"videoId": vid}
 
 # -------------------- Recommend APIs --------------------
+# 결과 캐시 키 첫 항목 = 모델 버전 (교체 직전 요청이 넣은 이전 버전 결과가 섞이지 않도록)
 @app.post("/recommend/by-songs", response_model=RecommendResponse)
 def recommend_by_songs(req: SongsRecoRequest):
-    seed = [s for s in req.seed_song_ids if s in id2idx]
-    if not seed:
-        return RecommendResponse(items=[])
-    pairs = sgns.similar(seed, topk=req.k)
-    ex = set(req.exclude) | set(seed)
-    pairs = [(sid, sc) for sid, sc in pairs if sid not in ex][:req.k]
-    items = [to_song_out(sid, sc) for sid, sc in pairs]
-    return RecommendResponse(items=items)
+    with registry.use() as m:
+        seed = sorted({s for s in req.seed_song_ids if s in m.song_idmap})
+        if not seed:
+            return RecommendResponse(items=[])
+        key = (m.version, "sgns-songs", tuple(seed), req.nprobe, req.ef_search)
+        pairs = result_cache.get_or_compute(
+            key, req.k, req.exclude,
+            lambda n: sgns_similar(m, seed, n, nprobe=req.nprobe, ef_search=req.ef_search))
+        items = [to_song_out(m, sid, sc) for sid, sc in pairs]
+        return RecommendResponse(items=items)
 
 @app.post("/recommend/by-tags", response_model=RecommendResponse)
 def recommend_by_tags(req: TagRecoRequest):
-    vecs = []
-    for t in req.tags:
-        key = _normalize_tag(t)
-        v = tag_emb.get(key)
-        if v is not None:
-            vecs.append(v)
-    if not vecs:
-        return RecommendResponse(items=[])
-    q = np.mean(np.stack(vecs, axis=0), axis=0, keepdims=True)
-    q /= (np.linalg.norm(q, axis=1, keepdims=True) + 1e-12)
-    pairs = sgns.similar_from_vector(q, topk=req.k, exclude_ids=set(req.exclude))
-    items = [to_song_out(sid, sc) for sid, sc in pairs]
-    return RecommendResponse(items=items)
+    with registry.use() as m:
+        keys = sorted({k for k in (m.normalize_tag(t) for t in req.tags) if k in m.tag_emb})
+        if not keys:
+            return RecommendResponse(items=[])
+
+        def compute(n: int):
+            q = np.mean(np.stack([m.tag_emb[k] for k in keys], axis=0), axis=0, keepdims=True)
+            q /= (np.linalg.norm(q, axis=1, keepdims=True) + 1e-12)
+            return sgns_search(m, q, n, None, nprobe=req.nprobe, ef_search=req.ef_search)
+
+        key = (m.version, "sgns-tags", tuple(keys), req.nprobe, req.ef_search)
+        pairs = result_cache.get_or_compute(key, req.k, req.exclude, compute)
+        items = [to_song_out(m, sid, sc) for sid, sc in pairs]
+        return RecommendResponse(items=items)
 
 @app.post("/recommend/by-dae", response_model=RecommendResponse)
 def recommend_by_dae(req: DAERecoRequest):
-    seed = list(set(req.seed_song_ids))
-    pairs = dae.scores(seed, req.k + len(seed))
-    ex = set(req.exclude) | set(seed)
-    pairs = [(sid, sc) for sid, sc in pairs if sid not in ex][:req.k]
-    items = [to_song_out(sid, sc) for sid, sc in pairs]
-    return RecommendResponse(items=items)
+    seed = sorted(set(req.seed_song_ids))
+    with registry.use() as m:
+        pairs = result_cache.get_or_compute(
+            (m.version, "dae", tuple(seed)), req.k, req.exclude,
+            lambda n: dae_scores(m, seed, n))
+        items = [to_song_out(m, sid, sc) for sid, sc in pairs]
+        return RecommendResponse(items=items)
 
 # 곡 → 가까운 태그 미리보기
 @app.get("/songs/{song_id}/similar-tags")
 def similar_tags(song_id: int, topn: int = 8):
-    tags = s2t.nearest_tags(song_id, topn=topn)
+    with registry.use() as m:
+        tags = m.s2t.nearest_tags(song_id, topn=topn)
     return {"song_id": song_id, "tags": tags}
 
 # 곡 1개로부터 나온 태그(복수)의 평균벡터로 SGNS 검색 (랜덤 샘플링)
 @app.post("/recommend/by-song-tags", response_model=RecommendResponse)
 def recommend_by_song_tags(req: BySongTagsRequest):
-    tags = s2t.nearest_tags(req.song_id, topn=max(1, req.topn))
-    if not tags:
-        return RecommendResponse(items=[])
-
-    rng = np.random.default_rng(req.seed)
-    m = min(len(tags), max(1, req.sample_n))
-    sel_idx = rng.choice(len(tags), size=m, replace=False)
-    chosen = [tags[i] for i in sel_idx]
-
-    vecs = [tag_emb[t] for t in chosen if t in tag_emb]
-    if not vecs:
-        return RecommendResponse(items=[])
-    q = np.mean(np.stack(vecs, axis=0), axis=0, keepdims=True)
-    q /= (np.linalg.norm(q, axis=1, keepdims=True) + 1e-12)
-
-    pairs = sgns.similar_from_vector(q, topk=req.k, exclude_ids=set(req.exclude))
-    items = [to_song_out(sid, sc) for sid, sc in pairs]
-    return RecommendResponse(items=items)
+    with registry.use() as m:
+        tags = m.s2t.nearest_tags(req.song_id, topn=max(1, req.topn))
+        if not tags:
+            return RecommendResponse(items=[])
+
+        rng = np.random.default_rng(req.seed)
+        n = min(len(tags), max(1, req.sample_n))
+        sel_idx = rng.choice(len(tags), size=n, replace=False)
+        chosen = [tags[i] for i in sel_idx]
+
+        vecs = [m.tag_emb[t] for t in chosen if t in m.tag_emb]
+        if not vecs:
+            return RecommendResponse(items=[])
+        q = np.mean(np.stack(vecs, axis=0), axis=0, keepdims=True)
+        q /= (np.linalg.norm(q, axis=1, keepdims=True) + 1e-12)
+
+        pairs = sgns_search(m, q, req.k, set(req.exclude), nprobe=req.nprobe, ef_search=req.ef_search)
+        items = [to_song_out(m, sid, sc) for sid, sc in pairs]
+        return RecommendResponse(items=items)
 
 @app.get("/songs/search")
 def search_songs(q: str, limit: int = 20):
-    qq = (q or "").strip().lower()
-    if not qq:
-        return {"songs": []}
-    out = []
-    for sid, m in meta.items():
-        title = (m.get("song_name") or m.get("title") or str(sid))
-        artists = m.get("artist_name_basket") or m.get("artists") or []
-        hay = f"{title} {' '.join(artists)}".lower()
-        if qq in hay:
-            out.append({
-                "id": int(sid),
-                "title": title,
-                "artist": ", ".join(artists),
-                "album": m.get("album_name") or "",
-                "genre": ", ".join(m.get("song_gn_gnr_basket") or m.get("genres") or []),
-            })
-            if len(out) >= limit:
-                break
-    return {"songs": out}
+    with registry.use() as m:
+        rows = [m.meta.row_of(sid) for sid in m.song_search.search(q or "", limit=limit)]
+        return {"songs": [song_row_dict(m, r) for r in rows if r >= 0]}
+
+# 하이브리드: 씨드 곡 + 태그 질의, SGNS·DAE 점수 합산 top-k (결과 캐시 사용)
+@app.post("/recommend", response_model=RecommendResponse)
+def recommend(req: RecommendRequest):
+    """method = sgns | dae | hybrid (SGNS·DAE 점수를 정규화 후 alpha로 합산한 단일 top-k)"""
+    seed = sorted(set(req.seed_song_ids))
+    alpha = {"sgns": 1.0, "dae": 0.0}.get(req.method, min(max(req.alpha, 0.0), 1.0))
+    with registry.use() as m:
+        tags = sorted({k for k in (m.normalize_tag(t) for t in req.tags) if k in m.tag_emb})
+
+        def compute(n: int):
+            # SGNS 질의 = 씨드 곡 벡터 + 태그 벡터 평균
+            vecs = [m.E[m.song_idmap.present_rows(seed)]] + [m.tag_emb[k][None, :] for k in tags]
+            v = np.concatenate(vecs, axis=0)
+            q = None
+            if v.shape[0]:
+                q = v.mean(axis=0, keepdims=True)
+                q = (q / (np.linalg.norm(q, axis=1, keepdims=True) + 1e-12)).astype(np.float32)
+            return m.hybrid.recommend(seed, n, alpha=alpha, qvec=q, norm=req.norm)
+
+        key = (m.version, "hybrid", tuple(seed), tuple(tags), alpha, req.norm)
+        pairs = result_cache.get_or_compute(key, req.k, req.exclude, compute)
+        items = [to_song_out(m, sid, sc) for sid, sc in pairs]
+        return RecommendResponse(items=items)
+
+@app.post("/recommend/batch")
+def recommend_batch(req: BatchRecoRequest):
+    """여러 질의를 청크 단위 행렬 연산으로 처리, 한 줄에 질의 하나씩 NDJSON 스트리밍"""
+    queries = [BulkQuery(q.method, q.seed_song_ids, q.tags, q.k, q.exclude) for q in req.queries]
+
+    def lines():
+        # 스트리밍이 끝날 때까지 같은 버전을 잡아 둠
+        with registry.use() as m:
+            for i, pairs in m.bulk.run(queries, nprobe=req.nprobe, ef_search=req.ef_search):
+                if req.with_meta:
+                    items = [to_song_out(m, sid, sc).model_dump() for sid, sc in pairs]
+                else:
+                    items = [{"id": sid, "score": sc} for sid, sc in pairs]
+                yield json.dumps({"i": i, "items": items}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 # 데모: SGNS/DAE 교차 10곡
 @app.post("/recommend/demo", response_model=RecommendResponse)
 def recommend_demo(req: RecommendRequest):
     seed = list(set(req.seed_song_ids))
-    a = sgns.similar(seed, 5 + len(seed))[:5]
-    b = dae.scores(seed, 5 + len(seed))[:5]
-    mixed = interleave(a, b, want=10)
-    items = [to_song_out(sid, sc) for sid, sc in mixed]
-    return RecommendResponse(items=items)
+    with registry.use() as m:
+        a = m.sgns.similar(seed, 5 + len(seed))[:5]
+        b = m.dae.scores(seed, 5 + len(seed))[:5]
+        mixed = interleave(a, b, want=10)
+        items = [to_song_out(m, sid, sc) for sid, sc in mixed]
+        return RecommendResponse(items=items)
 
 
 # -------------------- Simple Lists/Health --------------------
 @app.get("/tags")
 def get_tags(limit: int = 60, q: str | None = None):
-    keys = list(tag_emb.keys())
-    if q:
-        qq = q.strip().lower()
-        keys = [k for k in keys if qq in k.lower()]
-    keys.sort()
-    return {"tags": keys[:limit]}
+    # 접두 일치 → 중간 일치, 각각 빈도순 (질의 없으면 빈도 상위)
+    with registry.use() as m:
+        return {"tags": list(m.tag_index.suggest(q or "", max(0, min(limit, 1000))))}
 
 @app.get("/songs/sample")
 def get_songs_sample(limit: int = 30):
     out = []
-    for sid, m in list(meta.items())[:limit]:
-        out.append({
-            "id": int(sid),
-            "title": m.get("song_name") or str(sid),
-            "artist": ", ".join(m.get("artist_name_basket") or []),
-            "album": m.get("album_name") or "",
-            "genre": ", ".join(m.get("song_gn_gnr_basket") or []),
-        })
+    with registry.use() as m:
+        for row in range(len(m.meta)):
+            if len(out) >= limit:
+                break
+            if m.meta.title(row):  # 메타가 있는 곡만
+                out.append(song_row_dict(m, row))
     return {"songs": out}
 
 @app.get("/health")
 def health():
-    return {"ok": True, "num_songs": len(ids)}
+    with registry.use() as m:
+        return {"ok": True, "num_songs": len(m.ids), "model_version": m.version}
+
+@app.get("/stats/search")
+def search_stats():
+    with registry.use() as m:
+        return {"songs": m.song_search.stats(), "tags": m.tag_index.stats()}
+
+@app.get("/stats/batching")
+def batching_stats():
+    with registry.use() as m:
+        return {"enabled": BATCHING,
+                "batchers": [b.stats() for b in (m.sgns_batcher, m.dae_batcher) if b is not None]}
+
+@app.get("/stats/auth")
+def auth_stats():
+    return {"password_pool": pw_pool.stats(), "cache": auth_cache.stats()}
+
+@app.get("/stats/yt")
+def yt_stats():
+    return yt_lookup.stats()
+
+@app.get("/stats/db")
+def db_stats():
+    return pool_stats()
+
+@app.get("/stats/taste")
+def taste_stats():
+    with registry.use() as m:
+        return m.taste.stats()
+
+@app.get("/stats/cache")
+def cache_stats():
+    return result_cache.stats()
+
+@app.delete("/stats/cache")
+def cache_clear():
+    result_cache.invalidate()
+    return {"ok": True}
+
+
+# -------------------- Admin: model versions --------------------
+def require_admin(x_admin_token: str = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(403, "admin API disabled (ADMIN_TOKEN not set)")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(401, "invalid admin token")
+
+def _version_dir(version: str) -> str:
+    # MODELS_DIR 바로 아래 디렉터리 이름만 허용 (경로 조작 방지)
+    if not version or version in (".", "..") or os.path.basename(version) != version:
+        raise HTTPException(400, "invalid version name")
+    path = os.path.join(MODELS_DIR, version)
+    if os.path.isdir(path):
+        return path
+    if version == MODEL_VERSION:
+        return DATA_DIR  # 기동 버전으로 되돌리기
+    raise HTTPException(404, f"model version not found: {version}")
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def models_status():
+    """활성 버전, 로드 중인 버전, 진행 중 요청이 남은(draining) 이전 버전, 최근 이벤트"""
+    return registry.status()
+
+@app.post("/admin/models/reload", status_code=202, dependencies=[Depends(require_admin)])
+async def models_reload(body: ModelReloadIn):
+    """백그라운드 로드 → smoke 질의 검증 → 참조 교체. 실패하면 기존 버전 유지 (events에 기록)."""
+    path = _version_dir(body.version)
+    if not registry.reload(path, body.version):
+        raise HTTPException(409, "another version is loading")
+    if body.wait:
+        await run_in_threadpool(registry.wait)
+    return registry.status()
 
 
 # -------------------- Helpers --------------------
-def to_song_out(sid: int, score: float) -> SongOut:
-    m = meta.get(int(sid), {})
-    title = m.get("song_name") or m.get("title") or str(sid)
-    artists = m.get("artist_name_basket") or m.get("artists") or []
-    genres = m.get("song_gn_gnr_basket") or m.get("genres") or []
-    return SongOut(id=int(sid), title=title, artists=artists, genres=genres, score=float(score))
+def to_song_out(m: ModelBundle, sid: int, score: float) -> SongOut:
+    row = m.meta.row_of(int(sid))
+    if row < 0:
+        return SongOut(id=int(sid), title=str(sid), artists=[], genres=[], score=float(score))
+    return SongOut(id=int(sid), title=m.meta.title(row) or str(sid),
+                   artists=m.meta.artists(row), genres=m.meta.genres(row), score=float(score))
+
+def song_row_dict(m: ModelBundle, row: int) -> dict:
+    meta = m.meta
+    sid = int(meta.ids[row])
+    return {
+        "id": sid,
+        "title": meta.title(row) or str(sid),
+        "artist": ", ".join(meta.artists(row)),
+        "album": meta.album(row),
+        "genre": ", ".join(meta.genres(row)),
+    }
 
 def interleave(a: List[Tuple[int, float]], b: List[Tuple[int, float]], want: int):
     out, i, j, seen = [], 0, 0, set()
@@ -0,0 +1,156 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.idmap import IdMap
+
+# app/tools/build_meta_store.py 가 DATA_DIR/song_meta_store/ 에 생성
+META_STORE_DIR = "song_meta_store"
+
+
+class StringTable:
+    """UTF-8 blob + int64 offsets. i번째 문자열 = blob[off[i]:off[i+1]]"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob        # uint8
+        self.offsets = offsets  # int64, (n+1,)
+
+    def __len__(self):
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def save(self, d: str, name: str):
+        np.save(os.path.join(d, f"{name}.blob.npy"), self.blob)
+        np.save(os.path.join(d, f"{name}.off.npy"), self.offsets)
+
+    @classmethod
+    def load(cls, d: str, name: str) -> "StringTable":
+        return cls(np.load(os.path.join(d, f"{name}.blob.npy"), mmap_mode="r"),
+                   np.load(os.path.join(d, f"{name}.off.npy"), mmap_mode="r"))
+
+
+class _Interner:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def __call__(self, s: str) -> int:
+        return self.index.setdefault(s, len(self.index))
+
+    def table(self) -> StringTable:
+        return StringTable.from_strings(self.index)  # dict 삽입 순서 = id 순서
+
+
+class SongMetaStore:
+    """
+    song_meta.json 대체용 컬럼형 메타 저장소 (곡당 dict 대신 배열 몇 개).
+    - title: 곡별 StringTable
+    - album: 앨범명 intern 테이블 + 곡별 int32 인덱스
+    - artists / genres: intern 테이블 + CSR(ptr int64, idx int32)
+    - 행 순서: ids 배열 (변환 시 song_ids.npy를 주면 임베딩 행과 같은 순서로 앞쪽에 배치)
+    모든 배열은 .npy로 저장되어 np.load(mmap_mode="r")로 워커 간 공유된다.
+    """
+
+    def __init__(self, ids: np.ndarray, titles: StringTable,
+                 album_names: StringTable, album_idx: np.ndarray,
+                 artist_names: StringTable, artist_ptr: np.ndarray, artist_idx: np.ndarray,
+                 genre_names: StringTable, genre_ptr: np.ndarray, genre_idx: np.ndarray):
+        self.ids = ids
+        self.titles = titles
+        self.album_names, self.album_idx = album_names, album_idx
+        self.artist_names, self.artist_ptr, self.artist_idx = artist_names, artist_ptr, artist_idx
+        self.genre_names, self.genre_ptr, self.genre_idx = genre_names, genre_ptr, genre_idx
+        self.idmap = IdMap(ids)  # id → row 조회용
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    # ---------- 조회 ----------
+    def row_of(self, sid: int) -> int:
+        return self.idmap.row(sid)
+
+    def title(self, row: int) -> str:
+        return self.titles[row]
+
+    def album(self, row: int) -> str:
+        return self.album_names[int(self.album_idx[row])]
+
+    def artists(self, row: int) -> List[str]:
+        return [self.artist_names[int(i)] for i in self.artist_idx[self.artist_ptr[row]:self.artist_ptr[row + 1]]]
+
+    def genres(self, row: int) -> List[str]:
+        return [self.genre_names[int(i)] for i in self.genre_idx[self.genre_ptr[row]:self.genre_ptr[row + 1]]]
+
+    def iter_search_docs(self) -> Iterator[Tuple[int, str, List[str]]]:
+        for row in range(len(self)):
+            title, artists = self.title(row), self.artists(row)
+            if title or artists:  # 메타 없이 임베딩 순서만 맞춘 행은 제외
+                yield int(self.ids[row]), title, artists
+
+    # ---------- 구성 / 저장 ----------
+    @classmethod
+    def from_records(cls, meta: Dict[int, dict], ids_first: Optional[np.ndarray] = None) -> "SongMetaStore":
+        """meta: {song_id: song_meta.json 항목}. ids_first가 있으면 그 순서를 앞에 두고 나머지는 id 오름차순."""
+        if ids_first is not None:
+            head = [int(s) for s in ids_first]
+            head_set = set(head)
+            order = head + sorted(s for s in meta if s not in head_set)
+        else:
+            order = sorted(meta)
+
+        albums, artists, genres = _Interner(), _Interner(), _Interner()
+        titles, album_idx = [], np.zeros(len(order), dtype=np.int32)
+        artist_ptr = np.zeros(len(order) + 1, dtype=np.int64)
+        genre_ptr = np.zeros(len(order) + 1, dtype=np.int64)
+        artist_idx, genre_idx = [], []
+        for row, sid in enumerate(order):
+            m = meta.get(sid, {})
+            titles.append(m.get("song_name") or m.get("title") or "")
+            album_idx[row] = albums(m.get("album_name") or "")
+            artist_idx.extend(artists(a) for a in (m.get("artist_name_basket") or m.get("artists") or []))
+            genre_idx.extend(genres(g) for g in (m.get("song_gn_gnr_basket") or m.get("genres") or []))
+            artist_ptr[row + 1] = len(artist_idx)
+            genre_ptr[row + 1] = len(genre_idx)
+
+        return cls(np.asarray(order, dtype=np.int64), StringTable.from_strings(titles),
+                   albums.table(), album_idx,
+                   artists.table(), artist_ptr, np.asarray(artist_idx, dtype=np.int32),
+                   genres.table(), genre_ptr, np.asarray(genre_idx, dtype=np.int32))
+
+    def save(self, d: str):
+        os.makedirs(d, exist_ok=True)
+        np.save(os.path.join(d, "ids.npy"), self.ids)
+        self.titles.save(d, "title")
+        self.album_names.save(d, "album_names")
+        np.save(os.path.join(d, "album_idx.npy"), self.album_idx)
+        self.artist_names.save(d, "artist_names")
+        np.save(os.path.join(d, "artist_ptr.npy"), self.artist_ptr)
+        np.save(os.path.join(d, "artist_idx.npy"), self.artist_idx)
+        self.genre_names.save(d, "genre_names")
+        np.save(os.path.join(d, "genre_ptr.npy"), self.genre_ptr)
+        np.save(os.path.join(d, "genre_idx.npy"), self.genre_idx)
+        with open(os.path.join(d, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"songs": len(self), "artists": len(self.artist_names),
+                       "genres": len(self.genre_names), "albums": len(self.album_names)}, f)
+
+    @classmethod
+    def load(cls, d: str) -> "SongMetaStore":
+        arr = lambda name: np.load(os.path.join(d, f"{name}.npy"), mmap_mode="r")
+        return cls(arr("ids"), StringTable.load(d, "title"),
+                   StringTable.load(d, "album_names"), arr("album_idx"),
+                   StringTable.load(d, "artist_names"), arr("artist_ptr"), arr("artist_idx"),
+                   StringTable.load(d, "genre_names"), arr("genre_ptr"), arr("genre_idx"))
+
+    @staticmethod
+    def exists(d: str) -> bool:
+        return os.path.exists(os.path.join(d, "manifest.json"))
@@ -1,6 +1,7 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.nn.utils.rnn import pad_sequence
 
 class EmbeddingDAE(nn.Module):
     def __init__(self, num_songs, dim=128, depth=2, dropout=0.1):
@@ -13,31 +14,53 @@ class EmbeddingDAE(nn.Module):
         # 디코더는 E와 weight tying
         self.norm = nn.LayerNorm(dim)
 
-    def encoder(self, remain_lists):
-        out = []
-        for ids in remain_lists:
-            # 예외처리
-            if len(ids) == 0:
-                out.append(torch.zeros(self.emb.embedding_dim, device=self.emb.weight.device))
-            else:
-                e = self.emb(ids.to(self.emb.weight.device))  # [ids_length, dim]
-                p = e.mean(dim=0)                              # [dim]
-                p = self.encoder(p)
-                p = self.norm(p)
-                out.append(p)
-        return torch.stack(out, dim=0)  # [B, dim]
+    def flatten(self, id_lists):
+        # List[Tensor{n_i}] → (ids [sum n_i], offsets [B]) : EmbeddingBag 입력 형식
+        device = self.emb.weight.device
+        lengths = torch.tensor([len(ids) for ids in id_lists], dtype=torch.long, device=device)
+        if len(id_lists) and int(lengths.sum()) > 0:
+            ids = torch.cat([ids.reshape(-1).to(device=device, dtype=torch.long) for ids in id_lists])
+        else:
+            ids = torch.empty(0, dtype=torch.long, device=device)
+        offsets = torch.zeros_like(lengths)
+        if len(id_lists) > 1:
+            offsets[1:] = torch.cumsum(lengths, dim=0)[:-1]
+        return ids, offsets
+
+    def encode_flat(self, ids, offsets):
+        # ids: [sum n_i], offsets: [B] → [B, dim]
+        ids = ids.to(self.emb.weight.device)
+        offsets = offsets.to(self.emb.weight.device)
+        p = F.embedding_bag(ids, self.emb.weight, offsets, mode="mean")  # 플레이리스트별 평균
+        p = self.encode_mean(p)                                           # MLP/LayerNorm은 배치 전체 1회
+        # 예외처리: 빈 플레이리스트는 (encoder를 거치지 않은) 0벡터
+        ends = torch.cat([offsets[1:], offsets.new_tensor([ids.numel()])])
+        nonempty = (ends - offsets) > 0
+        return torch.where(nonempty[:, None], p, torch.zeros_like(p))
+
+    def encode_mean(self, m):
+        # m: [B, dim] 곡 임베딩 평균 → [B, dim] (평균까지는 선형이라 합/개수로 증분 유지 가능)
+        return self.norm(self.encoder(m))
+
+    def encode_playlist(self, remain_lists):
+        ids, offsets = self.flatten(remain_lists)
+        return self.encode_flat(ids, offsets)  # [B, dim]
+
+    def score_padded(self, p, cand, mask):
+        # p: [B, dim], cand: [B, M] (패딩 포함), mask: [B, M] → logits [B, M] (패딩 위치 -inf)
+        e_c = self.emb(cand.to(self.emb.weight.device))       # [B, M, dim]
+        logits = torch.bmm(e_c, p.unsqueeze(-1)).squeeze(-1)  # 점수 = dot(E[candidates], p)
+        return logits.masked_fill(~mask.to(logits.device), float("-inf"))
 
     def score_candidates(self, p, candidates_lists):
         # p: [B, dim], candidates_lists: List[Tensor{m}]
-        logits_list = []
-        for i, cand in enumerate(candidates_lists):
-            e_c = self.emb(cand.to(self.emb.weight.device))  # [m, dim]
-            # 점수 = dot(E[candidates], p[i])
-            logits = e_c @ p[i]                              # [m]
-            logits_list.append(logits)
-        return logits_list
+        lengths = [len(c) for c in candidates_lists]
+        cand = pad_sequence([c.reshape(-1).long() for c in candidates_lists], batch_first=True)
+        mask = torch.arange(cand.shape[1])[None, :] < torch.tensor(lengths)[:, None]
+        logits = self.score_padded(p, cand, mask)
+        return [logits[i, :m] for i, m in enumerate(lengths)]  # List[Tensor{m}]
 
     def forward(self, remain_lists, candidates_lists):
-        p = self.encoder(remain_lists)               # [B, dim]
+        p = self.encode_playlist(remain_lists)                 # [B, dim]
         logits = self.score_candidates(p, candidates_lists)  # List[Tensor{m}]
-        return logits
\ No newline at end of file
+        return logits
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .db import Base
@@ -35,3 +35,44 @@ class PlaylistItem(Base):
     genres = Column(JSON, default=list)
 
     playlist = relationship("Playlist", back_populates="items")
+
+class PrecomputedRec(Base):
+    """
+    오프라인 잡(app/tools/precompute_recs.py)이 채우는 추천 결과.
+    playlist_id가 NULL이면 사용자 전체(모든 플레이리스트 곡 합집합) 기준.
+    items_hash: 계산 당시 곡 id 집합의 해시 (바뀐 것만 다시 계산)
+    """
+    __tablename__ = "precomputed_recs"
+    __table_args__ = (UniqueConstraint("user_id", "playlist_id", "method"),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    playlist_id = Column(Integer, nullable=True, index=True)
+    method = Column(String, nullable=False)     # sgns | dae
+    items_hash = Column(String, nullable=False)
+    items = Column(JSON, default=list)          # [[song_id, score], ...]
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+class TasteVector(Base):
+    """
+    사용자/플레이리스트별 곡 임베딩 합·개수 (app/taste.py가 플레이리스트 쓰기 때 증분 갱신).
+    playlist_id가 NULL이면 사용자 전체. *_sum은 float32 바이트.
+    model_version: 합을 만든 임베딩 지문 (다르면 재구성 대상)
+    """
+    __tablename__ = "taste_vectors"
+    __table_args__ = (UniqueConstraint("user_id", "playlist_id"),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    playlist_id = Column(Integer, nullable=True, index=True)
+    sgns_sum = Column(LargeBinary, nullable=False)
+    sgns_count = Column(Integer, nullable=False, default=0)
+    dae_sum = Column(LargeBinary, nullable=False)
+    dae_count = Column(Integer, nullable=False, default=0)
+    model_version = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class YtCache(Base):
+    """/yt/search 결과 캐시 (app/yt.py). video_id가 NULL이면 '결과 없음'도 캐시한 것."""
+    __tablename__ = "yt_cache"
+    key = Column(String, primary_key=True)    # "safe|정규화된 질의"
+    video_id = Column(String, nullable=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,50 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.orm_models import Playlist, PlaylistItem
+
+
+def list_page(db: Session, user_id: int, limit: Optional[int] = None,
+              before: Optional[int] = None) -> Tuple[List[Playlist], Optional[int]]:
+    """
+    사용자 플레이리스트 최신순 (id 내림차순) 한 페이지 + 다음 커서.
+    items는 selectinload로 IN 쿼리 1번에 같이 읽음 (플레이리스트마다 lazy load 하지 않음).
+    before: 이전 페이지의 마지막 id (키셋 페이지네이션), limit=None이면 전부.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError(f"limit must be >= 1 (got {limit})")
+    q = (db.query(Playlist)
+           .options(selectinload(Playlist.items))
+           .filter(Playlist.user_id == user_id))
+    if before is not None:
+        q = q.filter(Playlist.id < before)
+    q = q.order_by(Playlist.id.desc())
+    if limit is None:
+        return q.all(), None
+    rows = q.limit(limit + 1).all()  # 1개 더 읽어서 다음 페이지 유무 판단
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def get_owned(db: Session, user_id: int, pid: int) -> Optional[Playlist]:
+    pl = (db.query(Playlist)
+            .options(selectinload(Playlist.items))
+            .filter(Playlist.id == pid)
+            .first())
+    if not pl or pl.user_id != user_id:
+        return None
+    return pl
+
+
+def insert_items(db: Session, playlist_id: int, items, start: int = 0):
+    """PlaylistItem 다건 INSERT 1번 (executemany)."""
+    if not items:
+        return
+    db.execute(insert(PlaylistItem), [
+        {"playlist_id": playlist_id, "position": start + i, "song_id": it.song_id,
+         "title": it.title, "artists": it.artists, "genres": it.genres}
+        for i, it in enumerate(items)
+    ])
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import numpy as np
+from typing import Optional
+
+from app.loaders import fingerprint
+try:
+    import faiss
+    FAISS_OK = True
+except Exception:
+    FAISS_OK = False
+
+log = logging.getLogger(__name__)
+
+# flat: 정확(brute-force) / ivf_flat, ivf_pq, hnsw: 근사
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def index_path(data_dir: str, kind: str) -> str:
+    # song_embeddings.pkl 옆에 저장
+    return os.path.join(data_dir, f"song_index_{kind}.faiss")
+
+
+def index_key_path(data_dir: str, kind: str) -> str:
+    # 인덱스를 만든 임베딩 지문 (index_key)
+    return os.path.join(data_dir, f"song_index_{kind}.json")
+
+
+def index_key(embeddings: np.ndarray, ids) -> dict:
+    # 인덱스 행 = E 행 → 곡 id 배열(행 순서)과 임베딩이 같아야 결과 행을 곡으로 바꿀 수 있음
+    return {"num_songs": int(embeddings.shape[0]), "dim": int(embeddings.shape[1]),
+            "songs": fingerprint(embeddings, np.asarray(ids, dtype=np.int64))}
+
+
+class NumpyIndex:
+    """
+    정확 내적 검색 (서빙 flat / faiss 미설치 시 폴백).
+    E를 복사하지 않고 그대로(mmap 스토어면 워커 간 페이지 캐시 공유) matmul + argpartition.
+    faiss Index.search와 같은 (sims, idxs) 반환 형식을 따른다.
+    """
+
+    def __init__(self, embeddings: np.ndarray):
+        self.E = embeddings  # (N,d) L2-normalized
+        self.ntotal = embeddings.shape[0]
+
+    def search(self, q: np.ndarray, k: int, params=None):
+        sims = q @ self.E.T  # (B,N)
+        k = min(k, self.ntotal)
+        if k <= 0:
+            empty = np.empty((q.shape[0], 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        # 전체 정렬 대신 argpartition 후 상위 k개만 정렬
+        idxs = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(sims, idxs, axis=1)
+        order = np.argsort(-part, axis=1)
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(idxs, order, axis=1)
+
+
+def build_index(embeddings: np.ndarray, kind: str = "flat", nlist: int = 4096,
+                pq_m: int = 16, pq_nbits: int = 8, hnsw_m: int = 32,
+                ef_construction: int = 200, train_size: int = 200_000, seed: int = 0):
+    """오프라인 학습용. 모든 인덱스는 내적(= 정규화 벡터의 cosine) 기준."""
+    if not FAISS_OK:
+        raise RuntimeError("faiss is required to build an ANN index")
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"unknown index kind: {kind}")
+    xb = np.ascontiguousarray(embeddings, dtype=np.float32)
+    d = xb.shape[1]
+
+    if kind == "flat":
+        index = faiss.IndexFlatIP(d)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+    else:
+        quantizer = faiss.IndexFlatIP(d)
+        if kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+        # 학습은 샘플로 (전체 650k 학습은 불필요하게 느림)
+        rng = np.random.default_rng(seed)
+        n_train = min(train_size, xb.shape[0])
+        sample = xb[np.sort(rng.choice(xb.shape[0], size=n_train, replace=False))]
+        index.train(sample)
+    index.add(xb)
+    return index
+
+
+def save_index(index, path: str, key: Optional[dict] = None):
+    faiss.write_index(index, path)
+    if key is not None:
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(key, f)
+
+
+def load_index(path: str, mmap: bool = True):
+    # IVF 계열은 inverted list를 mmap으로 열어 워커 간 페이지 캐시 공유
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except Exception:
+            pass
+    return faiss.read_index(path)
+
+
+def search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """요청 단위 튜닝 파라미터 (인덱스 공유 상태는 건드리지 않음)."""
+    if not FAISS_OK or isinstance(index, NumpyIndex):
+        return None
+    if nprobe and faiss.try_extract_index_ivf(index) is not None:
+        return faiss.SearchParametersIVF(nprobe=int(nprobe))
+    if ef_search and isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    return None
+
+
+def _saved_key(data_dir: str, kind: str) -> Optional[dict]:
+    path = index_key_path(data_dir, kind)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_index(embeddings: np.ndarray, ids, data_dir: str, kind: str = "flat"):
+    """
+    서빙용 인덱스 선택:
+    - kind != flat, faiss 있음, 저장된 인덱스와 지문(index_key)이 현재 E/ids와 같으면 로드
+    - 그 외 → NumpyIndex (E를 IndexFlatIP로 복사하지 않음 → 워커마다 N×d 사본이 생기지 않음)
+    """
+    if kind != "flat":
+        path = index_path(data_dir, kind)
+        if not FAISS_OK:
+            log.warning("faiss not installed, %s index unavailable; using exact search", kind)
+        elif os.path.exists(path):
+            if _saved_key(data_dir, kind) == index_key(embeddings, ids):
+                index = load_index(path)
+                if index.ntotal == embeddings.shape[0]:
+                    return index
+                log.warning("%s: ntotal=%d != %d, using exact search", path, index.ntotal, embeddings.shape[0])
+            else:
+                # 지문이 없거나 다른 행 순서/임베딩으로 만든 인덱스 → 결과 행이 엉뚱한 곡을 가리킴
+                log.warning("%s does not match the loaded embeddings (missing or different %s), "
+                            "using exact search (rerun app.tools.build_index)", path, index_key_path(data_dir, kind))
+        else:
+            log.warning("%s not found, using exact search (run app.tools.build_index)", path)
+    return NumpyIndex(embeddings)
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    짧은 시간(max_wait_ms) 안에 들어온 질의를 최대 max_batch개까지 모아
+    batch_fn(payloads) -> results 한 번으로 처리하고, 결과를 각 요청에 돌려준다.
+    - submit()은 동기 호출 (FastAPI 동기 엔드포인트의 스레드풀에서 대기)
+    - 배치 크기 분포는 stats()로 조회
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch: int = 32, max_wait_ms: float = 2.0, name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._q: "queue.Queue[tuple[Any, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._sizes = Counter()
+        self._items = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, payload: Any) -> Any:
+        fut: Future = Future()
+        self._q.put((payload, fut))
+        return fut.result()
+
+    def close(self, timeout: float = 5.0):
+        # 모델 교체 후 해제용: 이미 받은 질의까지 처리하고 스레드 종료
+        self._q.put((None, None))
+        self._worker.join(timeout)
+
+    def _collect(self):
+        batch = [self._q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = any(fut is None for _, fut in batch)  # close() 신호
+            batch = [(p, fut) for p, fut in batch if fut is not None]
+            if batch:
+                self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch):
+        with self._lock:
+            self._sizes[len(batch)] += 1
+            self._items += len(batch)
+        try:
+            results = self.batch_fn([p for p, _ in batch])
+            for (_, fut), r in zip(batch, results):
+                fut.set_result(r)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n_batches = sum(self._sizes.values())
+            return {
+                "name": self.name,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": n_batches,
+                "items": self._items,
+                "mean_batch_size": (self._items / n_batches) if n_batches else 0.0,
+                "batch_size_hist": dict(sorted(self._sizes.items())),
+                "queued": self._q.qsize(),
+            }
+
+
+def make_sgns_batcher(sgns, max_batch: int = 32, max_wait_ms: float = 2.0) -> MicroBatcher:
+    """payload = (qvec(1,d), topk, exclude_ids, nprobe, ef_search) → [(song_id, score), ...]"""
+    def run(payloads):
+        results: List[Any] = [None] * len(payloads)
+        # 요청 단위 탐색 파라미터가 같은 것끼리 faiss 배치 검색 1회
+        groups: dict = {}
+        for i, (_, _, _, nprobe, ef_search) in enumerate(payloads):
+            groups.setdefault((nprobe, ef_search), []).append(i)
+        for (nprobe, ef_search), rows in groups.items():
+            Q = np.concatenate([payloads[i][0] for i in rows], axis=0)
+            topk = max(payloads[i][1] for i in rows)
+            outs = sgns.similar_from_vectors(Q, topk, [payloads[i][2] for i in rows],
+                                             nprobe=nprobe, ef_search=ef_search)
+            for i, out in zip(rows, outs):
+                results[i] = out[:payloads[i][1]]
+        return results
+    return MicroBatcher(run, max_batch=max_batch, max_wait_ms=max_wait_ms, name="sgns")
+
+
+def make_dae_batcher(dae, max_batch: int = 32, max_wait_ms: float = 2.0) -> MicroBatcher:
+    """payload = (seed_song_ids, topk) → [(song_id, score), ...]"""
+    def run(payloads):
+        topk = max(k for _, k in payloads)
+        outs = dae.scores_batch([seed for seed, _ in payloads], topk)
+        return [out[:k] for out, (_, k) in zip(outs, payloads)]
+    return MicroBatcher(run, max_batch=max_batch, max_wait_ms=max_wait_ms, name="dae")
@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.rec.sgns import SGNSRecommender
+from app.rec.dae import DAERecommender
+
+Pairs = List[Tuple[int, float]]
+
+
+@dataclass
+class BulkQuery:
+    method: str = "sgns"                      # sgns | dae
+    seed: List[int] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)  # sgns만 사용
+    k: int = 20
+    exclude: List[int] = field(default_factory=list)
+
+
+class BulkRecommender:
+    """
+    여러 질의를 한 번에 처리 (오프라인 배치 / /recommend/batch).
+    - 청크 단위로 sgns는 (B,d) 질의 행렬 → index.search 1회, dae는 encode + (B,d)x(d,N) 1회
+    - 청크 크기로 메모리 상한 (dae는 [B, N] float32 점수 행렬이 생기므로 작게)
+    - 결과는 입력 순서대로 (index, pairs) 스트리밍
+    """
+
+    def __init__(self, sgns: SGNSRecommender, dae: DAERecommender,
+                 tag_vec: Callable[[str], Optional[np.ndarray]],
+                 sgns_chunk: int = 1024, dae_chunk: int = 32):
+        self.sgns = sgns
+        self.dae = dae
+        self.tag_vec = tag_vec
+        self.sgns_chunk = sgns_chunk
+        self.dae_chunk = dae_chunk
+
+    def _sgns_query(self, q: BulkQuery) -> Optional[np.ndarray]:
+        vecs = [self.sgns.E[self.sgns.idmap.present_rows(q.seed)]]
+        for t in q.tags:
+            v = self.tag_vec(t)
+            if v is not None:
+                vecs.append(np.asarray(v, dtype=np.float32)[None, :])
+        v = np.concatenate(vecs, axis=0)
+        if not v.shape[0]:
+            return None
+        v = v.mean(axis=0)
+        return v / (np.linalg.norm(v) + 1e-12)
+
+    def _run_sgns(self, qs: List[BulkQuery], nprobe=None, ef_search=None) -> List[Pairs]:
+        out: List[Pairs] = [[] for _ in qs]
+        vecs, pos = [], []
+        for i, q in enumerate(qs):
+            v = self._sgns_query(q)
+            if v is not None:
+                vecs.append(v); pos.append(i)
+        if not pos:
+            return out
+        Q = np.stack(vecs).astype(np.float32)
+        k = max(qs[i].k for i in pos)
+        res = self.sgns.similar_from_vectors(
+            Q, k, [set(qs[i].seed) | set(qs[i].exclude) for i in pos],
+            nprobe=nprobe, ef_search=ef_search)
+        for i, pairs in zip(pos, res):
+            out[i] = pairs[:qs[i].k]
+        return out
+
+    def _run_dae(self, qs: List[BulkQuery]) -> List[Pairs]:
+        out: List[Pairs] = [[] for _ in qs]
+        pos = [i for i, q in enumerate(qs) if self.dae._to_dae_indices(q.seed).size]
+        if not pos:
+            return out
+        k = max(qs[i].k + len(qs[i].exclude) for i in pos)
+        res = self.dae.scores_batch([qs[i].seed for i in pos], k)
+        for i, pairs in zip(pos, res):
+            ex = set(qs[i].exclude)
+            out[i] = [(sid, sc) for sid, sc in pairs if sid not in ex][:qs[i].k]
+        return out
+
+    def run(self, queries: Iterable[BulkQuery], nprobe: Optional[int] = None,
+            ef_search: Optional[int] = None) -> Iterator[Tuple[int, Pairs]]:
+        chunk = max(self.sgns_chunk, self.dae_chunk)
+        buf: List[Tuple[int, BulkQuery]] = []
+        for i, q in enumerate(queries):
+            if q.method not in ("sgns", "dae"):
+                raise ValueError(f"unknown method: {q.method}")
+            buf.append((i, q))
+            if len(buf) >= chunk:
+                yield from self._flush(buf, nprobe, ef_search)
+                buf = []
+        if buf:
+            yield from self._flush(buf, nprobe, ef_search)
+
+    def _flush(self, buf, nprobe, ef_search) -> Iterator[Tuple[int, Pairs]]:
+        results = {}
+        for method, size in (("sgns", self.sgns_chunk), ("dae", self.dae_chunk)):
+            part = [(i, q) for i, q in buf if q.method == method]
+            for s in range(0, len(part), size):
+                block = part[s:s + size]
+                qs = [q for _, q in block]
+                res = self._run_sgns(qs, nprobe, ef_search) if method == "sgns" else self._run_dae(qs)
+                results.update(zip((i for i, _ in block), res))
+        for i, _ in buf:
+            yield i, results[i]
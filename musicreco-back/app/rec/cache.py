@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, List, Tuple
+
+Pairs = List[Tuple[int, float]]
+
+
+class ResultCache:
+    """
+    추천 결과 LRU + TTL 캐시 (프로세스 내).
+    - 키: (method, 정규화된 질의, 탐색 파라미터) — k는 키에 넣지 않고 상위 N개를 저장
+    - 요청의 exclude는 저장된 상위 N에서 후처리로 제외, 모자라면 더 큰 N으로 다시 계산
+    - invalidate(): 모델 교체 시 전체 무효화
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl_seconds: float = 600.0, min_n: int = 100):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.min_n = min_n
+        self._d: "OrderedDict[Hashable, tuple[float, int, Pairs]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.refills = self.evictions = 0
+
+    @staticmethod
+    def _filter(pairs: Pairs, k: int, exclude: set) -> Pairs:
+        if not exclude:
+            return pairs[:k]
+        out = []
+        for sid, sc in pairs:
+            if sid not in exclude:
+                out.append((sid, sc))
+                if len(out) >= k: break
+        return out
+
+    def get_or_compute(self, key: Hashable, k: int, exclude: Iterable[int],
+                       compute: Callable[[int], Pairs]) -> Pairs:
+        exclude = set(exclude or ())
+        if self.maxsize <= 0:
+            return self._filter(compute(k + len(exclude)), k, exclude)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._d.get(key)
+            if entry is not None and entry[0] < now:
+                del self._d[key]
+                entry = None
+            if entry is not None:
+                self._d.move_to_end(key)
+        if entry is not None:
+            _, n, pairs = entry
+            out = self._filter(pairs, k, exclude)
+            # 충분하거나, 저장분이 n보다 적다 = 후보 자체가 그만큼뿐
+            if len(out) >= k or len(pairs) < n:
+                with self._lock:
+                    self.hits += 1
+                return out
+            with self._lock:
+                self.refills += 1
+        else:
+            with self._lock:
+                self.misses += 1
+
+        n = max(self.min_n, k) + len(exclude)
+        pairs = compute(n)
+        with self._lock:
+            self._d[key] = (now + self.ttl, n, pairs)
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+                self.evictions += 1
+        return self._filter(pairs, k, exclude)
+
+    def invalidate(self):
+        with self._lock:
+            self._d.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses + self.refills
+            return {
+                "size": len(self._d), "maxsize": self.maxsize, "ttl_seconds": self.ttl,
+                "hits": self.hits, "misses": self.misses, "refills": self.refills,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
@@ -1,11 +1,19 @@
 from typing import List, Tuple, Optional
+import numpy as np
 import torch
+from app.idmap import IdMap
 from app.models.embedding_dae import EmbeddingDAE
 
+ITEM_DTYPES = {"float32": torch.float32, "float16": torch.float16, "bfloat16": torch.bfloat16}
+
 class DAERecommender:
     def __init__(self, ckpt_path: str, num_songs: int, device: Optional[str] = None,
-                 dim: int = 128, depth: int = 2, dropout: float = 0.1):
+                 dim: int = 128, depth: int = 2, dropout: float = 0.1,
+                 item_dtype: str = "float32", block_rows: int = 65536,
+                 idmap: Optional[IdMap] = None):
         self.num_songs = num_songs
+        # song_id ↔ DAE 인덱스. 없으면 "DAE 인덱스 = song_id" (학습 데이터 기준)
+        self.idmap = idmap or IdMap.identity(num_songs)
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.model = EmbeddingDAE(num_songs=num_songs, dim=dim, depth=depth, dropout=dropout).to(self.device)
 
@@ -17,105 +25,92 @@ class DAERecommender:
         else:
             self.model = state.to(self.device)
         self.model.eval()
-
-        self.all_ids = torch.arange(num_songs, device=self.device, dtype=torch.long)
-
-    @torch.inference_mode()
-    def scores(self, seed_song_ids: List[int], topk: int) -> List[Tuple[int, float]]:
-        # id를 그대로 사용하되, 범위 밖은 필터
-        seed = [s for s in seed_song_ids if 0 <= s < self.num_songs]
-        remain = torch.tensor(seed, device=self.device, dtype=torch.long) if seed else torch.tensor([], device=self.device, dtype=torch.long)
-
-        p = self.model.encode_playlist([remain])  # [1, dim]
-        scores = self.model.emb(self.all_ids) @ p[0]  # [N]
-        if len(seed) > 0:
-            scores[remain] = -1e9
-
-        vals, idxs = torch.topk(scores, k=min(topk, self.num_songs))
-        return [(int(i), float(v)) for i, v in zip(idxs.tolist(), vals.tolist())]
-
-'''
-# app/rec/dae.py
-from typing import List, Tuple, Optional
-import torch
-from app.models.embedding_dae import EmbeddingDAE
-
-class DAERecommender:
-    """
-    EmbeddingDAE(encode_playlist + weight tying)를
-    우리 백엔드 인터페이스(scores)로 감싼 어댑터.
-    """
-    def __init__(
-        self,
-        ckpt_path: str,
-        num_songs: int,
-        songid_to_daeidx: Optional[dict[int, int]] = None,
-        daeidx_to_songid: Optional[list[Optional[int]]] = None,
-        device: Optional[str] = None,
-        dim: int = 128,       # 모델 저장 때 썼던 dim과 일치해야 함
-        depth: int = 2,
-        dropout: float = 0.1,
-    ):
-        self.num_songs = num_songs
-        self.sid2did = songid_to_daeidx
-        self.did2sid = daeidx_to_songid
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-
-        # 1) 모델 구성 & 로드
-        self.model = EmbeddingDAE(num_songs=num_songs, dim=dim, depth=depth, dropout=dropout).to(self.device)
-        state = torch.load(ckpt_path, map_location=self.device)
-        if isinstance(state, dict) and all(isinstance(k, str) for k in state):
-            self.model.load_state_dict(state)
-        elif isinstance(state, dict) and "state_dict" in state:
-            self.model.load_state_dict(state["state_dict"])
+        self.model.requires_grad_(False)
+
+        self.block_rows = block_rows
+        self._build_item_matrix(item_dtype)
+
+    def _build_item_matrix(self, item_dtype: str):
+        """
+        점수 계산용 읽기 전용 아이템 행렬 (요청마다 emb(all_ids)로 [N, dim]을 새로 만들지 않음).
+        - float32: emb.weight 자체를 공유 (복사 없음)
+        - float16 / bfloat16: 절반 크기 사본
+        - int8: 행 단위 scale(max|w|/127)로 대칭 양자화
+        """
+        W = self.model.emb.weight.detach()
+        self.item_scales = None
+        if item_dtype == "float32":
+            self.items = W
+        elif item_dtype in ITEM_DTYPES:
+            self.items = W.to(ITEM_DTYPES[item_dtype]).contiguous()
+        elif item_dtype == "int8":
+            scales = W.abs().amax(dim=1).clamp_min(1e-12) / 127.0
+            self.items = torch.round(W / scales[:, None]).clamp_(-127, 127).to(torch.int8).contiguous()
+            self.item_scales = scales.contiguous()
         else:
-            # torch.save(model)로 통째 저장했다면
-            self.model = state.to(self.device)
-        self.model.eval()
-
-        # 2) 전체 후보 인덱스 텐서
-        self.all_dae_ids = torch.arange(num_songs, device=self.device, dtype=torch.long)
-
-    def _to_dae_indices(self, seed_song_ids: List[int]) -> List[int]:
-        if self.sid2did:
-            return [self.sid2did[s] for s in seed_song_ids if s in self.sid2did]
-        # 매핑이 없으면 “DAE 인덱스 = song_id”라고 가정(데모 폴백)
-        return [s for s in seed_song_ids if 0 <= s < self.num_songs]
-
-    def _to_song_ids(self, dae_indices: List[int]) -> List[int]:
-        if self.did2sid:
-            out = []
-            for i in dae_indices:
-                sid = self.did2sid[i] if 0 <= i < len(self.did2sid) else None
-                if sid is not None:
-                    out.append(int(sid))
-            return out
-        # 매핑이 없으면 동일 숫자로 반환
-        return [int(i) for i in dae_indices]
+            raise ValueError(f"unknown item_dtype: {item_dtype}")
+        self.item_dtype = item_dtype
+
+    def _score_batch(self, P: torch.Tensor) -> torch.Tensor:
+        # P: [B, dim] → scores: [B, N]
+        if self.items.dtype == torch.float32:
+            return P @ self.items.T  # (B,d)x(d,N) 1회
+        # 저정밀 행렬은 블록 단위로만 float32로 올려 계산 (임시 버퍼 = block_rows x dim)
+        out = torch.empty((P.shape[0], self.num_songs), device=self.device, dtype=torch.float32)
+        for start in range(0, self.num_songs, self.block_rows):
+            end = min(start + self.block_rows, self.num_songs)
+            out[:, start:end] = P @ self.items[start:end].float().T
+        if self.item_scales is not None:
+            out.mul_(self.item_scales)
+        return out
+
+    def _to_dae_indices(self, seed_song_ids: List[int]) -> np.ndarray:
+        # 매핑에 없는(범위 밖) id는 제외
+        return self.idmap.present_rows(seed_song_ids)
+
+    def _to_song_ids(self, dae_indices: np.ndarray) -> np.ndarray:
+        return self.idmap.rows_to_ids(dae_indices)
 
     @torch.inference_mode()
     def scores(self, seed_song_ids: List[int], topk: int) -> List[Tuple[int, float]]:
-        # 1) seed 변환(song_id -> dae_idx)
-        seed_dae = self._to_dae_indices(seed_song_ids)
+        return self.scores_batch([seed_song_ids], topk)[0]
 
-        # 2) 플레이리스트 임베딩
-        # EmbeddingDAE.encode_playlist는 []도 처리(0벡터→enc→norm)하도록 이미 방어되어 있음
-        remain = torch.tensor(seed_dae, device=self.device, dtype=torch.long) if seed_dae else torch.tensor([], device=self.device, dtype=torch.long)
-        p = self.model.encode_playlist([remain])  # [1, dim]
-
-        # 3) 모든 후보 점수 = emb(cand) · p
-        all_emb = self.model.emb(self.all_dae_ids)       # [N, dim]
-        scores = all_emb @ p[0]                          # [N]
+    @torch.inference_mode()
+    def score_matrix(self, seeds: List[np.ndarray]) -> torch.Tensor:
+        # seeds: DAE 인덱스 배열들 → [B, N] 전체 점수 (DAE 인덱스 순서)
+        remain = [torch.from_numpy(seed.astype(np.int64)).to(self.device) for seed in seeds]
+        P = self.model.encode_playlist(remain)  # [B, dim]
+        return self._score_batch(P)             # [B, N]
 
-        # 4) 씨드 제외
-        if len(seed_dae) > 0:
-            scores[remain] = -1e9
+    @torch.inference_mode()
+    def score_matrix_from_means(self, M: np.ndarray) -> torch.Tensor:
+        # M: [B, dim] 곡 임베딩 평균 (app/taste.py 증분 벡터) → [B, N]
+        P = self.model.encode_mean(torch.from_numpy(np.asarray(M, dtype=np.float32)).to(self.device))
+        return self._score_batch(P)
 
-        # 5) Top-K
-        k = min(topk, self.num_songs)
-        vals, idxs = torch.topk(scores, k=k)
-        dae_ids = idxs.tolist()
-        song_ids = self._to_song_ids(dae_ids)
-        return list(zip(song_ids, [float(v) for v in vals.tolist()]))
+    @torch.inference_mode()
+    def scores_from_mean(self, mean: np.ndarray, topk: int,
+                         exclude_ids: Optional[set] = None) -> List[Tuple[int, float]]:
+        S = self.score_matrix_from_means(np.asarray(mean).reshape(1, -1))[0]
+        ex = self.idmap.present_rows(exclude_ids or ())
+        vals, idxs = torch.topk(S, k=min(topk + ex.size, self.num_songs))
+        vals, idxs = vals.cpu().numpy(), idxs.cpu().numpy()
+        keep = ~np.isin(idxs, ex)
+        sids = self._to_song_ids(idxs[keep][:topk])
+        return list(zip(sids.tolist(), vals[keep][:topk].astype(float).tolist()))
 
-        '''
\ No newline at end of file
+    @torch.inference_mode()
+    def scores_batch(self, seed_lists: List[List[int]], topk: int) -> List[List[Tuple[int, float]]]:
+        seeds = [self._to_dae_indices(seed) for seed in seed_lists]
+        S = self.score_matrix(seeds)
+
+        # 씨드는 점수 벡터에 쓰지 않고, 여유분(k + |seed|)을 뽑은 뒤 후처리로 제외
+        k = min(topk + max(len(seed) for seed in seeds), self.num_songs)
+        vals, idxs = torch.topk(S, k=k, dim=1)
+        vals, idxs = vals.cpu().numpy(), idxs.cpu().numpy()
+        results = []
+        for seed, row_i, row_v in zip(seeds, idxs, vals):
+            keep = ~np.isin(row_i, seed)
+            sids = self._to_song_ids(row_i[keep][:topk])
+            results.append(list(zip(sids.tolist(), row_v[keep][:topk].astype(float).tolist())))
+        return results
@@ -0,0 +1,106 @@
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from app.idmap import ids_array
+from app.rec.sgns import SGNSRecommender
+from app.rec.dae import DAERecommender
+
+NORMS = ("z", "rank")
+
+
+def _normalize(x: np.ndarray, norm: str) -> np.ndarray:
+    """후보 합집합 위에서 점수 정규화. NaN(해당 모델에 없는 곡)은 최저값으로 채움."""
+    ok = ~np.isnan(x)
+    out = np.zeros_like(x)
+    if not ok.any():
+        return out
+    v = x[ok]
+    if norm == "rank":
+        # 1.0(최상) ~ 0에 가까운 값(최하), 동점은 같은 순위로 보지 않음
+        order = np.argsort(-v, kind="stable")
+        r = np.empty(v.shape[0], dtype=np.float32)
+        r[order] = np.arange(v.shape[0], dtype=np.float32)
+        out[ok] = 1.0 - r / v.shape[0]
+    else:
+        std = v.std()
+        out[ok] = (v - v.mean()) / (std if std > 1e-12 else 1.0)
+    out[~ok] = out[ok].min()
+    return out
+
+
+class HybridRecommender:
+    """
+    SGNS + DAE 점수 융합.
+    - 공통 공간 = song_id. 각 모델 상위 pool개 후보의 합집합에 대해 두 모델 점수를 모두 구함
+      (SGNS: E[rows] @ q 내적, DAE: 전체 점수 벡터 1회 계산 후 gather)
+    - 모델별 z-score 또는 rank 정규화 후 alpha*SGNS + (1-alpha)*DAE 로 한 번에 합산
+    """
+
+    def __init__(self, sgns: SGNSRecommender, dae: DAERecommender, pool: int = 200):
+        self.sgns = sgns
+        self.dae = dae
+        self.pool = pool
+
+    def _dae_scores(self, seed: List[int], dae_mean: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if dae_mean is not None:
+            return self.dae.score_matrix_from_means(dae_mean.reshape(1, -1))[0].float().cpu().numpy()
+        rows = self.dae._to_dae_indices(seed)
+        if not rows.size:
+            return None
+        return self.dae.score_matrix([rows])[0].float().cpu().numpy()
+
+    def recommend(self, seed: List[int], k: int, alpha: float = 0.6,
+                  exclude: Iterable[int] = (), qvec: Optional[np.ndarray] = None,
+                  dae_mean: Optional[np.ndarray] = None, norm: str = "z", nprobe: Optional[int] = None,
+                  ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        seed: 씨드 곡(결과에서 제외), qvec: SGNS 질의 (없으면 씨드 평균)
+        dae_mean: DAE 입력 임베딩 평균 (없으면 씨드로 계산)
+        alpha: SGNS 가중치 (1.0 = SGNS만, 0.0 = DAE만)
+        """
+        if norm not in NORMS:
+            raise ValueError(f"unknown norm: {norm}")
+        ex = set(exclude) | set(seed)
+        ex_arr = ids_array(ex)
+        pool = max(self.pool, k)
+
+        if qvec is None:
+            qvec = self.sgns._mean_vec(seed)
+        q = qvec.reshape(-1).astype(np.float32) if (qvec is not None and alpha > 0) else None
+        S_d = self._dae_scores(seed, dae_mean) if alpha < 1 else None
+        if q is None and S_d is None:
+            return []
+
+        # ---- 후보 합집합 (song_id) ----
+        cands = []
+        if q is not None:
+            cands.append(np.asarray([sid for sid, _ in self.sgns.similar_from_vector(
+                q[None, :], pool, ex, nprobe=nprobe, ef_search=ef_search)], dtype=np.int64))
+        if S_d is not None:
+            s = S_d.copy()
+            s[self.dae.idmap.present_rows(ex_arr)] = -np.inf
+            top = np.argpartition(-s, min(pool, s.shape[0] - 1))[:pool]
+            top = top[np.isfinite(s[top])]
+            cands.append(self.dae._to_song_ids(top))
+        union = np.unique(np.concatenate(cands))
+        if not union.size:
+            return []
+
+        # ---- 합집합 전체에 대해 두 모델 점수 ----
+        blend = np.zeros(union.shape[0], dtype=np.float32)
+        if q is not None:
+            rows = self.sgns.idmap.ids_to_rows(union)
+            s_s = np.full(union.shape[0], np.nan, dtype=np.float32)
+            ok = rows >= 0
+            s_s[ok] = self.sgns.E[rows[ok]] @ q
+            blend += (alpha if S_d is not None else 1.0) * _normalize(s_s, norm)
+        if S_d is not None:
+            rows = self.dae.idmap.ids_to_rows(union)
+            s_d = np.full(union.shape[0], np.nan, dtype=np.float32)
+            ok = rows >= 0
+            s_d[ok] = S_d[rows[ok]]
+            blend += ((1.0 - alpha) if q is not None else 1.0) * _normalize(s_d, norm)
+
+        k = min(k, union.shape[0])
+        top = np.argpartition(-blend, k - 1)[:k]
+        top = top[np.argsort(-blend[top], kind="stable")]
+        return list(zip(union[top].tolist(), blend[top].astype(float).tolist()))
@@ -1,61 +1,54 @@
 import numpy as np
-from typing import List, Tuple
-try:
-    import faiss
-    FAISS_OK = True
-except Exception:
-    FAISS_OK = False
+from typing import List, Tuple, Optional
+from app.idmap import IdMap, ids_array
+from app.rec.ann import NumpyIndex, search_params
 
 class SGNSRecommender:
-    def __init__(self, embeddings: np.ndarray, idx2id: List[int], id2idx: dict):
+    def __init__(self, embeddings: np.ndarray, idmap: IdMap, index=None):
         self.E = embeddings  # (N,d) L2-normalized
-        self.idx2id = idx2id
-        self.id2idx = id2idx
-        d = self.E.shape[1]
-        self.index = None
-        if FAISS_OK:
-            self.index = faiss.IndexFlatIP(d)
-            self.index.add(self.E)
+        self.idmap = idmap   # song_id ↔ E 행 (Song2Tags 등과 공유)
+        # index: app.rec.ann.open_index 로 고른 faiss 인덱스(flat/ivf/hnsw) 또는 NumpyIndex
+        if index is None:
+            index = NumpyIndex(self.E)
+        self.index = index
 
     def _mean_vec(self, seed: List[int]):
-        idxs = [self.id2idx[s] for s in seed if s in self.id2idx]
-        if not idxs: return None
+        idxs = self.idmap.present_rows(seed)
+        if not idxs.size: return None
         v = self.E[idxs].mean(axis=0, keepdims=True)
         v /= (np.linalg.norm(v, axis=1, keepdims=True) + 1e-12)
         return v.astype(np.float32)
 
-    def similar(self, seed: List[int], topk: int):
+    def _search(self, q, k: int, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        # q: (B,d) → sims, idxs: (B,k)
+        params = search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+        q = np.ascontiguousarray(q, dtype=np.float32)
+        if params is not None:
+            return self.index.search(q, k, params=params)
+        return self.index.search(q, k)
+
+    def _collect(self, idxs, sims, topk: int, exclude_ids: set[int] | None):
+        valid = idxs >= 0  # 근사 인덱스는 결과가 모자라면 -1로 채움
+        idxs, sims = idxs[valid], sims[valid]
+        sids = self.idmap.rows_to_ids(idxs)
+        if exclude_ids:
+            keep = ~np.isin(sids, ids_array(exclude_ids))
+            sids, sims = sids[keep], sims[keep]
+        return list(zip(sids[:topk].tolist(), sims[:topk].astype(float).tolist()))
+
+    def similar(self, seed: List[int], topk: int,
+                nprobe: Optional[int] = None, ef_search: Optional[int] = None):
         q = self._mean_vec(seed)
         if q is None: return []
-        if self.index is not None:
-            sims, idxs = self.index.search(q, topk + len(seed))
-            sims, idxs = sims[0], idxs[0]
-        else:
-            sims = (self.E @ q[0])
-            idxs = np.argsort(-sims)[: topk + len(seed)]
-            sims = sims[idxs]
-        seed_set = set(seed)
-        out = []
-        for i, s in zip(idxs, sims):
-            sid = self.idx2id[i]
-            if sid not in seed_set:
-                out.append((sid, float(s)))
-            if len(out) >= topk: break
-        return out
+        return self.similar_from_vector(q, topk, set(seed), nprobe=nprobe, ef_search=ef_search)
     
-    def similar_from_vector(self, qvec, topk: int, exclude_ids: set[int] | None = None):
-        if self.index is not None:
-            sims, idxs = self.index.search(qvec.astype(np.float32), topk + (len(exclude_ids) if exclude_ids else 0))
-            sims, idxs = sims[0], idxs[0]
-        else:
-            sims = (self.E @ qvec[0])
-            idxs = np.argsort(-sims)[: topk + (len(exclude_ids) if exclude_ids else 0)]
-            sims = sims[idxs]
-        out = []
-        for i, s in zip(idxs, sims):
-            sid = self.idx2id[i]
-            if exclude_ids and sid in exclude_ids:
-                continue
-            out.append((sid, float(s)))
-            if len(out) == topk: break
-        return out
+    def similar_from_vector(self, qvec, topk: int, exclude_ids: set[int] | None = None,
+                            nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        return self.similar_from_vectors(qvec, topk, [exclude_ids], nprobe=nprobe, ef_search=ef_search)[0]
+
+    def similar_from_vectors(self, qmat, topk: int, exclude_list: List[set[int] | None],
+                             nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """(B,d) 질의를 index.search 1회로 처리. exclude_list[b]는 b번째 질의의 제외 id."""
+        extra = max((len(ex) for ex in exclude_list if ex), default=0)
+        sims, idxs = self._search(qmat, topk + extra, nprobe, ef_search)
+        return [self._collect(idxs[b], sims[b], topk, exclude_list[b]) for b in range(len(exclude_list))]
@@ -1,18 +1,88 @@
+import json
+import logging
+import os
 import numpy as np
-from typing import List
+from typing import List, Optional, Tuple
+from app.idmap import IdMap
+from app.loaders import fingerprint
+
+log = logging.getLogger(__name__)
+
+# app/tools/build_song_tags.py 출력 (곡 행 순서 = SGNS 임베딩 행 순서)
+SONG_TAGS_IDX_NPY = "song_tags_idx.npy"  # (N,K) int32, 유사도 내림차순 태그 인덱스 (-1 = 없음)
+SONG_TAGS_SIM_NPY = "song_tags_sim.npy"  # (N,K) float16
+SONG_TAGS_KEY_JSON = "song_tags_key.json"  # 표를 만든 곡/태그 임베딩 지문 (song_tags_key)
+
+
+def song_tags_key(song_E: np.ndarray, song_ids, tag_E: np.ndarray, tag_words: List[str]) -> dict:
+    # 곡 id 배열(행 순서)·태그 목록(인덱스 순서)·임베딩이 같아야 표를 그대로 쓸 수 있음
+    return {"num_songs": int(song_E.shape[0]), "num_tags": int(tag_E.shape[0]),
+            "songs": fingerprint(song_E, np.asarray(song_ids, dtype=np.int64)),
+            "tags": fingerprint(tag_E, np.frombuffer("\n".join(tag_words).encode("utf-8"), dtype=np.uint8))}
+
+
+def load_song_tags_table(data_dir: str, key: dict) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """표와 함께 저장된 key가 현재 모델과 다르면 None (Song2Tags는 실시간 계산)."""
+    idx_path = os.path.join(data_dir, SONG_TAGS_IDX_NPY)
+    sim_path = os.path.join(data_dir, SONG_TAGS_SIM_NPY)
+    key_path = os.path.join(data_dir, SONG_TAGS_KEY_JSON)
+    if not (os.path.exists(idx_path) and os.path.exists(sim_path)):
+        return None
+    saved = None
+    if os.path.exists(key_path):
+        with open(key_path, encoding="utf-8") as f:
+            saved = json.load(f)
+    if saved != key:
+        log.warning("%s does not match the loaded embeddings, computing song tags live "
+                    "(rerun app.tools.build_song_tags)", idx_path)
+        return None
+    return np.load(idx_path, mmap_mode="r"), np.load(sim_path, mmap_mode="r")
+
+
+def topk_tags_blocked(song_E: np.ndarray, tag_E: np.ndarray, k: int, block: int = 8192):
+    """(곡 block x 태그) 행렬곱 단위로 곡별 상위 k 태그 계산. 반환: (idx int32, sim float16)"""
+    n, t = song_E.shape[0], tag_E.shape[0]
+    k = min(k, t)
+    out_idx = np.empty((n, k), dtype=np.int32)
+    out_sim = np.empty((n, k), dtype=np.float16)
+    tagT = np.ascontiguousarray(tag_E, dtype=np.float32).T
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        sims = np.asarray(song_E[start:end], dtype=np.float32) @ tagT  # (b, T)
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        psim = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-psim, axis=1, kind="stable")
+        out_idx[start:end] = np.take_along_axis(part, order, axis=1)
+        out_sim[start:end] = np.take_along_axis(psim, order, axis=1)
+    return out_idx, out_sim
+
 
 class Song2Tags:
     """
     곡 임베딩 → 태그 임베딩 유사도 기반 근접 태그 조회 유틸.
     - songE, tagE는 L2 정규화 되어 있다고 가정.
+    - table(idx, sim)이 있으면 미리 계산한 곡별 상위 K 태그로 O(K) 응답,
+      표에 없는 곡(행 범위 밖 / -1)이나 candidate_k > K 요청은 실시간 계산.
     """
 
-    def __init__(self, song_E: np.ndarray, song_idx2id: list, tag_E: np.ndarray, tag_idx2word: list):
+    def __init__(self, song_E: np.ndarray, song_idmap: IdMap, tag_E: np.ndarray, tag_idx2word: list,
+                 table: Optional[Tuple[np.ndarray, np.ndarray]] = None):
         self.songE = song_E
-        self.song_idx2id = song_idx2id
+        self.song_idmap = song_idmap  # SGNSRecommender와 같은 인스턴스
         self.tagE = tag_E
         self.tag_idx2word = tag_idx2word
-        self.song_id2idx = {sid: i for i, sid in enumerate(song_idx2id)}
+        self.table_idx, self.table_sim = table if table is not None else (None, None)
+
+    def _candidates(self, idx: int, k: int) -> np.ndarray:
+        # 유사도 내림차순 상위 k 태그 인덱스
+        t = self.table_idx
+        if t is not None and idx < t.shape[0] and k <= t.shape[1] and t[idx, k - 1] >= 0:
+            return np.asarray(t[idx, :k])
+        svec = self.songE[idx]  # (d,)
+        sims = self.tagE @ svec  # (num_tags,)
+        # np.argpartition은 k번째까지 보장하므로 마지막에 정렬 한 번 더
+        cand_idx = np.argpartition(-sims, k - 1)[:k]
+        return cand_idx[np.argsort(-sims[cand_idx])]
 
     def nearest_tags(
         self,
@@ -38,32 +108,26 @@ class Song2Tags:
         Returns:
             List[str]: 태그 문자열 리스트
         """
-        if song_id not in self.song_id2idx:
+        idx = self.song_idmap.row(song_id)
+        if idx < 0:
             return []
         if self.tagE.size == 0:
             return []
 
-        idx = self.song_id2idx[song_id]
-        svec = self.songE[idx]  # (d,)
-        sims = self.tagE @ svec  # (num_tags,)
-
-        # 1) 상위 candidate_k 후보 인덱스
-        k = min(candidate_k, sims.shape[0])
-        # np.argpartition은 k번째까지 보장하므로 마지막에 정렬 한 번 더
-        cand_idx = np.argpartition(-sims, k - 1)[:k]
-        cand_idx = cand_idx[np.argsort(-sims[cand_idx])]
+        # 1) 상위 candidate_k 후보 인덱스 (유사도 내림차순)
+        k = min(candidate_k, self.tagE.shape[0])
+        cand_idx = self._candidates(idx, k)
 
         # 2) 후보 중에서 topn개 무작위 샘플링(중복 없음)
         m = min(topn, cand_idx.shape[0])
         rng = np.random.default_rng(seed)
         if m < cand_idx.shape[0]:
             sel_positions = rng.choice(cand_idx.shape[0], size=m, replace=False)
-            sel_idx = cand_idx[sel_positions]
         else:
-            sel_idx = cand_idx
+            sel_positions = np.arange(cand_idx.shape[0])
 
-        # 3) 유사도 순 정렬 옵션
-        if keep_similarity_order and sel_idx.size > 1:
-            sel_idx = sel_idx[np.argsort(-sims[sel_idx])]
+        # 3) 유사도 순 정렬 옵션 (후보가 이미 내림차순이므로 위치 순 정렬과 같음)
+        if keep_similarity_order and sel_positions.size > 1:
+            sel_positions = np.sort(sel_positions)
 
-        return [self.tag_idx2word[i] for i in sel_idx]
+        return [self.tag_idx2word[i] for i in cand_idx[sel_positions]]
@@ -0,0 +1,290 @@
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+from app.idmap import IdMap
+from app.loaders import (
+    fingerprint, has_embedding_store, load_sgns_store, load_tag_store, load_sgns_embeddings,
+    load_song_meta_by_id, load_tag_embeddings, load_word_to_idx, load_song_popularity,
+)
+from app.meta_store import META_STORE_DIR, SongMetaStore
+from app.rec.ann import open_index
+from app.rec.batching import make_sgns_batcher, make_dae_batcher
+from app.rec.bulk import BulkRecommender
+from app.rec.dae import DAERecommender
+from app.rec.hybrid import HybridRecommender
+from app.rec.sgns import SGNSRecommender
+from app.rec.song2tags import Song2Tags, load_song_tags_table, song_tags_key
+from app.song_search import SongSearchIndex
+from app.tag_index import TagIndex
+from app.taste import TasteVectors
+
+log = logging.getLogger(__name__)
+
+DAE_NUM_SONGS = 707_989
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+class ModelBundle:
+    """
+    한 버전의 모델 일체 (SGNS 임베딩·ANN 인덱스, 태그 임베딩, DAE, 메타, 검색 색인, 취향 벡터).
+    요청은 시작할 때 잡은 번들로 끝까지 처리 → 교체 중에도 한 요청 안에서 버전이 섞이지 않음.
+    """
+
+    def __init__(self, version: str, data_dir: str):
+        self.version, self.data_dir = version, data_dir
+        self.loaded_at = time.time()
+        self.load_seconds = 0.0
+        self.refs = 0          # 이 번들을 쓰는 진행 중 요청 수 (ModelRegistry 잠금 안에서만 변경)
+        self.retired = False   # 교체됨 → refs가 0이 되면 close()
+        self.closed = False
+        self.sgns_batcher = self.dae_batcher = None
+
+    def normalize_tag(self, t: str) -> str:
+        return self.tag_index.resolve(t) or t.strip()
+
+    def close(self):
+        # 배치 스레드 종료 후 큰 배열/모델 참조를 끊어 메모리 반환 (mmap은 마지막 참조가 사라질 때 해제)
+        for b in (self.sgns_batcher, self.dae_batcher):
+            if b is not None:
+                b.close()
+        keep = {"version", "data_dir", "loaded_at", "load_seconds", "refs", "retired"}
+        for k in [k for k in self.__dict__ if k not in keep]:
+            del self.__dict__[k]
+        self.closed = True
+        gc.collect()
+
+    def info(self) -> dict:
+        out = {"version": self.version, "data_dir": self.data_dir, "loaded_at": self.loaded_at,
+               "load_seconds": round(self.load_seconds, 3), "in_flight": self.refs}
+        if not self.closed:
+            out.update(num_songs=int(len(self.ids)), dim=int(self.E.shape[1]), num_tags=len(self.tag_words),
+                       dae_item_dtype=self.dae.item_dtype)
+        return out
+
+
+def load_bundle(data_dir: str, version: str, sgns_index: str = "flat", dae_item_dtype: str = "float32",
+                hybrid_pool: int = 200, bulk_sgns_chunk: int = 1024, bulk_dae_chunk: int = 32,
+                batching: bool = False, batch_max_size: int = 32, batch_max_wait_ms: float = 2.0,
+                serving: bool = True) -> ModelBundle:
+    """
+    data_dir 한 곳에서 모델 일체를 읽어 번들 구성.
+    serving=False면 오프라인 잡용 (메타/검색 색인/취향 벡터/배처 생략).
+    """
+    t0 = time.perf_counter()
+    m = ModelBundle(version, data_dir)
+    if not os.path.isdir(data_dir):
+        raise ModelLoadError(f"no such model directory: {data_dir}")
+
+    if has_embedding_store(data_dir):
+        # app/tools/build_store.py 로 변환된 mmap 스토어 (정규화 완료)
+        m.E, m.ids = load_sgns_store(data_dir)
+        m.tag_mat, m.tag_words = load_tag_store(data_dir)
+        m.tag_emb = {w: m.tag_mat[i] for i, w in enumerate(m.tag_words)}
+    else:
+        m.E, m.ids = load_sgns_embeddings(os.path.join(data_dir, "song_embeddings.pkl"))
+        m.tag_emb = load_tag_embeddings(os.path.join(data_dir, "tag_embeddings.pkl"))
+        m.tag_words = list(m.tag_emb.keys())
+        m.tag_mat = np.stack([m.tag_emb[w] for w in m.tag_words], axis=0).astype(np.float32)
+        m.tag_mat /= (np.linalg.norm(m.tag_mat, axis=1, keepdims=True) + 1e-12)
+    m.song_idmap = IdMap(m.ids)  # song_id ↔ E 행 (SGNS / Song2Tags / 취향 벡터 공유)
+
+    # DAE는 학습 당시 인덱스(기본: song_id 그대로)를 쓰므로 별도 매핑
+    dae_ids = os.path.join(data_dir, "dae_song_ids.npy")
+    m.dae_idmap = IdMap(np.load(dae_ids)) if os.path.exists(dae_ids) else IdMap.identity(DAE_NUM_SONGS)
+
+    m.sgns = SGNSRecommender(m.E, m.song_idmap, index=open_index(m.E, m.ids, data_dir, sgns_index))
+    m.dae = DAERecommender(ckpt_path=os.path.join(data_dir, "dae_model.pth"), num_songs=DAE_NUM_SONGS,
+                           item_dtype=dae_item_dtype, idmap=m.dae_idmap)
+    m.hybrid = HybridRecommender(m.sgns, m.dae, pool=hybrid_pool)
+
+    if serving:
+        if SongMetaStore.exists(os.path.join(data_dir, META_STORE_DIR)):
+            # app/tools/build_meta_store.py 로 변환된 컬럼형 메타 (mmap)
+            m.meta = SongMetaStore.load(os.path.join(data_dir, META_STORE_DIR))
+        else:
+            m.meta = SongMetaStore.from_records(load_song_meta_by_id(os.path.join(data_dir, "song_meta.json")),
+                                                ids_first=m.ids)
+        m.word2idx = load_word_to_idx(os.path.join(data_dir, "word_to_idx.json"))
+        m.song_search = SongSearchIndex.build(
+            m.meta.iter_search_docs(),
+            popularity=load_song_popularity(os.path.join(data_dir, "song_popularity.json")))
+        m.tag_index = TagIndex(m.tag_words, m.word2idx)  # 자동완성 / 태그 정규화
+        m.bulk = BulkRecommender(m.sgns, m.dae, lambda t: m.tag_emb.get(m.normalize_tag(t)),
+                                 sgns_chunk=bulk_sgns_chunk, dae_chunk=bulk_dae_chunk)
+        dae_W = m.dae.model.emb.weight.detach().cpu().numpy()
+        # 저장된 취향 합은 임베딩 지문으로 구분 (다른 모델로 만든 행은 읽을 때 무시, 쓸 때 재구성)
+        m.taste = TasteVectors(m.E, m.song_idmap, dae_W, m.dae_idmap,
+                               version=f"{version}:{fingerprint(m.E, m.ids, dae_W, m.dae_idmap.ids)}")
+        m.s2t = Song2Tags(m.E, m.song_idmap, m.tag_mat, m.tag_words,  # 표: app/tools/build_song_tags.py
+                          table=load_song_tags_table(data_dir, song_tags_key(m.E, m.ids, m.tag_mat, m.tag_words)))
+        if batching:
+            # 동시 요청을 모아 faiss 배치 검색 / (B,d)x(d,N) 1회로 처리
+            m.sgns_batcher = make_sgns_batcher(m.sgns, batch_max_size, batch_max_wait_ms)
+            m.dae_batcher = make_dae_batcher(m.dae, batch_max_size, batch_max_wait_ms)
+    else:
+        m.bulk = BulkRecommender(m.sgns, m.dae, lambda t: None,
+                                 sgns_chunk=bulk_sgns_chunk, dae_chunk=bulk_dae_chunk)
+    m.load_seconds = time.perf_counter() - t0
+    return m
+
+
+def smoke_test(m: ModelBundle, n_seeds: int = 3, k: int = 10):
+    """교체 전 검증: 차원 일치, 대표 질의(SGNS/DAE/태그)가 유한한 점수로 결과를 내는지. 실패 시 ModelLoadError."""
+    if len(m.ids) == 0:
+        raise ModelLoadError("empty song embeddings")
+    if m.tag_mat.shape[1] != m.E.shape[1]:
+        raise ModelLoadError(f"tag dim {m.tag_mat.shape[1]} != song dim {m.E.shape[1]}")
+    seed = [int(s) for s in m.ids[:n_seeds]]
+    checks = {
+        "sgns": m.sgns.similar(seed, k),
+        "dae": m.dae.scores(seed, k),
+        "hybrid": m.hybrid.recommend(seed, k),
+    }
+    if m.tag_words:
+        q = np.asarray(m.tag_emb[m.tag_words[0]], dtype=np.float32)[None, :]
+        checks["tags"] = m.sgns.similar_from_vector(q, k)
+    for name, pairs in checks.items():
+        if not pairs:
+            raise ModelLoadError(f"smoke query returned nothing: {name}")
+        if not np.all(np.isfinite([sc for _, sc in pairs])):
+            raise ModelLoadError(f"non-finite scores: {name}")
+
+
+class ModelRegistry:
+    """
+    활성 번들 참조 + 백그라운드 로드/검증/교체.
+    - use(): 요청 시작 시 활성 번들을 잡고 끝나면 놓음 (참조 수)
+    - reload(): 별도 스레드에서 load → smoke_test → 잠금 안에서 참조 한 번 교체
+    - 교체된 번들은 진행 중 요청이 모두 끝나면(draining) close()로 메모리 반환
+    - on_swap(new, old): 결과 캐시 비우기 등 (예외는 기록만)
+    """
+
+    def __init__(self, loader: Callable[[str, str], ModelBundle],
+                 on_swap: Optional[Callable[[ModelBundle, Optional[ModelBundle]], None]] = None,
+                 history: int = 10):
+        self.loader = loader
+        self.on_swap = on_swap
+        self._lock = threading.Lock()
+        self._active: Optional[ModelBundle] = None
+        self._draining: List[ModelBundle] = []
+        self._loading: Optional[dict] = None
+        self._thread: Optional[threading.Thread] = None
+        self._events: List[dict] = []
+        self._history = history
+        self.swaps = self.failures = 0
+
+    @property
+    def active(self) -> ModelBundle:
+        return self._active
+
+    @contextmanager
+    def use(self) -> Iterator[ModelBundle]:
+        with self._lock:
+            m = self._active
+            m.refs += 1
+        try:
+            yield m
+        finally:
+            self._release(m)
+
+    def _release(self, m: ModelBundle):
+        with self._lock:
+            m.refs -= 1
+            done = m.retired and m.refs == 0 and m in self._draining
+            if done:
+                self._draining.remove(m)
+        if done:
+            self._close(m)
+
+    def _close(self, m: ModelBundle):
+        m.close()
+        self._event("released", m.version)
+
+    def _event(self, kind: str, version: str, detail: str = ""):
+        # 최근 이벤트는 GET /admin/models 로도 조회
+        log.log(logging.WARNING if kind.endswith(("failed", "error")) else logging.INFO,
+                "model %s %s %s", version, kind, detail)
+        with self._lock:
+            self._events.append({"at": time.time(), "event": kind, "version": version, "detail": detail})
+            del self._events[:-self._history]
+
+    def load(self, data_dir: str, version: str, smoke: bool = True) -> ModelBundle:
+        """동기 로드 + 교체 (기동 시)"""
+        m = self.loader(data_dir, version)
+        if smoke:
+            smoke_test(m)
+        self._swap(m)
+        return m
+
+    def _swap(self, m: ModelBundle):
+        with self._lock:
+            old, self._active = self._active, m
+            if old is not None:
+                old.retired = True
+                self._draining.append(old)
+            self.swaps += 1
+        if self.on_swap is not None:
+            try:
+                self.on_swap(m, old)
+            except Exception as e:
+                self._event("swap_hook_error", m.version, str(e))
+        self._event("activated", m.version, f"load {m.load_seconds:.1f}s")
+        if old is not None:
+            # 진행 중 요청이 없으면 바로 해제, 있으면 마지막 요청이 끝날 때 _release에서 해제
+            with self._lock:
+                idle = old.refs == 0 and old in self._draining
+                if idle:
+                    self._draining.remove(old)
+            if idle:
+                self._close(old)
+
+    def reload(self, data_dir: str, version: str) -> bool:
+        """백그라운드 로드 시작. 이미 로드 중이면 False."""
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = {"version": version, "data_dir": data_dir, "started_at": time.time()}
+            self._thread = threading.Thread(target=self._reload, args=(data_dir, version),
+                                            name=f"model-load-{version}", daemon=True)
+            self._thread.start()
+        return True
+
+    def _reload(self, data_dir: str, version: str):
+        m = None
+        try:
+            m = self.loader(data_dir, version)
+            smoke_test(m)
+            self._swap(m)
+        except Exception as e:
+            self.failures += 1
+            self._event("failed", version, f"{type(e).__name__}: {e}")
+            if m is not None:
+                m.close()
+        finally:
+            with self._lock:
+                self._loading = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+        return self._loading is None
+
+    def status(self) -> dict:
+        with self._lock:
+            active, draining = self._active, list(self._draining)
+            loading, events = dict(self._loading) if self._loading else None, list(self._events)
+        return {"active": active.info() if active is not None else None,
+                "loading": loading,
+                "draining": [{"version": d.version, "in_flight": d.refs} for d in draining],
+                "swaps": self.swaps, "failures": self.failures, "events": events}
@@ -1,13 +1,18 @@
-from typing import List, Literal
+from datetime import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 Method = Literal["sgns", "dae", "hybrid"]
+Norm = Literal["z", "rank"]
 
 class RecommendRequest(BaseModel):
     seed_song_ids: List[int] = []
     k: int = 10
     method: Method = "hybrid"
-    alpha: float = 0.6  # hybrid 가중치
+    alpha: float = 0.6  # hybrid 가중치 (SGNS 쪽, DAE는 1-alpha)
+    tags: List[str] = []      # (선택) SGNS 질의에 씨드 곡과 함께 섞을 태그
+    exclude: List[int] = []
+    norm: Norm = "z"          # hybrid 점수 정규화: z-score | rank
 
 class SongOut(BaseModel):
     id: int
@@ -18,3 +23,12 @@ class SongOut(BaseModel):
 
 class RecommendResponse(BaseModel):
     items: List[SongOut]
+
+class PrecomputedRecsOut(BaseModel):
+    playlist_id: Optional[int] = None  # None = 사용자 전체 기준
+    method: Literal["sgns", "dae"]
+    computed_at: datetime
+    items: List[SongOut]
+
+class MyRecommendationsOut(BaseModel):
+    lists: List[PrecomputedRecsOut]
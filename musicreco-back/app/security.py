@@ -1,28 +1,126 @@
 # app/security.py
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import multiprocessing as mp
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from jose import jwt
 from passlib.hash import pbkdf2_sha256   # ✅ bcrypt 대신 PBKDF2-SHA256
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 ALGO = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))      # 새 해시에만 적용 (검증은 해시에 저장된 값)
+PW_WORKERS = int(os.getenv("PW_WORKERS", "2"))                # 해시 전용 프로세스 수
+PW_MAX_PENDING = int(os.getenv("PW_MAX_PENDING", "64"))       # 넘으면 바로 503
+PW_TIMEOUT_S = float(os.getenv("PW_TIMEOUT_S", "10"))
 
-def hash_pw(pw: str) -> str:
-    return pbkdf2_sha256.hash(pw)
+def hash_pw(pw: str, rounds: int = PBKDF2_ROUNDS) -> str:
+    return pbkdf2_sha256.using(rounds=rounds).hash(pw)
 
 def verify_pw(pw: str, pw_hash: str) -> bool:
     return pbkdf2_sha256.verify(pw, pw_hash)
 
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+class PasswordPool:
+    """
+    PBKDF2 해시/검증을 별도 프로세스 풀에서 실행 (요청 처리 프로세스의 GIL/CPU를 잡지 않음).
+    - 대기 + 실행 중 작업이 max_pending 이상이면 PasswordPoolBusy (호출 측에서 503)
+      (시간 초과된 요청의 작업도 워커에서 끝날 때까지 센다)
+    - 호출별 소요 시간(대기 포함) 최근 1024개로 p50/p99
+    - 프로세스는 첫 호출 때 spawn (모델을 올린 서버 프로세스를 fork하지 않음)
+    """
+
+    def __init__(self, workers: int = PW_WORKERS, max_pending: int = PW_MAX_PENDING,
+                 timeout_s: float = PW_TIMEOUT_S):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_s = timeout_s
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.calls = self.rejected = self.timeouts = 0
+        self._ms = {"hash": deque(maxlen=1024), "verify": deque(maxlen=1024)}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"))
+            return self._pool
+
+    def _job_done(self, _fut):
+        # 실행자 future 완료 시점에 감소 (시간 초과로 요청이 먼저 끝나도 워커가 일하는 동안은 pending에 남음)
+        with self._lock:
+            self.pending -= 1
+
+    async def _run(self, kind: str, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self.pending += 1
+        t = time.perf_counter()
+        try:
+            job = self._executor().submit(fn, *args)
+        except BaseException:
+            self._job_done(None)
+            raise
+        job.add_done_callback(self._job_done)
+        try:
+            # 대기열에 있던 작업은 시간 초과 시 취소됨 (실행 중이면 끝날 때까지 자리 차지)
+            return await asyncio.wait_for(asyncio.wrap_future(job), self.timeout_s)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordPoolBusy()
+        finally:
+            with self._lock:
+                self.calls += 1
+                self._ms[kind].append((time.perf_counter() - t) * 1000)
+
+    async def hash(self, pw: str) -> str:
+        return await self._run("hash", hash_pw, pw, PBKDF2_ROUNDS)
+
+    async def verify(self, pw: str, pw_hash: str) -> bool:
+        return await self._run("verify", verify_pw, pw, pw_hash)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {"workers": self.workers, "rounds": PBKDF2_ROUNDS, "pending": self.pending,
+                   "max_pending": self.max_pending, "calls": self.calls,
+                   "rejected": self.rejected, "timeouts": self.timeouts}
+            for kind, ms in self._ms.items():
+                v = sorted(ms)
+                out[f"{kind}_ms"] = ({"p50": v[len(v) // 2], "p99": v[min(len(v) - 1, int(len(v) * 0.99))],
+                                      "max": v[-1]} if v else None)
+            return out
+
 def create_access_token(sub: str, expires_minutes: Optional[int] = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes or ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": sub, "exp": expire}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGO)
 
-def decode_token(token: str) -> Optional[str]:
+def decode_claims(token: str) -> Optional[dict]:
+    # 서명/만료 검증된 payload, 실패 시 None
     try:
-        data = jwt.decode(token, SECRET_KEY, algorithms=[ALGO])
-        return data.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGO])
     except Exception:
         return None
+
+def decode_token(token: str) -> Optional[str]:
+    data = decode_claims(token)
+    return data.get("sub") if data else None
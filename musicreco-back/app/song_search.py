@@ -0,0 +1,250 @@
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w]+")
+# 조합 중인 자모(ㅇ, ㅏ …)로 끝나는 질의 (NFKC 후에는 조합형 자모로 바뀜)
+_JAMO_TAIL = re.compile(r"[\u1100-\u11ff\u3131-\u318e]+$")
+_S_BASE, _S_END = 0xAC00, 0xD7A3
+# 종성 → 초성 (받침이 다음 글자의 초성으로 넘어가는 입력 중간 상태 처리용)
+_JONG_TO_CHO = {
+    0x11A8: 0x1100, 0x11A9: 0x1101, 0x11AB: 0x1102, 0x11AE: 0x1103, 0x11AF: 0x1105,
+    0x11B7: 0x1106, 0x11B8: 0x1107, 0x11BA: 0x1109, 0x11BB: 0x110A, 0x11BC: 0x110B,
+    0x11BD: 0x110C, 0x11BE: 0x110E, 0x11BF: 0x110F, 0x11C0: 0x1110, 0x11C1: 0x1111,
+    0x11C2: 0x1112,
+}
+
+
+def normalize(text: str) -> str:
+    # NFKC(전각/호환 문자 통일) + casefold + 구두점 → 공백
+    t = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(_NON_WORD.sub(" ", t).split())
+
+
+def _jamo(text: str) -> str:
+    # 한글 음절/호환 자모를 조합형 자모로 분해 (입력 중인 '아이ㅇ' → '아이유' 매칭용)
+    return unicodedata.normalize("NFKD", text)
+
+
+def _is_syllable(ch: str) -> bool:
+    return _S_BASE <= ord(ch) <= _S_END
+
+
+class SongSearchIndex:
+    """
+    곡 제목/아티스트 검색용 문자 trigram 역색인.
+    - 문서 = normalize(f"{title} {artists}") (기존 선형 탐색의 hay와 동일 기준)
+    - posting은 CSR(indptr/postings int32)로 보관, 질의 시 짧은 리스트부터 교집합
+    - 한글 입력 중간 상태(끝의 자모, 받침이 다음 글자로 넘어갈 수 있는 마지막 음절)는
+      그 부분을 빼고 후보를 찾은 뒤 자모 단위로 검증 (분해된 문서 문자열은 색인 때 미리 만들어 둠)
+    - 후보가 max_candidates를 넘으면 인기도 상위만 남김 (행 번호 순으로 자르지 않음)
+    - 순위: 제목 일치 > 제목 접두 > 아티스트 접두 > 단어 접두 > 부분 일치, 동순위는 인기도
+      (앞의 세 단계는 정렬된 제목/아티스트 배열에서 bisect로 바로 구함)
+    """
+
+    N = 3
+
+    def __init__(self, ids: np.ndarray, titles: List[str], artists: List[str],
+                 grams: List[str], indptr: np.ndarray, postings: np.ndarray,
+                 popularity: np.ndarray, build_seconds: float = 0.0):
+        self.ids = ids
+        self.titles = titles      # 정규화된 제목
+        self.artists = artists    # 정규화된 "아티스트1 아티스트2"
+        self.grams = grams        # 정렬된 trigram 목록 (접두 검색용)
+        self.indptr = indptr
+        self.postings = postings
+        self.popularity = popularity
+        self.build_seconds = build_seconds
+        # 접두 검색용: 정렬된 제목/아티스트 문자열(기존 str 객체 공유)과 행 번호
+        self._title_rows = np.array(sorted(range(len(titles)), key=titles.__getitem__), dtype=np.int32)
+        self._title_keys = [titles[r] for r in self._title_rows]
+        self._artist_rows = np.array(sorted(range(len(artists)), key=artists.__getitem__), dtype=np.int32)
+        self._artist_keys = [artists[r] for r in self._artist_rows]
+        # 인기도 순위 (0 = 가장 인기, 동점은 행 번호 순): 후보 자르기/정렬용
+        self._by_pop = np.argsort(-popularity, kind="stable").astype(np.int32)
+        self._pop_rank = np.empty_like(self._by_pop)
+        self._pop_rank[self._by_pop] = np.arange(len(self._by_pop), dtype=np.int32)
+        # 자모 분해된 문서 (분해해도 그대로인 문서는 None → 원문 사용)
+        self._jamo_hays: List[Optional[str]] = []
+        for t, a in zip(titles, artists):
+            hay = f"{t} {a}"
+            self._jamo_hays.append(None if unicodedata.is_normalized("NFKD", hay) else _jamo(hay))
+
+    # ---------- build ----------
+    @classmethod
+    def _doc_grams(cls, hay: str):
+        padded = f" {hay} "
+        return {padded[i:i + cls.N] for i in range(len(padded) - cls.N + 1)}
+
+    @classmethod
+    def build(cls, songs: Iterable[Tuple[int, str, List[str]]],
+              popularity: Optional[Dict[int, float]] = None) -> "SongSearchIndex":
+        t0 = time.perf_counter()
+        ids, titles, artists = array("q"), [], []
+        gram_ids: Dict[str, int] = {}
+        col_gram, col_doc = array("i"), array("i")
+        for row, (sid, title, arts) in enumerate(songs):
+            t, a = normalize(title), normalize(" ".join(arts))
+            ids.append(int(sid)); titles.append(t); artists.append(a)
+            for g in cls._doc_grams(f"{t} {a}".strip()):
+                col_gram.append(gram_ids.setdefault(g, len(gram_ids)))
+                col_doc.append(row)
+
+        # gram id를 사전순으로 재배치 후 CSR 구성
+        grams = sorted(gram_ids)
+        remap = np.empty(len(grams), dtype=np.int32)
+        for new, g in enumerate(grams):
+            remap[gram_ids[g]] = new
+        g_arr = remap[np.frombuffer(col_gram, dtype=np.int32)]
+        d_arr = np.frombuffer(col_doc, dtype=np.int32)
+        order = np.argsort(g_arr, kind="stable")  # 문서 순서 유지 → posting 정렬 상태
+        postings = d_arr[order].copy()
+        indptr = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(g_arr, minlength=len(grams)), out=indptr[1:])
+
+        ids_arr = np.frombuffer(ids, dtype=np.int64).copy()
+        pop = np.zeros(len(ids_arr), dtype=np.float32)
+        if popularity:
+            pop[:] = [popularity.get(int(s), 0.0) for s in ids_arr]
+        return cls(ids_arr, titles, artists, grams, indptr, postings, pop,
+                   build_seconds=time.perf_counter() - t0)
+
+    def stats(self) -> dict:
+        str_bytes = sum(len(s.encode("utf-8")) for s in self.titles) + \
+                    sum(len(s.encode("utf-8")) for s in self.artists)
+        gram_bytes = sum(len(g.encode("utf-8")) for g in self.grams)
+        jamo_bytes = sum(len(s.encode("utf-8")) for s in self._jamo_hays if s is not None)
+        return {
+            "docs": int(self.ids.shape[0]),
+            "grams": len(self.grams),
+            "postings": int(self.postings.shape[0]),
+            "build_seconds": round(self.build_seconds, 3),
+            "approx_mib": round((self.postings.nbytes + self.indptr.nbytes + self.ids.nbytes +
+                                 self.popularity.nbytes + self._pop_rank.nbytes + self._by_pop.nbytes +
+                                 str_bytes + gram_bytes + jamo_bytes) / 2**20, 1),
+        }
+
+    # ---------- query ----------
+    def _posting(self, gram: str) -> np.ndarray:
+        i = bisect_left(self.grams, gram)
+        if i < len(self.grams) and self.grams[i] == gram:
+            return self.postings[self.indptr[i]:self.indptr[i + 1]]
+        return self.postings[:0]
+
+    def _prefix_postings(self, prefix: str, cap: int) -> np.ndarray:
+        # prefix로 시작하는 모든 gram의 합집합 (3글자 미만 질의용)
+        lo = bisect_left(self.grams, prefix)
+        hi = bisect_left(self.grams, prefix + "\U0010ffff")
+        if lo >= hi:
+            return self.postings[:0]
+        parts = [self.postings[self.indptr[i]:self.indptr[i + 1]] for i in range(lo, hi)]
+        return self._cap(np.unique(np.concatenate(parts)), cap)
+
+    def _cap(self, rows: np.ndarray, cap: int) -> np.ndarray:
+        # 인기도 상위 cap개 (정렬은 호출 측에서)
+        if rows.size <= cap:
+            return rows
+        return rows[np.argpartition(self._pop_rank[rows], cap - 1)[:cap]]
+
+    def _candidates(self, core: str, cap: int) -> np.ndarray:
+        if len(core) < self.N:
+            return self._prefix_postings(core, cap)
+        grams = {core[i:i + self.N] for i in range(len(core) - self.N + 1)}
+        lists = sorted((self._posting(g) for g in grams), key=len)
+        cand = lists[0]
+        for p in lists[1:]:
+            if cand.size == 0:
+                break
+            cand = np.intersect1d(cand, p, assume_unique=True)
+        return self._cap(cand, cap)
+
+    @staticmethod
+    def _split_typing(qq: str) -> Tuple[str, Optional[List[str]], bool]:
+        """
+        한글 입력 중간 상태 처리: (후보 검색용 core, 자모 검증용 변형 | None, 자모 꼬리 여부)
+        - 끝의 자모: '아이ㅇ' → core '아이', 변형 ['아이ㅇ'(자모)] (평문 일치는 불가능)
+        - 마지막 음절에 받침: '앙' → core '아', 변형 ['앙', '아ㅇ'] (받침이 다음 글자 초성일 수 있음)
+        """
+        m = _JAMO_TAIL.search(qq)
+        if m:
+            return qq[:m.start()], [_jamo(qq)], True
+        if _is_syllable(qq[-1]):
+            last = _jamo(qq[-1])
+            if len(last) == 3:
+                moved = last[:2] + chr(_JONG_TO_CHO.get(ord(last[2]), ord(last[2])))
+                open_syllable = chr(ord(qq[-1]) - (ord(qq[-1]) - _S_BASE) % 28)  # 받침 제거: 앙 → 아
+                return qq[:-1] + open_syllable, [_jamo(qq), _jamo(qq[:-1]) + moved], False
+        return qq, None, False
+
+    def _tier(self, row: int, qq: str) -> int:
+        t, a = self.titles[row], self.artists[row]
+        if t == qq:
+            return 0
+        if t.startswith(qq):
+            return 1
+        if a.startswith(qq):
+            return 2
+        if f" {t} {a}".find(f" {qq}") >= 0:
+            return 3
+        return 4
+
+    def _top_by_popularity(self, rows: np.ndarray, n: int) -> np.ndarray:
+        return rows[np.argsort(-self.popularity[rows], kind="stable")[:n]]
+
+    def _prefix_tiers(self, qq: str, limit: int) -> List[np.ndarray]:
+        # tier 0 (제목 일치), 1 (제목 접두), 2 (아티스트 접두): bisect 구간 + 인기도 상위 limit
+        lo = bisect_left(self._title_keys, qq)
+        mid = bisect_left(self._title_keys, qq + "\x00")  # qq와 정확히 같은 제목의 끝
+        hi = bisect_left(self._title_keys, qq + "\U0010ffff")
+        a_lo = bisect_left(self._artist_keys, qq)
+        a_hi = bisect_left(self._artist_keys, qq + "\U0010ffff")
+        return [self._top_by_popularity(self._title_rows[lo:mid], limit),
+                self._top_by_popularity(self._title_rows[mid:hi], limit),
+                self._top_by_popularity(self._artist_rows[a_lo:a_hi], 2 * limit)]
+
+    def search(self, q: str, limit: int = 20, max_candidates: int = 50_000) -> List[int]:
+        qq = normalize(q)
+        if not qq or limit <= 0:
+            return []
+        core, variants, jamo_tail = self._split_typing(qq)
+
+        out: List[int] = []
+        seen = set()
+        if not jamo_tail:
+            for rows in self._prefix_tiers(qq, limit):
+                for row in rows.tolist():
+                    if row not in seen:
+                        seen.add(row); out.append(row)
+            if len(out) >= limit:
+                return [int(self.ids[r]) for r in out[:limit]]
+
+        # 부분 일치: trigram 후보를 인기도 순으로 검증하고, 앞선 tier가 충분히 모이면 조기 종료
+        core = core.strip()
+        cand = self._candidates(core, max_candidates) if core else self._by_pop[:max_candidates]
+        if variants is not None and not jamo_tail:
+            cand = np.union1d(cand, self._candidates(qq, max_candidates))  # 평문 '앙…' 일치분
+        cand = cand[np.argsort(self._pop_rank[cand])]
+        need = limit - len(out)
+        scored, n_good = [], 0
+        for row in cand.tolist():
+            if row in seen:
+                continue
+            hay = f"{self.titles[row]} {self.artists[row]}"
+            if not jamo_tail and qq in hay:
+                tier = self._tier(row, qq)
+            elif variants is not None and any(v in (self._jamo_hays[row] or hay) for v in variants):
+                tier = self._tier(row, core) + 1  # 입력 중 질의는 core 기준 한 단계 낮게
+            else:
+                continue
+            scored.append((tier, len(scored), row))  # 같은 tier 안에서는 인기도 순(=스캔 순)
+            n_good += tier <= 3
+            if n_good >= need:
+                break
+        scored.sort()
+        out.extend(row for _, _, row in scored[:need])
+        return [int(self.ids[r]) for r in out[:limit]]
@@ -0,0 +1,93 @@
+import bisect
+import heapq
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+def normalize_tag(t: str) -> str:
+    return t.strip().casefold()
+
+
+class TagIndex:
+    """
+    태그 자동완성/정규화 색인 (기동 시 1회 구성).
+    - 태그 id = 빈도 순위 (word_to_idx 순서, 없는 태그는 뒤에 이름순)
+    - 접두: 정규화된 태그 정렬 배열 + bisect 범위 → 범위 안에서 빈도 상위
+    - 중간 일치: 글자 2-gram(1글자 질의는 1-gram) → 태그 id 정렬 목록 교집합, 확인 후 빈도순
+    - resolve(): 원문 그대로 → 정규화 형태 순으로 실제 태그 키를 찾음 (/recommend 태그 정규화)
+    """
+
+    def __init__(self, words: Iterable[str], rank: Optional[Dict[str, int]] = None):
+        rank = rank or {}
+        words = list(dict.fromkeys(words))
+        big = len(rank) + 1
+        self.words: List[str] = sorted(words, key=lambda w: (rank.get(w, big), w))
+        self.norms: List[str] = [normalize_tag(w) for w in self.words]
+        self._exact = {w: i for i, w in enumerate(self.words)}
+        self._by_norm: Dict[str, int] = {}
+        for i, n in enumerate(self.norms):
+            self._by_norm.setdefault(n, i)  # 같은 정규형이면 빈도 높은 쪽
+
+        order = sorted(range(len(self.norms)), key=lambda i: (self.norms[i], i))
+        self._sorted = [self.norms[i] for i in order]
+        self._sorted_ids = order
+
+        grams: Dict[str, List[int]] = {}
+        for i, n in enumerate(self.norms):
+            for g in set(self._grams(n)):
+                grams.setdefault(g, []).append(i)  # i 오름차순 = 빈도순
+        self._grams_idx = grams
+        self._gram_sets = {g: frozenset(p) for g, p in grams.items()}  # 교집합 확인용
+        # 인스턴스별 캐시 (메서드에 lru_cache를 걸면 클래스 캐시가 모든 색인을 붙잡아 모델 교체 후에도 해제 안 됨)
+        self.suggest = lru_cache(maxsize=4096)(self._suggest)
+
+    @staticmethod
+    def _grams(s: str) -> List[str]:
+        # 1글자 질의용 1-gram + 2-gram
+        return list(s) + [s[i:i + 2] for i in range(len(s) - 1)]
+
+    def __len__(self):
+        return len(self.words)
+
+    def resolve(self, t: str) -> Optional[str]:
+        t0 = t.strip()
+        i = self._exact.get(t0)
+        if i is None:
+            i = self._by_norm.get(normalize_tag(t0))
+        return self.words[i] if i is not None else None
+
+    def _prefix_ids(self, q: str, limit: int) -> List[int]:
+        lo = bisect.bisect_left(self._sorted, q)
+        hi = bisect.bisect_left(self._sorted, q + "\U0010ffff", lo)
+        return heapq.nsmallest(limit, self._sorted_ids[lo:hi])
+
+    def _infix_ids(self, q: str, limit: int, skip: set) -> List[int]:
+        gs = {q[i:i + 2] for i in range(len(q) - 1)} if len(q) >= 2 else {q}
+        if not all(g in self._grams_idx for g in gs):
+            return []
+        gs = sorted(gs, key=lambda g: len(self._grams_idx[g]))
+        posts = self._grams_idx[gs[0]]
+        rest = [self._gram_sets[g] for g in gs[1:]]
+        out = []
+        for i in posts:
+            if i in skip or any(i not in r for r in rest) or q not in self.norms[i]:
+                continue
+            out.append(i)
+            if len(out) >= limit:
+                break
+        return out
+
+    def _suggest(self, q: str = "", limit: int = 60) -> tuple:
+        """접두 일치(빈도순) → 중간 일치(빈도순). 질의가 없으면 빈도 상위."""
+        q = normalize_tag(q)
+        if not q:
+            return tuple(self.words[:limit])
+        ids = self._prefix_ids(q, limit)
+        if len(ids) < limit:
+            ids += self._infix_ids(q, limit - len(ids), set(ids))
+        return tuple(self.words[i] for i in ids)
+
+    def stats(self) -> dict:
+        info = self.suggest.cache_info()
+        return {"tags": len(self.words), "grams": len(self._grams_idx),
+                "cache_hits": info.hits, "cache_misses": info.misses}
@@ -0,0 +1,231 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from app.idmap import IdMap
+from app.orm_models import Playlist, PlaylistItem, TasteVector, User
+
+
+def upgrade_schema(engine):
+    # create_all은 기존 테이블에 컬럼을 추가하지 않음 → model_version 없는 DB는 한 번 추가 (NULL = 재구성 대상)
+    cols = {c["name"] for c in inspect(engine).get_columns(TasteVector.__tablename__)}
+    if "model_version" not in cols:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {TasteVector.__tablename__} ADD COLUMN model_version VARCHAR"))
+
+
+class Taste:
+    """곡 임베딩 합·개수. SGNS 질의 = 합/개수 정규화, DAE 입력 = 합/개수 (encoder 전까지 선형)."""
+    __slots__ = ("sgns_sum", "sgns_count", "dae_sum", "dae_count")
+
+    def __init__(self, sgns_sum, sgns_count, dae_sum, dae_count):
+        self.sgns_sum, self.sgns_count = sgns_sum, sgns_count
+        self.dae_sum, self.dae_count = dae_sum, dae_count
+
+    @classmethod
+    def from_row(cls, r: TasteVector) -> "Taste":
+        return cls(np.frombuffer(r.sgns_sum, dtype=np.float32), r.sgns_count,
+                   np.frombuffer(r.dae_sum, dtype=np.float32), r.dae_count)
+
+    def sgns_query(self) -> Optional[np.ndarray]:
+        if self.sgns_count <= 0:
+            return None
+        v = (self.sgns_sum / self.sgns_count)[None, :]
+        return (v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-12)).astype(np.float32)
+
+    def dae_mean(self) -> Optional[np.ndarray]:
+        if self.dae_count <= 0:
+            return None
+        return (self.dae_sum / self.dae_count).astype(np.float32)
+
+
+class TasteVectors:
+    """
+    사용자/플레이리스트 취향 벡터 증분 관리.
+    - 쓰기: 바뀐 곡들의 임베딩 합만 더하고 빼기 (O(바뀐 곡 수)), 플레이리스트 삭제는 저장된 합을 그대로 뺌
+    - 저장된 합에는 model_version(임베딩 지문)을 같이 기록 → 다른 모델/차원으로 만든 행은 없는 것으로 보고 재구성
+    - 읽기: 메모리 LRU → taste_vectors 1행 조회 → 없거나 버전이 다르면 곡 목록으로 계산만 (쓰기는 다음 플레이리스트 쓰기 때)
+    - 쓰기 메서드는 run_write 안에서 호출 (세션에만 반영), 호출 측이 commit 후 invalidate(user_id)
+    """
+
+    def __init__(self, E: np.ndarray, song_idmap: IdMap, dae_W: np.ndarray, dae_idmap: IdMap,
+                 version: str, cache_users: int = 10000):
+        self.E, self.song_idmap = E, song_idmap
+        self.dae_W, self.dae_idmap = dae_W, dae_idmap
+        self.version = version
+        self.cache_users = cache_users
+        self._cache: "OrderedDict[int, Dict[Optional[int], Taste]]" = OrderedDict()
+        # invalidate 세대: 읽는 동안 무효화가 있었으면 읽은 값을 캐시에 넣지 않음
+        # (사용자별 카운터가 cache_users*4를 넘으면 비우고 epoch를 올려 크기 제한)
+        self._gen: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.rebuilds = self.computed = 0
+
+    def _delta(self, song_ids: Iterable[int]) -> Taste:
+        song_ids = list(song_ids)
+        s_rows = self.song_idmap.present_rows(song_ids)
+        d_rows = self.dae_idmap.present_rows(song_ids)
+        return Taste(self.E[s_rows].sum(axis=0, dtype=np.float32), int(s_rows.size),
+                     self.dae_W[d_rows].sum(axis=0, dtype=np.float32), int(d_rows.size))
+
+    def _valid(self, r: TasteVector) -> bool:
+        return (r.model_version == self.version
+                and len(r.sgns_sum) == self.E.shape[1] * 4 and len(r.dae_sum) == self.dae_W.shape[1] * 4)
+
+    def _row(self, db: Session, user_id: int, playlist_id: Optional[int]) -> Optional[TasteVector]:
+        # 같은 세션에서 먼저 읽어 둔 객체가 있어도 DB 값으로 다시 채움
+        return (db.query(TasteVector).filter_by(user_id=user_id, playlist_id=playlist_id)
+                  .populate_existing().first())
+
+    def _lock_user(self, db: Session, user_id: int):
+        # 읽기 전에 사용자 행에 쓰기 잠금 (다른 요청/프로세스의 읽기-더하기-쓰기와 직렬화 → 델타 유실 방지)
+        # SQLite: 첫 UPDATE에서 쓰기 트랜잭션 시작 / 그 외 DB: 행 잠금
+        db.query(User).filter_by(id=user_id).update({User.id: User.id}, synchronize_session=False)
+
+    def _apply(self, db: Session, user_id: int, playlist_id: Optional[int], d: Taste, sign: int):
+        r = self._row(db, user_id, playlist_id)
+        if r is None:
+            if sign < 0:
+                return
+            r = TasteVector(user_id=user_id, playlist_id=playlist_id,
+                            sgns_sum=np.zeros_like(d.sgns_sum).tobytes(), sgns_count=0,
+                            dae_sum=np.zeros_like(d.dae_sum).tobytes(), dae_count=0)
+            db.add(r)
+        t = Taste.from_row(r)
+        sc, dc = t.sgns_count + sign * d.sgns_count, t.dae_count + sign * d.dae_count
+        # 개수가 0이 되면 합도 0으로 (float 누적 오차 제거)
+        r.sgns_sum = ((t.sgns_sum + sign * d.sgns_sum) if sc > 0 else np.zeros_like(t.sgns_sum)).astype(np.float32).tobytes()
+        r.dae_sum = ((t.dae_sum + sign * d.dae_sum) if dc > 0 else np.zeros_like(t.dae_sum)).astype(np.float32).tobytes()
+        r.sgns_count, r.dae_count = max(sc, 0), max(dc, 0)
+        r.model_version = self.version
+        # autoflush 꺼짐 + _row는 populate_existing → 다음 _row가 이 변경을 덮어쓰지 않도록 바로 반영
+        db.flush()
+
+    def _put(self, db: Session, user_id: int, playlist_id: Optional[int], t: Taste):
+        db.add(TasteVector(user_id=user_id, playlist_id=playlist_id, model_version=self.version,
+                           sgns_sum=t.sgns_sum.astype(np.float32).tobytes(), sgns_count=t.sgns_count,
+                           dae_sum=t.dae_sum.astype(np.float32).tobytes(), dae_count=t.dae_count))
+
+    # ---- 쓰기 훅 (run_write 안에서) ----
+    def on_playlist_created(self, db: Session, user_id: int, playlist_id: int, song_ids: Iterable[int]):
+        self._lock_user(db, user_id)
+        self._ensure_user(db, user_id, skip_playlist=playlist_id)
+        d = self._delta(song_ids)
+        self._apply(db, user_id, playlist_id, d, +1)
+        self._apply(db, user_id, None, d, +1)
+
+    def on_items_changed(self, db: Session, user_id: int, playlist_id: int,
+                         added: Iterable[int] = (), removed: Iterable[int] = ()):
+        self._lock_user(db, user_id)
+        if self._ensure_user(db, user_id):
+            return
+        a, r = self._delta(added), self._delta(removed)
+        d = Taste(a.sgns_sum - r.sgns_sum, a.sgns_count - r.sgns_count,
+                  a.dae_sum - r.dae_sum, a.dae_count - r.dae_count)  # 행마다 순증분 1번만 적용
+        self._apply(db, user_id, playlist_id, d, +1)
+        self._apply(db, user_id, None, d, +1)
+
+    def on_playlist_deleted(self, db: Session, user_id: int, playlist_id: int):
+        self._lock_user(db, user_id)
+        if self._ensure_user(db, user_id, skip_playlist=playlist_id):
+            return
+        r = self._row(db, user_id, playlist_id)
+        if r is None:
+            return
+        self._apply(db, user_id, None, Taste.from_row(r), -1)
+        db.delete(r)
+
+    def _ensure_user(self, db: Session, user_id: int, skip_playlist: Optional[int] = None) -> bool:
+        """
+        사용자 벡터가 없거나(기능 도입 전 데이터) 다른 모델 버전/차원이면 곡 목록으로 재구성.
+        재구성했으면 True (skip_playlist: 생성 시 새 플레이리스트는 호출 측이 증분으로 더하고,
+        삭제 시 지울 플레이리스트는 빼고 재구성했으므로 호출 측은 증분을 건너뜀)
+        """
+        rows = db.query(TasteVector).filter_by(user_id=user_id).populate_existing().all()
+        if any(r.playlist_id is None for r in rows) and all(self._valid(r) for r in rows):
+            return False
+        self.rebuild(db, user_id, skip_playlist=skip_playlist)
+        return True
+
+    def _songs_by_playlist(self, db: Session, user_id: int) -> Dict[int, list]:
+        rows = (db.query(Playlist.id, PlaylistItem.song_id)
+                  .outerjoin(PlaylistItem, PlaylistItem.playlist_id == Playlist.id)
+                  .filter(Playlist.user_id == user_id))
+        by_pl: Dict[int, list] = {}
+        for pid, sid in rows:
+            by_pl.setdefault(pid, [])
+            if sid is not None:
+                by_pl[pid].append(sid)
+        return by_pl
+
+    def rebuild(self, db: Session, user_id: int, skip_playlist: Optional[int] = None):
+        """곡 목록에서 사용자/플레이리스트 벡터 전부 다시 계산 (백필/복구/모델 교체 후)."""
+        self.rebuilds += 1
+        # 세션에 읽어 둔 행도 같이 제거 (evaluate)
+        db.query(TasteVector).filter_by(user_id=user_id).delete(synchronize_session="evaluate")
+        # 플레이리스트 행은 각각 새로 넣고, 사용자 합은 메모리에서 더해 마지막에 1번 기록
+        sgns_sum, dae_sum = np.zeros(self.E.shape[1], np.float32), np.zeros(self.dae_W.shape[1], np.float32)
+        sgns_count = dae_count = 0
+        for pid, sids in self._songs_by_playlist(db, user_id).items():
+            if pid == skip_playlist:
+                continue
+            d = self._delta(sids)
+            self._put(db, user_id, pid, d)
+            sgns_sum += d.sgns_sum; dae_sum += d.dae_sum
+            sgns_count += d.sgns_count; dae_count += d.dae_count
+        self._put(db, user_id, None, Taste(sgns_sum, sgns_count, dae_sum, dae_count))
+        db.flush()
+
+    def _compute(self, db: Session, user_id: int, playlist_id: Optional[int]) -> Optional[Taste]:
+        # 저장된 행을 쓸 수 없을 때: 곡 목록으로 계산만 하고 저장하지 않음 (읽기 요청에서 쓰기 없음)
+        self.computed += 1
+        by_pl = self._songs_by_playlist(db, user_id)
+        if playlist_id is not None:
+            return self._delta(by_pl[playlist_id]) if playlist_id in by_pl else None
+        return self._delta(sid for sids in by_pl.values() for sid in sids)
+
+    # ---- 읽기 ----
+    def get(self, db: Session, user_id: int, playlist_id: Optional[int] = None) -> Optional[Taste]:
+        with self._lock:
+            per_user = self._cache.get(user_id)
+            if per_user is not None and playlist_id in per_user:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return per_user[playlist_id]
+            self.misses += 1
+            gen = (self._epoch, self._gen.get(user_id, 0))
+        r = self._row(db, user_id, playlist_id)
+        if r is not None and self._valid(r):
+            t = Taste.from_row(r)
+        else:
+            t = self._compute(db, user_id, playlist_id)
+        with self._lock:
+            if gen == (self._epoch, self._gen.get(user_id, 0)):
+                self._cache.setdefault(user_id, {})[playlist_id] = t
+                self._cache.move_to_end(user_id)
+                while len(self._cache) > self.cache_users:
+                    self._cache.popitem(last=False)
+        return t
+
+    def invalidate(self, user_id: Optional[int] = None):
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+                self._gen.clear()
+                self._epoch += 1
+                return
+            self._cache.pop(user_id, None)
+            self._gen[user_id] = self._gen.get(user_id, 0) + 1
+            if len(self._gen) > self.cache_users * 4:
+                self._gen.clear()
+                self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"version": self.version, "cached_users": len(self._cache), "hits": self.hits,
+                    "misses": self.misses, "rebuilds": self.rebuilds, "computed": self.computed}
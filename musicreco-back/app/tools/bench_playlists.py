@@ -0,0 +1,120 @@
+# app/tools/bench_playlists.py
+"""
+플레이리스트 API 쿼리 수 / 지연 벤치마크 (임시 SQLite 파일 사용, 운영 DB는 건드리지 않음).
+
+    python -m app.tools.bench_playlists --sizes 10,100,1000 --items 20
+
+- list lazy   : 기존 방식 (Playlist 조회 후 직렬화 중 items lazy load → 플레이리스트마다 1쿼리)
+- list select : app.playlists.list_page (selectinload, 전체)
+- list page   : list_page(limit=--page) 첫 페이지
+- insert      : 곡 --items개 플레이리스트 생성, 한 행씩 add vs insert_items (executemany)
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.orm_models import User, Playlist, PlaylistItem
+from app.playlists import list_page, insert_items
+from app.schemas_playlist import PlaylistOut, PlaylistItemIn
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.n = 0
+        event.listen(engine, "before_cursor_execute", self._on)
+
+    def _on(self, *_):
+        self.n += 1
+
+
+def _seed(Session, n_playlists: int, n_items: int) -> int:
+    db = Session()
+    u = User(email=f"bench{n_playlists}@x", name="bench", password_hash="-")
+    db.add(u); db.flush()
+    for p in range(n_playlists):
+        pl = Playlist(user_id=u.id, title=f"pl{p}", tags=[])
+        db.add(pl); db.flush()
+        items = [PlaylistItemIn(song_id=p * n_items + i, title=f"s{i}") for i in range(n_items)]
+        insert_items(db, pl.id, items)
+    db.commit()
+    uid = u.id
+    db.close()
+    return uid
+
+
+def _measure(Session, counter: QueryCounter, fn, repeat: int):
+    times, queries = [], 0
+    for _ in range(repeat):
+        db = Session()
+        c0 = counter.n
+        t = time.perf_counter()
+        fn(db)
+        times.append((time.perf_counter() - t) * 1000)
+        queries = counter.n - c0
+        db.rollback(); db.close()
+    return queries, statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="플레이리스트 쿼리 수/지연 벤치마크")
+    ap.add_argument("--sizes", default="10,100,1000", help="사용자당 플레이리스트 수")
+    ap.add_argument("--items", type=int, default=20, help="플레이리스트당 곡 수")
+    ap.add_argument("--page", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    counter = QueryCounter(engine)
+
+    def lazy(uid):
+        def f(db):
+            pls = db.query(Playlist).filter_by(user_id=uid).order_by(Playlist.id.desc()).all()
+            return [PlaylistOut.model_validate(p) for p in pls]
+        return f
+
+    def select(uid, limit=None):
+        def f(db):
+            pls, _ = list_page(db, uid, limit=limit)
+            return [PlaylistOut.model_validate(p) for p in pls]
+        return f
+
+    items = [PlaylistItemIn(song_id=i, title=f"s{i}") for i in range(args.items)]
+
+    def insert_rowwise(uid):
+        def f(db):
+            pl = Playlist(user_id=uid, title="new", tags=[])
+            db.add(pl); db.flush()
+            for i, it in enumerate(items):
+                db.add(PlaylistItem(playlist_id=pl.id, position=i, song_id=it.song_id,
+                                    title=it.title, artists=it.artists, genres=it.genres))
+            db.flush()
+        return f
+
+    def insert_bulk(uid):
+        def f(db):
+            pl = Playlist(user_id=uid, title="new", tags=[])
+            db.add(pl); db.flush()
+            insert_items(db, pl.id, items)
+        return f
+
+    print(f"{'playlists':>9} {'case':<14} {'queries':>7} {'p50 ms':>9}")
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        uid = _seed(Session, n, args.items)
+        for name, fn in (("list lazy", lazy(uid)), ("list select", select(uid)),
+                         (f"list page {args.page}", select(uid, args.page)),
+                         ("insert rows", insert_rowwise(uid)), ("insert bulk", insert_bulk(uid))):
+            q, ms = _measure(Session, counter, fn, args.repeat)
+            print(f"{n:>9} {name:<14} {q:>7} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
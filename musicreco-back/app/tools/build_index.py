@@ -0,0 +1,123 @@
+# app/tools/build_index.py
+"""
+SGNS ANN 인덱스 오프라인 학습/저장 + recall@k vs latency 리포트.
+
+    python -m app.tools.build_index --kinds ivf_flat ivf_pq hnsw
+    python -m app.tools.build_index --kinds hnsw --report-only
+
+저장 위치: DATA_DIR/song_index_{kind}.faiss (서빙 시 SGNS_INDEX={kind} 로 선택)
+         + song_index_{kind}.json (곡 id·임베딩 지문, 서빙 시 다르면 인덱스를 쓰지 않음)
+리포트는 flat(정확) 인덱스 결과를 정답으로 한 recall@k 와 단건 검색 지연(p50/p99).
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.loaders import has_embedding_store, load_sgns_store, load_sgns_embeddings
+from app.rec.ann import build_index, index_key, index_path, load_index, save_index, search_params
+
+# 종류별로 훑어볼 요청 단위 파라미터
+SWEEPS = {
+    "ivf_flat": ("nprobe", (1, 4, 16, 32, 64, 128)),
+    "ivf_pq": ("nprobe", (1, 4, 16, 32, 64, 128)),
+    "hnsw": ("ef_search", (16, 32, 64, 128, 256)),
+}
+
+
+def _load_embeddings(data_dir: str):
+    # 서빙(load_bundle)과 같은 파일/행 순서
+    if has_embedding_store(data_dir):
+        E, ids = load_sgns_store(data_dir)
+    else:
+        E, ids = load_sgns_embeddings(os.path.join(data_dir, "song_embeddings.pkl"))
+    return np.ascontiguousarray(E, dtype=np.float32), ids
+
+
+def _timed_search(index, Q: np.ndarray, k: int, params=None):
+    """서빙과 같은 단건 검색으로 지연 측정."""
+    lat, found = [], []
+    for q in Q:
+        t0 = time.perf_counter()
+        if params is not None:
+            _, I = index.search(q[None, :], k, params=params)
+        else:
+            _, I = index.search(q[None, :], k)
+        lat.append(time.perf_counter() - t0)
+        found.append(I[0])
+    return np.stack(found), np.asarray(lat) * 1e3
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def report(E: np.ndarray, kinds, data_dir: str, k: int, n_queries: int, seed: int):
+    rng = np.random.default_rng(seed)
+    # 실제 질의(곡 평균 벡터)와 비슷하게: 임의 곡 몇 개의 평균을 정규화
+    picks = rng.integers(0, E.shape[0], size=(n_queries, 5))
+    Q = E[picks].mean(axis=1)
+    Q /= (np.linalg.norm(Q, axis=1, keepdims=True) + 1e-12)
+    Q = Q.astype(np.float32)
+
+    flat = build_index(E, "flat")
+    truth, flat_lat = _timed_search(flat, Q, k)
+    rows = [{"kind": "flat", "param": None, "value": None, "recall": 1.0,
+             "p50_ms": float(np.percentile(flat_lat, 50)), "p99_ms": float(np.percentile(flat_lat, 99))}]
+
+    for kind in kinds:
+        index = load_index(index_path(data_dir, kind))
+        name, values = SWEEPS[kind]
+        for v in values:
+            params = search_params(index, **{name: v})
+            found, lat = _timed_search(index, Q, k, params)
+            rows.append({"kind": kind, "param": name, "value": v, "recall": _recall(found, truth),
+                         "p50_ms": float(np.percentile(lat, 50)), "p99_ms": float(np.percentile(lat, 99))})
+
+    print(f"\nrecall@{k} vs flat  (queries={n_queries}, N={E.shape[0]})")
+    print(f"{'kind':<10}{'param':>16}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in rows:
+        p = f"{r['param']}={r['value']}" if r["param"] else "-"
+        print(f"{r['kind']:<10}{p:>16}{r['recall']:>10.4f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}")
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SGNS ANN 인덱스 학습/저장/리포트")
+    ap.add_argument("--data-dir", default=os.getenv("DATA_DIR", "app/data"))
+    ap.add_argument("--kinds", nargs="+", default=["ivf_flat", "ivf_pq", "hnsw"], choices=list(SWEEPS))
+    ap.add_argument("--nlist", type=int, default=4096)
+    ap.add_argument("--pq-m", type=int, default=16)
+    ap.add_argument("--hnsw-m", type=int, default=32)
+    ap.add_argument("--ef-construction", type=int, default=200)
+    ap.add_argument("--report-only", action="store_true", help="저장된 인덱스로 리포트만")
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--report-json", default=None)
+    args = ap.parse_args()
+
+    E, ids = _load_embeddings(args.data_dir)
+    if not args.report_only:
+        for kind in args.kinds:
+            t0 = time.perf_counter()
+            # faiss 권장: centroid 당 학습 벡터 39개 이상
+            index = build_index(E, kind, nlist=min(args.nlist, E.shape[0] // 39 or 1),
+                                pq_m=args.pq_m, hnsw_m=args.hnsw_m,
+                                ef_construction=args.ef_construction, seed=args.seed)
+            path = index_path(args.data_dir, kind)
+            save_index(index, path, key=index_key(E, ids))
+            print(f"[{kind}] built in {time.perf_counter() - t0:.1f}s -> {path} "
+                  f"({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+    rows = report(E, args.kinds, args.data_dir, args.k, args.queries, args.seed)
+    if args.report_json:
+        with open(args.report_json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
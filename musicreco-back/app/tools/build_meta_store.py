@@ -0,0 +1,38 @@
+# app/tools/build_meta_store.py
+"""
+song_meta.json → 컬럼형 메타 저장소(app/meta_store.py) 1회 변환.
+
+    python -m app.tools.build_meta_store --data-dir app/data
+
+song_ids.npy(app/tools/build_store.py 출력)가 있으면 그 순서로 행을 배치해
+임베딩 행 번호와 메타 행 번호를 맞춘다. 출력: DATA_DIR/song_meta_store/
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.loaders import SONG_IDS_NPY, load_song_meta_by_id
+from app.meta_store import META_STORE_DIR, SongMetaStore
+
+
+def main():
+    ap = argparse.ArgumentParser(description="song_meta.json을 컬럼형 저장소로 변환")
+    ap.add_argument("--data-dir", default=os.getenv("DATA_DIR", "app/data"))
+    ap.add_argument("--meta", default="song_meta.json")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    meta = load_song_meta_by_id(os.path.join(args.data_dir, args.meta))
+    ids_path = os.path.join(args.data_dir, SONG_IDS_NPY)
+    ids_first = np.load(ids_path) if os.path.exists(ids_path) else None
+    store = SongMetaStore.from_records(meta, ids_first=ids_first)
+    out = os.path.join(args.data_dir, META_STORE_DIR)
+    store.save(out)
+    print(f"songs: {len(store)}, artists: {len(store.artist_names)}, genres: {len(store.genre_names)}, "
+          f"albums: {len(store.album_names)} ({time.perf_counter() - t0:.1f}s) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
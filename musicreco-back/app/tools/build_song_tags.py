@@ -0,0 +1,56 @@
+# app/tools/build_song_tags.py
+"""
+곡별 근접 태그 상위 K 표 오프라인 계산 (Song2Tags가 O(K)로 응답).
+
+    python -m app.tools.build_song_tags --data-dir app/data --k 32
+
+(곡 block x 태그) 행렬곱으로 계산하며, 행 순서는 서빙 시 SGNS 임베딩 행 순서와 같다.
+출력: DATA_DIR/song_tags_idx.npy (N,K) int32, DATA_DIR/song_tags_sim.npy (N,K) float16,
+      DATA_DIR/song_tags_key.json (곡 id·태그 목록·임베딩 지문, 서빙 시 다르면 표를 쓰지 않음)
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.loaders import (
+    has_embedding_store, load_sgns_store, load_tag_store,
+    load_sgns_embeddings, load_tag_embeddings,
+)
+from app.rec.song2tags import (
+    SONG_TAGS_IDX_NPY, SONG_TAGS_KEY_JSON, SONG_TAGS_SIM_NPY, song_tags_key, topk_tags_blocked,
+)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="곡별 근접 태그 상위 K 표 생성")
+    ap.add_argument("--data-dir", default=os.getenv("DATA_DIR", "app/data"))
+    ap.add_argument("--k", type=int, default=32, help="Song2Tags candidate_k 최댓값 이상")
+    ap.add_argument("--block", type=int, default=8192)
+    args = ap.parse_args()
+
+    if has_embedding_store(args.data_dir):
+        E, ids = load_sgns_store(args.data_dir)
+        tag_mat, tag_words = load_tag_store(args.data_dir)
+    else:
+        # main.py와 같은 순서 (pickle 삽입 순서)
+        E, ids = load_sgns_embeddings(os.path.join(args.data_dir, "song_embeddings.pkl"))
+        tag_emb = load_tag_embeddings(os.path.join(args.data_dir, "tag_embeddings.pkl"))
+        tag_words = list(tag_emb.keys())
+        tag_mat = np.stack([tag_emb[w] for w in tag_words], axis=0).astype(np.float32)
+        tag_mat /= (np.linalg.norm(tag_mat, axis=1, keepdims=True) + 1e-12)
+
+    t0 = time.perf_counter()
+    idx, sim = topk_tags_blocked(E, tag_mat, args.k, block=args.block)
+    np.save(os.path.join(args.data_dir, SONG_TAGS_IDX_NPY), idx)
+    np.save(os.path.join(args.data_dir, SONG_TAGS_SIM_NPY), sim)
+    with open(os.path.join(args.data_dir, SONG_TAGS_KEY_JSON), "w", encoding="utf-8") as f:
+        json.dump(song_tags_key(E, ids, tag_mat, tag_words), f)
+    print(f"songs: {idx.shape[0]}, tags: {tag_mat.shape[0]}, K={idx.shape[1]} "
+          f"({time.perf_counter() - t0:.1f}s, {(idx.nbytes + sim.nbytes) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# app/tools/build_store.py
+"""
+pickle 임베딩 → mmap 가능한 바이너리 스토어 1회 변환.
+
+    python -m app.tools.build_store --data-dir app/data
+
+출력(data-dir):
+  - song_emb.npy   : (N,d) float32, L2 정규화, song_ids 순서
+  - song_ids.npy   : (N,) int64, 오름차순
+  - tag_emb.npy    : (T,d) float32, L2 정규화
+  - tag_words.json : tag_emb.npy 행 순서의 태그 문자열
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from app.loaders import SONG_EMB_NPY, SONG_IDS_NPY, TAG_EMB_NPY, TAG_WORDS_JSON
+
+
+def _l2_normalize(m: np.ndarray) -> np.ndarray:
+    m /= (np.linalg.norm(m, axis=1, keepdims=True) + 1e-12)
+    return m
+
+
+def convert_song_embeddings(pkl_path: str, out_dir: str) -> int:
+    with open(pkl_path, "rb") as f:
+        d = pickle.load(f)  # {song_id: vector}
+    ids = np.fromiter((int(k) for k in d.keys()), dtype=np.int64, count=len(d))
+    order = np.argsort(ids, kind="stable")
+    keys = list(d.keys())
+    dim = len(np.asarray(d[keys[0]]))
+
+    vecs = np.empty((len(keys), dim), dtype=np.float32)
+    for row, i in enumerate(order):
+        vecs[row] = np.asarray(d[keys[i]], dtype=np.float32)
+    _l2_normalize(vecs)
+
+    np.save(os.path.join(out_dir, SONG_EMB_NPY), vecs)
+    np.save(os.path.join(out_dir, SONG_IDS_NPY), ids[order])
+    return len(keys)
+
+
+def convert_tag_embeddings(pkl_path: str, out_dir: str) -> int:
+    with open(pkl_path, "rb") as f:
+        d = pickle.load(f)  # {tag: vector}
+    words = list(d.keys())
+    mat = np.stack([np.asarray(d[w], dtype=np.float32) for w in words], axis=0)
+    _l2_normalize(mat)
+
+    np.save(os.path.join(out_dir, TAG_EMB_NPY), mat)
+    with open(os.path.join(out_dir, TAG_WORDS_JSON), "w", encoding="utf-8") as f:
+        json.dump(words, f, ensure_ascii=False)
+    return len(words)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="pickle 임베딩을 mmap 스토어로 변환")
+    ap.add_argument("--data-dir", default=os.getenv("DATA_DIR", "app/data"))
+    ap.add_argument("--song-pkl", default="song_embeddings.pkl")
+    ap.add_argument("--tag-pkl", default="tag_embeddings.pkl")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    n_songs = convert_song_embeddings(os.path.join(args.data_dir, args.song_pkl), args.data_dir)
+    t1 = time.perf_counter()
+    n_tags = convert_tag_embeddings(os.path.join(args.data_dir, args.tag_pkl), args.data_dir)
+    t2 = time.perf_counter()
+    print(f"songs: {n_songs} ({t1 - t0:.1f}s), tags: {n_tags} ({t2 - t1:.1f}s) -> {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# app/tools/dae_parity.py
+"""
+EmbeddingDAE 배치 인코딩(encode_playlist / score_candidates)과
+기존 플레이리스트 단위 루프 결과의 일치 여부 확인.
+
+    python -m app.tools.dae_parity                       # 작은 랜덤 모델
+    python -m app.tools.dae_parity --ckpt app/data/dae_model.pth --num-songs 707989
+
+불일치 시 종료 코드 1.
+"""
+import argparse
+import sys
+
+import torch
+
+from app.models.embedding_dae import EmbeddingDAE
+
+
+def reference_encode(model: EmbeddingDAE, remain_lists):
+    # 기존 구현: 플레이리스트마다 mean → encoder → LayerNorm, 빈 리스트는 0벡터
+    out = []
+    for ids in remain_lists:
+        if len(ids) == 0:
+            out.append(torch.zeros(model.emb.embedding_dim, device=model.emb.weight.device))
+        else:
+            p = model.emb(ids.to(model.emb.weight.device)).mean(dim=0)
+            out.append(model.norm(model.encoder(p)))
+    return torch.stack(out, dim=0)
+
+
+def reference_scores(model: EmbeddingDAE, p, candidates_lists):
+    return [model.emb(c.to(model.emb.weight.device)) @ p[i] for i, c in enumerate(candidates_lists)]
+
+
+@torch.inference_mode()
+def check(model: EmbeddingDAE, batch: int, max_len: int, n_cand: int, seed: int, atol: float) -> bool:
+    g = torch.Generator().manual_seed(seed)
+    n = model.emb.num_embeddings
+    lengths = torch.randint(0, max_len + 1, (batch,), generator=g).tolist()
+    lengths[0] = 0  # 빈 플레이리스트 포함
+    remain = [torch.randint(0, n, (m,), generator=g) for m in lengths]
+    cands = [torch.randint(0, n, (int(torch.randint(1, n_cand + 1, (1,), generator=g)),), generator=g)
+             for _ in range(batch)]
+
+    p_ref = reference_encode(model, remain)
+    p_new = model.encode_playlist(remain)
+    enc_diff = (p_ref - p_new).abs().max().item()
+
+    s_ref = reference_scores(model, p_ref, cands)
+    s_new = model.score_candidates(p_ref, cands)
+    score_diff = max((a - b).abs().max().item() for a, b in zip(s_ref, s_new))
+
+    print(f"encode_playlist max|diff| = {enc_diff:.3e}, score_candidates max|diff| = {score_diff:.3e}")
+    return enc_diff <= atol and score_diff <= atol
+
+
+def main():
+    ap = argparse.ArgumentParser(description="EmbeddingDAE 배치 경로 parity 확인")
+    ap.add_argument("--ckpt", default=None)
+    ap.add_argument("--num-songs", type=int, default=5000)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--max-len", type=int, default=100)
+    ap.add_argument("--candidates", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--atol", type=float, default=1e-4)
+    args = ap.parse_args()
+
+    torch.manual_seed(args.seed)
+    model = EmbeddingDAE(num_songs=args.num_songs)
+    if args.ckpt:
+        state = torch.load(args.ckpt, map_location="cpu")
+        model.load_state_dict(state.get("state_dict", state) if isinstance(state, dict) else state.state_dict())
+    model.eval()
+
+    ok = check(model, args.batch, args.max_len, args.candidates, args.seed, args.atol)
+    print("OK" if ok else "MISMATCH")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
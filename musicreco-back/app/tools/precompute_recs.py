@@ -0,0 +1,172 @@
+# app/tools/precompute_recs.py
+"""
+사용자/플레이리스트별 추천 오프라인 사전 계산 → precomputed_recs 테이블 (GET /me/recommendations).
+
+    python -m app.tools.precompute_recs --data-dir app/data --topn 50 --workers 4
+
+- 사용자를 id 순으로 페이지 단위로 읽고, 플레이리스트별 + 사용자 전체(곡 합집합) 프로필을 만든다
+- 곡 id 집합 해시가 지난 실행과 같으면 건너뜀 (--force: 전부 다시 계산)
+- SGNS/DAE는 BulkRecommender 청크 배치로 계산, --workers > 0이면 fork한 프로세스들이 나눠 계산
+- 쓰기는 부모 프로세스 한 곳에서 페이지 단위 bulk insert (SQLite writer 1개)
+- 모델 버전을 바꿨으면 (/admin/models/reload) 새 버전 디렉터리로 --force 실행
+"""
+import argparse
+import hashlib
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from app.db import Base, engine, SessionLocal
+from app.orm_models import User, Playlist, PlaylistItem, PrecomputedRec
+from app.rec.bulk import BulkQuery, BulkRecommender
+from app.registry import load_bundle
+
+METHODS = ("sgns", "dae")
+
+_bulk: Optional[BulkRecommender] = None  # fork된 워커가 부모의 모델을 그대로 공유
+
+
+def load_bulk(data_dir: str, sgns_index: str, dae_item_dtype: str) -> BulkRecommender:
+    # 서버와 같은 로더 (스토어 우선, 같은 매핑), 메타/검색 색인은 생략
+    m = load_bundle(data_dir, os.path.basename(os.path.normpath(data_dir)), sgns_index=sgns_index,
+                    dae_item_dtype=dae_item_dtype, serving=False)
+    return m.bulk
+
+
+def items_hash(song_ids: List[int]) -> str:
+    return hashlib.sha1(np.unique(np.asarray(song_ids, dtype=np.int64)).tobytes()).hexdigest()
+
+
+def _init_worker(threads: int):
+    torch.set_num_threads(threads)
+
+
+def _work(queries: List[BulkQuery]):
+    return [pairs for _, pairs in _bulk.run(queries)]
+
+
+def _profiles(db, uids: List[int]) -> Dict[Tuple[int, Optional[int]], List[int]]:
+    """(user_id, playlist_id | None) → 곡 id 목록. None은 사용자 전체 합집합."""
+    rows = (db.query(Playlist.user_id, Playlist.id, PlaylistItem.song_id)
+              .join(PlaylistItem, PlaylistItem.playlist_id == Playlist.id)
+              .filter(Playlist.user_id.in_(uids))
+              .order_by(Playlist.user_id, Playlist.id, PlaylistItem.position)
+              .all())
+    prof: Dict[Tuple[int, Optional[int]], List[int]] = defaultdict(list)
+    for uid, pid, sid in rows:
+        if sid is None:
+            continue
+        prof[(uid, pid)].append(sid)
+        prof[(uid, None)].append(sid)
+    return prof
+
+
+def main():
+    global _bulk
+    ap = argparse.ArgumentParser(description="사용자/플레이리스트별 추천 사전 계산")
+    ap.add_argument("--data-dir", default=os.getenv("DATA_DIR", "app/data"))
+    ap.add_argument("--sgns-index", default=os.getenv("SGNS_INDEX", "flat"))
+    ap.add_argument("--dae-item-dtype", default=os.getenv("DAE_ITEM_DTYPE", "float32"))
+    ap.add_argument("--topn", type=int, default=50)
+    ap.add_argument("--methods", default="sgns,dae")
+    ap.add_argument("--page-size", type=int, default=500, help="한 번에 읽을 사용자 수")
+    ap.add_argument("--task-size", type=int, default=256, help="워커 1회 작업당 질의 수")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                    help="0이면 현재 프로세스에서 계산")
+    ap.add_argument("--threads-per-worker", type=int, default=1)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    methods = [m for m in args.methods.split(",") if m]
+    for m in methods:
+        if m not in METHODS:
+            raise SystemExit(f"unknown method: {m}")
+
+    t0 = time.perf_counter()
+    _bulk = load_bulk(args.data_dir, args.sgns_index, args.dae_item_dtype)
+    print(f"models loaded ({time.perf_counter() - t0:.1f}s)")
+    Base.metadata.create_all(bind=engine)
+
+    pool = None
+    if args.workers > 0:
+        pool = mp.get_context("fork").Pool(args.workers, initializer=_init_worker,
+                                           initargs=(args.threads_per_worker,))
+
+    n_users = n_done = n_skip = n_del = 0
+    t_compute = 0.0
+    last_uid = 0
+    db = SessionLocal()
+    try:
+        while True:
+            uids = [u for (u,) in db.query(User.id).filter(User.id > last_uid)
+                                    .order_by(User.id).limit(args.page_size)]
+            if not uids:
+                break
+            last_uid = uids[-1]
+            n_users += len(uids)
+
+            prof = _profiles(db, uids)
+            existing = {(r.user_id, r.playlist_id, r.method): (r.id, r.items_hash)
+                        for r in db.query(PrecomputedRec.id, PrecomputedRec.user_id,
+                                          PrecomputedRec.playlist_id, PrecomputedRec.method,
+                                          PrecomputedRec.items_hash)
+                                   .filter(PrecomputedRec.user_id.in_(uids))}
+
+            todo: List[Tuple[Tuple[int, Optional[int], str], str]] = []
+            queries: List[BulkQuery] = []
+            for (uid, pid), songs in prof.items():
+                h = items_hash(songs)
+                for m in methods:
+                    key = (uid, pid, m)
+                    if not args.force and key in existing and existing[key][1] == h:
+                        n_skip += 1
+                        continue
+                    todo.append((key, h))
+                    queries.append(BulkQuery(m, songs, k=args.topn))
+            # 바뀐 것 + 더 이상 없는 플레이리스트(삭제/비움)의 기존 행 제거
+            stale = [existing[key][0] for key, _ in todo if key in existing]
+            live = {(uid, pid, m) for (uid, pid) in prof for m in methods}
+            orphans = [rid for key, (rid, _) in existing.items() if key not in live]
+
+            results: List[list] = []
+            if queries:
+                t1 = time.perf_counter()
+                # 같은 메서드끼리 모아야 청크 배치가 커짐
+                order = sorted(range(len(queries)), key=lambda i: queries[i].method)
+                tasks = [[queries[i] for i in order[s:s + args.task_size]]
+                         for s in range(0, len(order), args.task_size)]
+                outs = pool.map(_work, tasks) if pool is not None else [_work(t) for t in tasks]
+                flat = [pairs for out in outs for pairs in out]
+                results = [None] * len(queries)
+                for i, pairs in zip(order, flat):
+                    results[i] = pairs
+                t_compute += time.perf_counter() - t1
+
+            if stale or orphans:
+                db.query(PrecomputedRec).filter(PrecomputedRec.id.in_(stale + orphans)) \
+                  .delete(synchronize_session=False)
+            db.bulk_insert_mappings(PrecomputedRec, [
+                {"user_id": uid, "playlist_id": pid, "method": m, "items_hash": h,
+                 "items": [[sid, round(sc, 6)] for sid, sc in pairs]}
+                for ((uid, pid, m), h), pairs in zip(todo, results)
+            ])
+            db.commit()
+            n_done += len(todo)
+            n_del += len(orphans)
+            print(f"users <= {last_uid}: +{len(todo)} computed, {n_skip} skipped so far")
+    finally:
+        db.close()
+        if pool is not None:
+            pool.close(); pool.join()
+
+    qps = n_done / t_compute if t_compute else 0.0
+    print(f"users: {n_users}, computed: {n_done}, skipped: {n_skip}, removed: {n_del} "
+          f"({time.perf_counter() - t0:.1f}s total, {qps:.0f} queries/s)")
+
+
+if __name__ == "__main__":
+    main()
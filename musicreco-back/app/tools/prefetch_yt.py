@@ -0,0 +1,76 @@
+# app/tools/prefetch_yt.py
+"""
+인기곡 YouTube videoId 캐시 예열 (yt_cache 테이블).
+
+    python -m app.tools.prefetch_yt --csv ../musicreco-front/public/top_songs.csv --concurrency 8
+
+프론트와 같은 방식으로 질의를 만든다 (괄호/대괄호·official video·mv 제거).
+- 대시보드: "제목 아티스트 official audio", 플레이리스트: "제목 아티스트" → 기본으로 둘 다
+이미 캐시에 있고 TTL 안이면 API를 부르지 않는다. YOUTUBE_API_BASE로 스텁 서버 지정 가능.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import re
+import time
+
+from app.db import Base, engine
+from app.yt import YOUTUBE_API_BASE, YouTubeAPIBackend, YouTubeBackendError, YouTubeLookup
+
+_TITLE_NOISE = re.compile(r"\(.*?\)|\[.*?]|official\s*video|mv", re.I)
+_ARTIST_NOISE = re.compile(r"\(.*?\)|\[.*?]")
+
+
+def song_query(title: str, artist: str, suffix: str = "") -> str:
+    t = _TITLE_NOISE.sub("", title).strip()
+    a = _ARTIST_NOISE.sub("", artist or "").strip()
+    return f"{t} {a} {suffix}".strip()
+
+
+async def run(args) -> None:
+    with open(args.csv, encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))[: args.limit or None]
+    suffixes = args.suffixes.split(",")
+    queries = list(dict.fromkeys(song_query(r["title"], r["artist"], s) for r in rows for s in suffixes))
+
+    backend = YouTubeAPIBackend(os.getenv("YOUTUBE_API_KEY", ""),
+                                os.getenv("YOUTUBE_API_BASE", YOUTUBE_API_BASE),
+                                max_connections=args.concurrency)
+    yt = YouTubeLookup(backend)
+    sem = asyncio.Semaphore(args.concurrency)
+    found = failed = 0
+
+    async def one(q: str):
+        nonlocal found, failed
+        async with sem:
+            try:
+                if await yt.lookup(q):
+                    found += 1
+            except YouTubeBackendError as e:
+                failed += 1
+                print(f"[fail] {q}: {e}")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    await backend.aclose()
+    purged = yt.purge_expired()
+    st = yt.stats()
+    print(f"queries: {len(queries)}, found: {found}, failed: {failed}, "
+          f"cached: {st['db_hits']}, fetched: {st['fetches']}, purged: {purged} "
+          f"({time.perf_counter() - t0:.1f}s)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="인기곡 YouTube videoId 캐시 예열")
+    ap.add_argument("--csv", default="../musicreco-front/public/top_songs.csv")
+    ap.add_argument("--limit", type=int, default=0, help="상위 N곡만 (0=전부)")
+    ap.add_argument("--suffixes", default=",official audio", help="질의 뒤에 붙일 문구들 (쉼표 구분)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# app/tools/taste_parity.py
+"""
+TasteVectors 증분 갱신(생성/곡 변경/삭제, 재구성) 결과와
+곡 목록으로 처음부터 계산한 합의 일치 여부 확인 (메모리 SQLite, 랜덤 임베딩).
+
+    python -m app.tools.taste_parity
+    python -m app.tools.taste_parity --users 20 --steps 200 --seed 1
+
+불일치 시 종료 코드 1.
+"""
+import argparse
+import random
+import sys
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+from app.idmap import IdMap
+from app.orm_models import Playlist, PlaylistItem, TasteVector, User
+from app.taste import Taste, TasteVectors
+
+
+def _add_playlist(db, uid: int, sids) -> int:
+    pl = Playlist(user_id=uid, title="p", tags=[])
+    db.add(pl); db.flush()
+    db.add_all([PlaylistItem(playlist_id=pl.id, position=i, song_id=s, title=str(s), artists=[], genres=[])
+                for i, s in enumerate(sids)])
+    db.flush()
+    return pl.id
+
+
+def _check(db, taste: TasteVectors, atol: float) -> float:
+    # 저장된 모든 행 vs _compute (곡 목록 기준), 사용자 행은 정확히 1개여야 함
+    worst = 0.0
+    for (uid,) in db.query(User.id):
+        user_rows = db.query(TasteVector).filter_by(user_id=uid, playlist_id=None).count()
+        if user_rows != 1:
+            raise AssertionError(f"user {uid}: {user_rows} user rows")
+        for r in db.query(TasteVector).filter_by(user_id=uid):
+            t, ref = Taste.from_row(r), taste._compute(db, uid, r.playlist_id)
+            if ref is None or (t.sgns_count, t.dae_count) != (ref.sgns_count, ref.dae_count):
+                raise AssertionError(f"user {uid} playlist {r.playlist_id}: counts "
+                                     f"{(t.sgns_count, t.dae_count)} != {ref and (ref.sgns_count, ref.dae_count)}")
+            worst = max(worst, float(np.abs(t.sgns_sum - ref.sgns_sum).max()),
+                        float(np.abs(t.dae_sum - ref.dae_sum).max()))
+    if worst > atol:
+        raise AssertionError(f"max|diff| {worst:.3e} > {atol}")
+    return worst
+
+
+def run(users: int, steps: int, num_songs: int, dim: int, seed: int, atol: float) -> float:
+    rng, prng = np.random.default_rng(seed), random.Random(seed)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    ids = np.sort(rng.choice(num_songs * 4, size=num_songs, replace=False)).astype(np.int64)
+    E = rng.standard_normal((num_songs, dim)).astype(np.float32)
+    W = rng.standard_normal((num_songs, dim // 2)).astype(np.float32)
+    taste = TasteVectors(E, IdMap(ids), W, IdMap(ids[::-1].copy()), version="v1")
+    songs = ids.tolist() + [-1, int(ids.max()) + 1]  # 모델에 없는 id도 섞음
+
+    # 기능 도입 전 데이터: 플레이리스트 여러 개, 취향 행 없음 → 첫 쓰기에서 재구성
+    uids = []
+    for u in range(users):
+        user = User(email=f"u{u}@x", name="u", password_hash="-")
+        db.add(user); db.flush()
+        uids.append(user.id)
+        for _ in range(prng.randint(0, 4)):
+            _add_playlist(db, user.id, prng.sample(songs, prng.randint(0, 8)))
+    db.commit()
+
+    for step in range(steps):
+        uid = prng.choice(uids)
+        if step == steps // 2:
+            taste.version = "v2"  # 모델 교체 → 이후 쓰기마다 사용자 재구성
+        pids = [pid for (pid,) in db.query(Playlist.id).filter_by(user_id=uid)]
+        op = prng.random()
+        if op < 0.4 or not pids:
+            sids = prng.sample(songs, prng.randint(0, 10))
+            pid = _add_playlist(db, uid, sids)
+            taste.on_playlist_created(db, uid, pid, sids)
+        elif op < 0.8:
+            pid = prng.choice(pids)
+            cur = [it for it in db.query(PlaylistItem).filter_by(playlist_id=pid)]
+            removed = prng.sample(cur, prng.randint(0, len(cur)))
+            added = prng.sample(songs, prng.randint(0, 5))
+            for it in removed:
+                db.delete(it)
+            db.add_all([PlaylistItem(playlist_id=pid, position=100 + i, song_id=s, title="", artists=[], genres=[])
+                        for i, s in enumerate(added)])
+            db.flush()
+            taste.on_items_changed(db, uid, pid, added=added, removed=[it.song_id for it in removed])
+        else:
+            pid = prng.choice(pids)
+            taste.on_playlist_deleted(db, uid, pid)
+            db.query(PlaylistItem).filter_by(playlist_id=pid).delete(synchronize_session=False)
+            db.query(Playlist).filter_by(id=pid).delete(synchronize_session=False)
+        db.commit()
+    worst = _check(db, taste, atol)
+    print(f"users: {users}, steps: {steps}, rebuilds: {taste.rebuilds}, max|diff| = {worst:.3e}")
+    db.close()
+    return worst
+
+
+def main():
+    ap = argparse.ArgumentParser(description="TasteVectors 증분 갱신 parity 확인")
+    ap.add_argument("--users", type=int, default=10)
+    ap.add_argument("--steps", type=int, default=300)
+    ap.add_argument("--num-songs", type=int, default=500)
+    ap.add_argument("--dim", type=int, default=16)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--atol", type=float, default=1e-3)
+    args = ap.parse_args()
+    try:
+        run(args.users, args.steps, args.num_songs, args.dim, args.seed, args.atol)
+    except AssertionError as e:
+        print(f"MISMATCH: {e}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.db import SessionLocal, run_write
+from app.orm_models import YtCache
+
+YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
+
+
+class YouTubeBackendError(Exception):
+    pass
+
+
+class YouTubeNotConfigured(YouTubeBackendError):
+    """API 키 없음 (캐시에 있는 질의는 그대로 응답, 캐시 미스만 실패)."""
+
+
+class YouTubeAPIBackend:
+    """
+    YouTube Data API search (embeddable 영상 첫 번째 videoId).
+    base_url을 바꾸면 같은 형식의 로컬 스텁 서버로 붙일 수 있다.
+    AsyncClient 하나를 재사용 (커넥션 풀 / keep-alive).
+    """
+
+    def __init__(self, api_key: str, base_url: str = YOUTUBE_API_BASE,
+                 max_connections: int = 20, timeout_s: float = 5.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections)
+        self._timeout = httpx.Timeout(timeout_s)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self._limits,
+                                             timeout=self._timeout)
+        return self._client
+
+    async def search(self, q: str, safe: bool = True) -> Optional[str]:
+        if not self.api_key:
+            raise YouTubeNotConfigured("YOUTUBE_API_KEY not set")
+        params = {
+            "key": self.api_key,
+            "part": "snippet",
+            "q": q,
+            "maxResults": 5,
+            "type": "video",
+            "videoEmbeddable": "true",    # ✅ 임베드 가능한 영상만
+        }
+        if safe:
+            params["safeSearch"] = "moderate"
+        try:
+            r = await self._http().get("/search", params=params)
+        except httpx.HTTPError as e:
+            raise YouTubeBackendError(str(e)) from e
+        if r.status_code != 200:
+            # 쿼터 초과/키 오류 등은 캐시하지 않음
+            raise YouTubeBackendError(f"HTTP {r.status_code}")
+        items = r.json().get("items") or []
+        return items[0]["id"]["videoId"] if items else None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def normalize_query(q: str) -> str:
+    return re.sub(r"\s+", " ", q).strip().casefold()
+
+
+class YouTubeLookup:
+    """
+    질의 → videoId 조회.
+    메모리 LRU → SQLite yt_cache (TTL) → 백엔드 순, 같은 질의가 동시에 들어오면 백엔드 호출 1번만.
+    결과 없음(None)도 neg_ttl 동안 캐시.
+    """
+
+    def __init__(self, backend, ttl_s: float = 30 * 86400, neg_ttl_s: float = 86400,
+                 mem_size: int = 5000):
+        self.backend = backend
+        self.ttl_s, self.neg_ttl_s = ttl_s, neg_ttl_s
+        self.mem_size = mem_size
+        self._mem: "OrderedDict[str, tuple[float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.mem_hits = self.db_hits = self.fetches = self.coalesced = self.errors = 0
+
+    def _mem_get(self, key: str):
+        with self._lock:
+            e = self._mem.get(key)
+            if e is None or e[0] <= time.time():
+                return False, None
+            self._mem.move_to_end(key)
+            return True, e[1]
+
+    def _mem_put(self, key: str, vid: Optional[str], expires: float):
+        with self._lock:
+            self._mem[key] = (expires, vid)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_size:
+                self._mem.popitem(last=False)
+
+    def _ttl(self, vid: Optional[str]) -> float:
+        return self.ttl_s if vid else self.neg_ttl_s
+
+    def _db_get(self, key: str):
+        db = SessionLocal()
+        try:
+            row = db.get(YtCache, key)
+            if row is None:
+                return False, None, 0.0
+            # fetched_at은 naive UTC → datetime끼리 비교 (timestamp()는 로컬 시각으로 해석함)
+            left = self._ttl(row.video_id) - (datetime.utcnow() - row.fetched_at).total_seconds()
+            return left > 0, row.video_id, time.time() + left
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, vid: Optional[str]):
+        def write(w):
+            row = w.get(YtCache, key)
+            if row is None:
+                w.add(YtCache(key=key, video_id=vid, fetched_at=datetime.utcnow()))
+            else:
+                row.video_id, row.fetched_at = vid, datetime.utcnow()
+        db = SessionLocal()
+        try:
+            run_write(db, write)
+        finally:
+            db.close()
+
+    async def lookup(self, q: str, safe: bool = True) -> Optional[str]:
+        key = f"{int(safe)}|{normalize_query(q)}"
+        hit, vid = self._mem_get(key)
+        if hit:
+            self.mem_hits += 1
+            return vid
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            vid = await self._resolve(key, q, safe)
+            fut.set_result(vid)
+            return vid
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # 기다리는 쪽이 없어도 경고 안 나도록
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _resolve(self, key: str, q: str, safe: bool) -> Optional[str]:
+        fresh, vid, expires = await run_in_threadpool(self._db_get, key)
+        if fresh:
+            self.db_hits += 1
+            self._mem_put(key, vid, expires)
+            return vid
+        self.fetches += 1
+        try:
+            vid = await self.backend.search(q, safe)
+        except YouTubeBackendError:
+            self.errors += 1
+            raise
+        await run_in_threadpool(self._db_put, key, vid)
+        self._mem_put(key, vid, time.time() + self._ttl(vid))
+        return vid
+
+    def purge_expired(self) -> int:
+        """TTL 지난 행 삭제 (prefetch 잡에서 호출)."""
+        cutoff = datetime.utcnow() - timedelta(seconds=max(self.ttl_s, self.neg_ttl_s))
+        db = SessionLocal()
+        try:
+            return run_write(db, lambda w: w.query(YtCache).filter(YtCache.fetched_at < cutoff)
+                                            .delete(synchronize_session=False))
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._mem)
+        return {"memory": size, "inflight": len(self._inflight), "mem_hits": self.mem_hits,
+                "db_hits": self.db_hits, "fetches": self.fetches,
+                "coalesced": self.coalesced, "errors": self.errors}
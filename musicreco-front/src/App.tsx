@@ -3,14 +3,13 @@ import type { ViewType, ApiRecItem, Song, UserInfo } from "@/types";
 import {
   recommendByDAE,
   recommendBySongTags,
-  recommendByTags,
+  recommendHybrid,
   createPlaylist,
   login,
   signup,
   getMe,
 } from "@/services/api";
 import { useGenreMap } from "@/hooks/useGenreMap";
-import { interleaveDedup } from "@/utils/interleave";
 import LoginView from "@/views/LoginView";
 import SignupView from "@/views/SignupView";
 import DashboardView from "@/views/DashboardView";
@@ -230,12 +229,7 @@ export default function App() {
     const seedIds = selectedSongs.map((s) => s.id);
     const exclude = [...seedIds];
 
-    const [byTags, byDae] = await Promise.all([
-      recommendByTags(selectedTags, 20, exclude),
-      recommendByDAE(seedIds, 20, exclude),
-    ]);
-
-    const merged = interleaveDedup(byTags, byDae, 20);
+    const merged = await recommendHybrid(seedIds, selectedTags, 20, exclude);
     const toSong = (r: ApiRecItem): Song => ({
       id: r.id,
       title: r.title,
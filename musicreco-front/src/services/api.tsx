@@ -69,6 +69,24 @@ export async function recommendByDAE(seedIds: number[], k = 20, exclude: number[
   return (j.items || []) as ApiRecItem[];
 }
 
+// SGNS(씨드 곡 + 태그) + DAE 점수를 서버에서 합산한 단일 top-k
+export async function recommendHybrid(
+  seedIds: number[],
+  tags: string[] = [],
+  k = 20,
+  exclude: number[] = [],
+  alpha = 0.6
+) {
+  if (!seedIds.length && !tags.length) return [] as ApiRecItem[];
+  const r = await fetch(`${API}/recommend`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ seed_song_ids: seedIds, tags, k, exclude, method: "hybrid", alpha }),
+  });
+  const j = await r.json();
+  return (j.items || []) as ApiRecItem[];
+}
+
 // ---------- Playlist ----------
 type MinimalPlaylist = {
   id: number;